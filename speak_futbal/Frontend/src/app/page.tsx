@@ -16,6 +16,9 @@ export default function Home() {
   // Remove: const [showProfile, setShowProfile] = useState(false);
   const [events, setEvents] = useState<Event[]>([]);
   const [eventsLoading, setEventsLoading] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [joinedEventIds, setJoinedEventIds] = useState<Set<number>>(new Set());
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedEventType, setSelectedEventType] = useState<string>("all");
 
@@ -36,15 +39,21 @@ export default function Home() {
     checkAuth();
   }, []);
 
+  // Search and filter on the server, once typing pauses
   useEffect(() => {
-    fetchEvents();
-  }, []);
+    const timeout = setTimeout(fetchEvents, 300);
+    return () => clearTimeout(timeout);
+  }, [searchTerm, selectedEventType]);
 
   const fetchEvents = async () => {
     try {
       setEventsLoading(true);
-      const eventsData = await ApiService.getEvents();
-      setEvents(eventsData);
+      const page = await ApiService.getEvents({
+        search: searchTerm.trim(),
+        event_type: selectedEventType === "all" ? "" : selectedEventType,
+      });
+      setEvents(page.results);
+      setNextPage(page.next);
     } catch (err) {
       console.error("Failed to fetch events:", err);
     } finally {
@@ -52,6 +61,38 @@ export default function Home() {
     }
   };
 
+  const loadMoreEvents = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const page = await ApiService.getEventsPage(nextPage);
+      setEvents(previous => [...previous, ...page.results]);
+      setNextPage(page.next);
+    } catch (err) {
+      console.error("Failed to load more events:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  useEffect(() => {
+    fetchJoinedEvents();
+  }, [user]);
+
+  // The events list only carries participant_count; ask which events this user joined
+  const fetchJoinedEvents = async () => {
+    if (!user) {
+      setJoinedEventIds(new Set());
+      return;
+    }
+    try {
+      const joined = await ApiService.getAllEvents({ participant: String(user.id) });
+      setJoinedEventIds(new Set(joined.map(event => event.id)));
+    } catch (err) {
+      console.error("Failed to fetch joined events:", err);
+    }
+  };
+
   const handleLoginSuccess = (userData: any) => {
   const user = userData.user ?? userData;
   setUser(user);
@@ -87,6 +128,7 @@ export default function Home() {
     try {
       await ApiService.participateInEvent(eventId);
       fetchEvents(); // Refresh events to update participant count
+      fetchJoinedEvents();
     } catch (err) {
       console.error("Failed to join event:", err);
     }
@@ -96,23 +138,16 @@ export default function Home() {
     try {
       await ApiService.leaveEvent(eventId);
       fetchEvents(); // Refresh events to update participant count
+      fetchJoinedEvents();
     } catch (err) {
       console.error("Failed to leave event:", err);
     }
   };
 
   const isUserParticipating = (event: Event) => {
-    return event.participants.some(participant => participant.id === user?.id);
+    return joinedEventIds.has(event.id);
   };
 
-  const filteredEvents = events.filter(event => {
-    const matchesSearch = event.title.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         event.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         event.location.toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesType = selectedEventType === "all" || event.event_type === selectedEventType;
-    return matchesSearch && matchesType;
-  });
-
   return (
     <main className="min-h-screen bg-white">
       {/* Navigation Bar */}
@@ -291,7 +326,7 @@ export default function Home() {
               <div className="inline-block animate-spin rounded-full h-8 w-8 border-b-2 border-[#5D6C8A]"></div>
               <p className="mt-4 text-gray-600">Loading events...</p>
             </div>
-          ) : filteredEvents.length === 0 ? (
+          ) : events.length === 0 ? (
             <div className="text-center py-12">
               <CalendarIcon className="w-16 h-16 text-gray-400 mx-auto mb-4" />
               <h3 className="text-xl font-semibold text-gray-900 mb-2">No events found</h3>
@@ -303,7 +338,7 @@ export default function Home() {
             </div>
           ) : (
             <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-              {filteredEvents.map((event) => (
+              {events.map((event) => (
                 <div key={event.id} className="bg-white rounded-lg shadow-md hover:shadow-lg transition-shadow duration-300 overflow-hidden">
                   <div className="p-6">
                     <div className="flex justify-between items-start mb-4">
@@ -327,7 +362,7 @@ export default function Home() {
                       <div className="flex items-center gap-2 text-sm text-gray-500">
                         <UsersIcon className="w-4 h-4" />
                         <span>
-                          {event.participants.length} participant{event.participants.length !== 1 ? 's' : ''}
+                          {event.participant_count} participant{event.participant_count !== 1 ? 's' : ''}
                           {event.max_participants && ` / ${event.max_participants} max`}
                         </span>
                       </div>
@@ -348,14 +383,14 @@ export default function Home() {
                         ) : (
                           <button
                             onClick={() => handleJoinEvent(event.id)}
-                            disabled={Boolean(event.max_participants && event.participants.length >= event.max_participants)}
+                            disabled={Boolean(event.max_participants && event.participant_count >= event.max_participants)}
                             className={`px-4 py-2 rounded-lg text-sm transition-colors ${
-                              event.max_participants && event.participants.length >= event.max_participants
+                              event.max_participants && event.participant_count >= event.max_participants
                                 ? 'bg-gray-300 text-gray-500 cursor-not-allowed'
                                 : 'bg-[#5D6C8A] text-white hover:bg-[#4a5870]'
                             }`}
                           >
-                            {event.max_participants && event.participants.length >= event.max_participants
+                            {event.max_participants && event.participant_count >= event.max_participants
                               ? 'Event Full'
                               : 'Join Event'
                             }
@@ -375,6 +410,18 @@ export default function Home() {
               ))}
             </div>
           )}
+
+          {!eventsLoading && nextPage && (
+            <div className="text-center mt-8">
+              <button
+                onClick={loadMoreEvents}
+                disabled={loadingMore}
+                className="bg-[#5D6C8A] text-white px-6 py-2 rounded-lg hover:bg-[#4a5870] transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? "Loading..." : "Load more events"}
+              </button>
+            </div>
+          )}
         </div>
       </section>
     </main>
@@ -91,18 +91,15 @@ export default function ProfilePage() {
 
   const fetchUserEvents = async () => {
     try {
-      const events = await ApiService.getEvents();
-       
-      // Filter events created by the current user
-      const userCreatedEvents = events.filter(event => event.created_by.id === user?.id);
+      const [userCreatedEvents, joined] = await Promise.all([
+        ApiService.getAllEvents({ created_by: String(user?.id) }),
+        ApiService.getAllEvents({ participant: String(user?.id) }),
+      ]);
       
       setUserEvents(userCreatedEvents);
       
       // Filter events that the user has joined (but not created)
-      const userJoinedEvents = events.filter(event => 
-        event.participants.some(p => p.id === user?.id) && 
-        event.created_by.id !== user?.id
-      );
+      const userJoinedEvents = joined.filter(event => event.created_by.id !== user?.id);
       console.log("User Joined Events:", userJoinedEvents.length);
       setJoinedEvents(userJoinedEvents);
     } catch (err) {
@@ -400,7 +397,7 @@ export default function ProfilePage() {
                         {event.event_type}
                       </span>
                       <span className="text-sm text-gray-500">
-                        {event.participants.length} participants
+                        {event.participant_count} participants
                       </span>
                     </div>
                   </div>
@@ -442,7 +439,7 @@ export default function ProfilePage() {
                         {event.event_type}
                       </span>
                       <span className="text-sm text-gray-500">
-                        {event.participants.length} participants
+                        {event.participant_count} participants
                       </span>
                     </div>
                     <div className="mt-3 pt-3 border-t border-gray-100">
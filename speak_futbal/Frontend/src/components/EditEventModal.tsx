@@ -1,5 +1,5 @@
-import React, { useState } from "react";
-import ApiService, { Event } from "@/services/api";
+import React, { useEffect, useState } from "react";
+import ApiService, { Event, User } from "@/services/api";
 import { XMarkIcon } from "@heroicons/react/24/outline";
 
 interface EditEventModalProps {
@@ -24,6 +24,19 @@ const EditEventModal: React.FC<EditEventModalProps> = ({ event, onClose, onEvent
   const [error, setError] = useState("");
   const [success, setSuccess] = useState("");
   const [removingParticipantId, setRemovingParticipantId] = useState<number | null>(null);
+  const [participants, setParticipants] = useState<User[]>([]);
+
+  const fetchParticipants = async () => {
+    try {
+      setParticipants(await ApiService.getEventParticipants(event.id));
+    } catch (err) {
+      setError("Failed to load participants");
+    }
+  };
+
+  useEffect(() => {
+    fetchParticipants();
+  }, [event.id]);
 
   const handleUpdate = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -50,6 +63,7 @@ const EditEventModal: React.FC<EditEventModalProps> = ({ event, onClose, onEvent
     try {
       await ApiService.removeParticipantFromEvent(event.id, userId);
       setSuccess("Participant removed!");
+      fetchParticipants();
       onEventUpdated(); // Refresh event data in parent
     } catch (err:any) {
        
@@ -104,7 +118,7 @@ const EditEventModal: React.FC<EditEventModalProps> = ({ event, onClose, onEvent
         </form>
         <h3 className="mt-6 font-semibold text-black">Participants</h3>
         <ul>
-          {event.participants.map(p => (
+          {participants.map(p => (
             <li key={p.id} className="flex justify-between items-center py-1 text-black">
               <span>{p.username}</span>
               <button
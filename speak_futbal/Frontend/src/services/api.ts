@@ -33,15 +33,37 @@ export interface Event {
     latitude: number;
     longitude: number;
     event_type: 'match' | 'tournament' | 'training' | 'other';
+    start_date: string;
+    end_date: string;
     created_by: User;
-    participants: User[];
+    participant_count: number;
+    // Only on the event detail; the full list is at /events/<id>/participants/
+    participants_preview?: User[];
     max_participants?: number;
 }
 
+// The events and participants lists are paginated by cursor
+export interface Page<T> {
+    next: string | null;
+    previous: string | null;
+    results: T[];
+}
+
 // const API_BASE_URL = 'http://localhost:8000/api';
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000/api';
 
 
+interface EventFilters {
+  lat?: string;
+  lng?: string;
+  radius?: string;
+  search?: string;
+  event_type?: string;
+  // A user id: only the events they joined, or created
+  participant?: string;
+  created_by?: string;
+}
+
 interface EventData {
   title: string;
   description: string;
@@ -186,19 +208,48 @@ class ApiService {
     return response.json();
   }
 
+  // Follow the `next` links of a paginated list and collect every page
+  private static async fetchAllPages<T>(url: string): Promise<T[]> {
+    const results: T[] = [];
+    let next: string | null = url;
+    while (next) {
+      const response = await this.fetchWithAuth(next);
+      const page: Page<T> = await response.json();
+      results.push(...page.results);
+      next = page.next;
+    }
+    return results;
+  }
+
   // Event methods
-  static async getEvents(params?: { lat?: string; lng?: string; radius?: string }): Promise<Event[]> {
-    const queryParams = new URLSearchParams();
-    if (params?.lat) queryParams.append('lat', params.lat);
-    if (params?.lng) queryParams.append('lng', params.lng);
-    if (params?.radius) queryParams.append('radius', params.radius);
-
-    const response = await this.fetchWithAuth(
-      `${API_BASE_URL}/events/${queryParams.toString() ? `?${queryParams.toString()}` : ''}`
-    );
+  private static eventsUrl(params: EventFilters = {}, pageSize = 20): string {
+    const queryParams = new URLSearchParams({ page_size: String(pageSize) });
+    for (const [name, value] of Object.entries(params)) {
+      if (value) queryParams.append(name, value);
+    }
+    return `${API_BASE_URL}/events/?${queryParams.toString()}`;
+  }
+
+  // The first page of events; pass its `next` to getEventsPage() for more
+  static async getEvents(params?: EventFilters): Promise<Page<Event>> {
+    const response = await this.fetchWithAuth(this.eventsUrl(params));
+    return response.json();
+  }
+
+  static async getEventsPage(url: string): Promise<Page<Event>> {
+    const response = await this.fetchWithAuth(url);
     return response.json();
   }
 
+  // Every matching event; only for lists bounded by one user's activity
+  static async getAllEvents(params: Pick<EventFilters, 'participant' | 'created_by'>): Promise<Event[]> {
+    return this.fetchAllPages<Event>(this.eventsUrl(params, 100));
+  }
+
+  static async getEventParticipants(id: number): Promise<User[]> {
+    return this.fetchAllPages<User>(`${API_BASE_URL}/events/${id}/participants/?page_size=100`);
+  }
+
   static async getEvent(id: number) {
     return this.fetchWithAuth(`${API_BASE_URL}/events/${id}/`);
   }
@@ -4,7 +4,10 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone
 from datetime import timedelta
-from .models import Event
+from stats.rollups import record_active_change
+from .models import Event, WaitlistEntry
+from .cache import invalidate_events
+from . import exports
 
 class EventTypeFilter(admin.SimpleListFilter):
     title = 'Event Type'
@@ -83,11 +86,6 @@ class EventAdmin(admin.ModelAdmin):
     
     actions = ['activate_events', 'deactivate_events', 'export_events', 'generate_event_report']
     
-    def participant_count(self, obj):
-        return obj.participants.count()
-    participant_count.short_description = 'Participants'
-    participant_count.admin_order_field = 'participants__count'
-    
     def location_link(self, obj):
         if obj.latitude and obj.longitude:
             url = f"https://www.google.com/maps?q={obj.latitude},{obj.longitude}"
@@ -96,18 +94,28 @@ class EventAdmin(admin.ModelAdmin):
     location_link.short_description = 'Map Link'
     
     def activate_events(self, request, queryset):
+        # Taken before the update: under an is_active filter the queryset
+        # no longer matches the events afterwards
+        pks = list(queryset.values_list('pk', flat=True))
+        record_active_change(queryset, True)
         updated = queryset.update(is_active=True)
+        invalidate_events(pks)
         self.message_user(request, f'{updated} events have been activated.')
     activate_events.short_description = "Activate selected events"
     
     def deactivate_events(self, request, queryset):
+        # Taken before the update: under an is_active filter the queryset
+        # no longer matches the events afterwards
+        pks = list(queryset.values_list('pk', flat=True))
+        record_active_change(queryset, False)
         updated = queryset.update(is_active=False)
+        invalidate_events(pks)
         self.message_user(request, f'{updated} events have been deactivated.')
     deactivate_events.short_description = "Deactivate selected events"
     
     def export_events(self, request, queryset):
-        # This would typically export to CSV/Excel
-        self.message_user(request, f'{queryset.count()} events selected for export.')
+        # Streamed straight from the cursor; participant_count is the stored column
+        return exports.export_events(queryset, 'csv', filename='events')
     export_events.short_description = "Export selected events"
     
     def generate_event_report(self, request, queryset):
@@ -117,9 +125,18 @@ class EventAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('created_by').prefetch_related('participants')
+        return qs.select_related('created_by')
     
     def save_model(self, request, obj, form, change):
         if not change:  # If creating new event
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ['event', 'user', 'created_at']
+    list_select_related = ['event', 'user']
+    search_fields = ['event__title', 'user__username', 'user__email']
+    raw_id_fields = ['event', 'user']
+    ordering = ['event', 'id']
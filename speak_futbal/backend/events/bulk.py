@@ -0,0 +1,179 @@
+"""
+Bulk import of events from NDJSON or CSV.
+
+The upload is read line by line from the request stream, never as a
+whole body, and handled in chunks of IMPORT_CHUNK_SIZE records. Each
+chunk is validated, then inserted with one ``bulk_create`` for the events
+and one for their participant rows, in its own transaction. Memory use is
+bounded by the chunk size, not the file.
+
+``bulk_create`` skips ``Event.save()`` and model signals, so the importer
+fills in ``geohash`` and ``participant_count`` itself, indexes each chunk
+for search, records it in the dashboard statistics and invalidates cached
+list responses once at the end.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework import serializers
+
+from stats.rollups import record_events
+
+from .cache import invalidate_events
+from .geo import encode_geohash
+from .models import Event
+from .search import get_search_backend
+
+User = get_user_model()
+
+IMPORT_CHUNK_SIZE = 1000
+# Errors beyond this many are counted but not reported individually
+MAX_REPORTED_ERRORS = 100
+
+IMPORT_FIELDS = (
+    'title', 'description', 'event_type', 'location', 'latitude', 'longitude',
+    'start_date', 'end_date', 'max_participants', 'participants',
+)
+
+
+class EventImportSerializer(serializers.ModelSerializer):
+    # User ids; a list in NDJSON, space-separated in CSV
+    participants = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    class Meta:
+        model = Event
+        fields = IMPORT_FIELDS
+
+    def validate(self, attrs):
+        participants = set(attrs.get('participants', ()))
+        capacity = attrs.get('max_participants')
+        if capacity is not None and len(participants) > capacity:
+            raise serializers.ValidationError({'participants': 'More participants than max_participants'})
+        return attrs
+
+
+class InvalidRecord:
+    """Stands in for a record that couldn't be decoded at all."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def ndjson_records(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield InvalidRecord('Invalid JSON')
+            continue
+        yield record if isinstance(record, dict) else InvalidRecord('Expected a JSON object')
+
+
+def csv_records(lines):
+    for record in csv.DictReader(lines):
+        # CSV has no null or list: blank means unset, participants are space-separated
+        record = {key: value for key, value in record.items() if key and value not in ('', None)}
+        if 'participants' in record:
+            record['participants'] = record['participants'].split()
+        yield record
+
+
+def decode_lines(stream):
+    for line in stream:
+        yield line.decode('utf-8-sig')
+
+
+class EventImporter:
+    """
+    Validate and insert records for ``creator``, one chunk at a time.
+
+    ``run()`` returns ``{'created', 'failed', 'errors'}``; each reported
+    error carries the 1-based record number and the field errors.
+    """
+
+    def __init__(self, creator, chunk_size=IMPORT_CHUNK_SIZE):
+        self.creator = creator
+        self.chunk_size = chunk_size
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.search_backend = get_search_backend()
+        # One instance validates every record; building a ModelSerializer's
+        # fields costs more than validating a row with them
+        self.serializer = EventImportSerializer()
+
+    def run(self, records):
+        numbered = enumerate(records, start=1)
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        if self.created:
+            invalidate_events()
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+    def fail(self, number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'record': number, 'errors': errors})
+
+    def import_chunk(self, chunk):
+        valid = []
+        for number, record in chunk:
+            if isinstance(record, InvalidRecord):
+                self.fail(number, {'non_field_errors': [record.message]})
+                continue
+            try:
+                valid.append((number, self.serializer.run_validation(record)))
+            except serializers.ValidationError as exc:
+                self.fail(number, exc.detail)
+
+        # Participants must exist; checked for the whole chunk in one query
+        referenced = {user_id for _, data in valid for user_id in data['participants']}
+        existing = set(User.objects.filter(pk__in=referenced).values_list('pk', flat=True))
+        rows = []
+        for number, data in valid:
+            missing = set(data['participants']) - existing
+            if missing:
+                self.fail(number, {'participants': [f'Unknown user ids: {sorted(missing)}']})
+            else:
+                rows.append(data)
+        if rows:
+            self.insert(rows)
+
+    def insert(self, rows):
+        events = []
+        for data in rows:
+            fields = {name: value for name, value in data.items() if name != 'participants'}
+            event = Event(created_by=self.creator, **fields)
+            event.geohash = encode_geohash(event.latitude, event.longitude)
+            event.participant_count = len(set(data['participants']))
+            events.append(event)
+
+        field = Event.participants.field
+        through = field.remote_field.through
+        event_column, user_column = field.m2m_column_name(), field.m2m_reverse_name()
+        with transaction.atomic():
+            Event.objects.bulk_create(events)
+            through.objects.bulk_create([
+                through(**{event_column: event.pk, user_column: user_id})
+                for event, data in zip(events, rows)
+                for user_id in set(data['participants'])
+            ])
+            self.search_backend.index([event.pk for event in events])
+            record_events(events)
+        self.created += len(events)
+
+
+def import_events(stream, content_type, creator):
+    """Import an uploaded byte stream; ``content_type`` picks NDJSON or CSV."""
+    lines = decode_lines(stream)
+    records = csv_records(lines) if content_type == 'text/csv' else ndjson_records(lines)
+    return EventImporter(creator).run(records)
@@ -0,0 +1,190 @@
+"""
+Versioned read-through cache for event API responses.
+
+Serialized response data is stored under keys that embed a version counter:
+the global version for list responses and a per-event version for detail
+responses. Writes never delete cached entries; signals bump the counters
+instead, so stale entries simply stop being addressed and age out.
+
+The async views call the cache synchronously too: it is process memory or
+a sub-millisecond Redis round trip, and Django's async cache methods would
+only move each call onto the shared sync thread.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .geo import snap_coordinate
+from .search import search_terms
+
+GLOBAL_VERSION_KEY = 'events:v:global'
+EVENT_VERSION_KEY = 'events:v:event:{pk}'
+HITS_KEY = 'events:metrics:hits'
+MISSES_KEY = 'events:metrics:misses'
+
+# Query params that change the list response, in key order
+LIST_PARAMS = ('event_type', 'participant', 'created_by', 'lat', 'lng', 'radius', 'search', 'ordering', 'cursor', 'page_size', 'fieldset')
+
+
+def get_cache():
+    return caches[getattr(settings, 'EVENTS_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'EVENTS_CACHE_TIMEOUT', 300)
+
+
+def _seed():
+    # Counters start from the clock so a counter that was evicted and
+    # re-created never falls back to a value an old entry was stored under
+    return time.time_ns() // 1000
+
+
+def get_version(key):
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed(), timeout=None)
+    cache.set(f'{key}:at', time.time(), timeout=None)
+
+
+def get_changed_at(key):
+    """Return when the version counter ``key`` was last bumped, if known."""
+    return get_cache().get(f'{key}:at')
+
+
+def invalidate_event(pk):
+    """Invalidate the detail response of one event and every list response."""
+    bump_version(EVENT_VERSION_KEY.format(pk=pk))
+    bump_version(GLOBAL_VERSION_KEY)
+
+
+def invalidate_events(pks=()):
+    """
+    Invalidate every list response and the detail responses of ``pks``.
+
+    For writes that bypass model signals, such as ``QuerySet.update()``.
+    """
+    for pk in pks:
+        bump_version(EVENT_VERSION_KEY.format(pk=pk))
+    bump_version(GLOBAL_VERSION_KEY)
+
+
+def _record(key):
+    if not getattr(settings, 'EVENTS_CACHE_METRICS', True):
+        return
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def cache_metrics():
+    cache = get_cache()
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_cache_metrics():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def list_params(request, point=None, fieldset=''):
+    """
+    Normalize the list query params into the values that affect the response.
+
+    ``point`` is the ``(lat, lng, radius)`` the view queries with. Its
+    coordinates are snapped to a grid of COORDINATE_PLACES decimal places
+    (~110m) here, so nearby requests from the same cell share an entry; the
+    query itself uses the exact origin. ``fieldset`` is the normalized
+    ``?fields=``/``?expand=`` key, see events.fieldsets.
+    """
+    query = request.query_params
+    latitude, longitude, radius = point or ('', '', '')
+    if point:
+        latitude, longitude = snap_coordinate(latitude), snap_coordinate(longitude)
+    return {
+        'event_type': query.get('event_type', ''),
+        'participant': query.get('participant', ''),
+        'created_by': query.get('created_by', ''),
+        'lat': str(latitude),
+        'lng': str(longitude),
+        'radius': str(radius),
+        'search': ' '.join(term.lower() for term in search_terms(query.get('search', ''))),
+        'ordering': query.get('ordering', ''),
+        'cursor': query.get('cursor', ''),
+        'page_size': query.get('page_size', ''),
+        'fieldset': fieldset,
+    }
+
+
+def list_cache_key(request, params):
+    # Pagination links are absolute, so the host is part of the response
+    raw = '|'.join([request.get_host(), request.path] + [params[name] for name in LIST_PARAMS])
+    digest = hashlib.sha1(raw.encode()).hexdigest()
+    return f'events:list:{get_version(GLOBAL_VERSION_KEY)}:{digest}'
+
+
+def detail_cache_key(pk, fieldset=''):
+    key = f'events:detail:{pk}:{get_version(EVENT_VERSION_KEY.format(pk=pk))}'
+    if fieldset:
+        key += ':' + hashlib.sha1(fieldset.encode()).hexdigest()
+    return key
+
+
+def _cached(key):
+    data = get_cache().get(key)
+    if data is None:
+        _record(MISSES_KEY)
+        return None
+    _record(HITS_KEY)
+    return Response(data, headers={'X-Cache': 'HIT'})
+
+
+def _store(key, response):
+    if response.status_code == 200:
+        get_cache().set(key, response.data, timeout=_timeout())
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cached_response(key, build):
+    """
+    Return a response for ``key`` from the cache, or build and store it.
+
+    Only the serialized data of successful responses is cached; rendering
+    still happens per request so content negotiation is unaffected.
+    """
+    response = _cached(key)
+    if response is None:
+        response = _store(key, build())
+    return response
+
+
+async def acached_response(key, build):
+    """``cached_response()`` with ``build`` a coroutine function."""
+    response = _cached(key)
+    if response is None:
+        response = _store(key, await build())
+    return response
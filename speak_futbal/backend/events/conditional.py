@@ -0,0 +1,129 @@
+"""
+ETag and Last-Modified support for the events API.
+
+Validators are computed from the cache version counters and
+``Event.updated_at`` without serializing anything, so a matching
+``If-None-Match``/``If-Modified-Since`` is answered with a 304 before the
+response cache, the serializer or (for details) the participant query is
+touched.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import (
+    EVENT_VERSION_KEY,
+    GLOBAL_VERSION_KEY,
+    get_cache,
+    get_changed_at,
+    get_version,
+)
+from .models import Event
+
+
+def _event_version(pk):
+    """The event's version and the key its ``updated_at`` is cached under for it."""
+    version = get_version(EVENT_VERSION_KEY.format(pk=pk))
+    return version, f'events:validators:{pk}:{version}'
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest())
+
+
+def list_validators(request, cache_key):
+    """
+    Return ``(etag, last_modified)`` for a list response.
+
+    ``cache_key`` already embeds the global version and the normalized
+    params; the negotiated format is added so that JSON and browsable API
+    renderings get different strong ETags.
+    """
+    etag = make_etag(cache_key, request.accepted_renderer.format)
+    changed_at = get_changed_at(GLOBAL_VERSION_KEY)
+    return etag, int(changed_at) if changed_at is not None else None
+
+
+def detail_validators(request, pk, fieldset=''):
+    """
+    Return ``(etag, last_modified)`` for an event, or ``(None, None)`` if it
+    doesn't exist. ``fieldset`` tells apart sparse and expanded renderings.
+
+    ``updated_at`` is looked up once per event version and cached with it, so
+    repeated polls cost no queries. Participant changes don't touch
+    ``updated_at``; they are folded in through the event version and the
+    time it was last bumped.
+    """
+    version, validators_key = _event_version(pk)
+    cache = get_cache()
+    updated_at = cache.get(validators_key)
+    if updated_at is None:
+        updated_at = Event.objects.active().filter(pk=pk).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None, None
+        cache.set(validators_key, updated_at)
+    return _detail_validators(request, pk, fieldset, version, updated_at)
+
+
+async def adetail_validators(request, pk, fieldset=''):
+    version, validators_key = _event_version(pk)
+    cache = get_cache()
+    updated_at = cache.get(validators_key)
+    if updated_at is None:
+        updated_at = await Event.objects.active().filter(pk=pk).values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            return None, None
+        cache.set(validators_key, updated_at)
+    return _detail_validators(request, pk, fieldset, version, updated_at)
+
+
+def _detail_validators(request, pk, fieldset, version, updated_at):
+    last_modified = updated_at.timestamp()
+    changed_at = get_changed_at(EVENT_VERSION_KEY.format(pk=pk))
+    if changed_at is not None:
+        last_modified = max(last_modified, changed_at)
+
+    etag = make_etag(pk, updated_at.isoformat(), version, fieldset, request.accepted_renderer.format)
+    # HTTP dates have one-second resolution
+    return etag, int(last_modified)
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_response(request, etag, last_modified, build):
+    """
+    Answer 304 Not Modified if the request's validators match, otherwise
+    build the response and attach ``ETag``/``Last-Modified`` to it.
+    """
+    if etag is None:
+        return build()
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _set_validators(not_modified, etag, last_modified)
+
+    response = build()
+    if response.status_code == 200:
+        _set_validators(response, etag, last_modified)
+    return response
+
+
+async def aconditional_response(request, etag, last_modified, build):
+    """``conditional_response()`` with ``build`` a coroutine function."""
+    if etag is None:
+        return await build()
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _set_validators(not_modified, etag, last_modified)
+
+    response = await build()
+    if response.status_code == 200:
+        _set_validators(response, etag, last_modified)
+    return response
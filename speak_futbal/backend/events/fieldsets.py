@@ -0,0 +1,74 @@
+"""
+Sparse fieldsets and expansion for the events read endpoints.
+
+``?fields=id,latitude,longitude,event_type`` narrows a response to those
+fields; the compiled serializer then selects only their columns and skips
+the ``created_by`` join unless it was asked for. ``?expand=participants``
+embeds the participant list, which is otherwise not loaded at all; it
+costs one query for the whole page.
+"""
+from rest_framework.exceptions import ValidationError
+
+from .compiled import readable_fields
+from .participants import aparticipants_by_event, participants_by_event
+
+EXPANDABLE = ('participants',)
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class Fieldset:
+    """
+    The fields and expansions requested of ``serializer_class``.
+
+    ``fields`` is None when the default fields were asked for, otherwise a
+    tuple in serializer order, so equal requests share compiled serializers
+    and cache entries however their parameters were spelled.
+    """
+
+    def __init__(self, request, serializer_class):
+        available = [name for name in readable_fields(serializer_class) if name not in EXPANDABLE]
+        requested = _names(request.query_params.get('fields', ''))
+        expand = _names(request.query_params.get('expand', ''))
+
+        errors = {}
+        unknown = sorted(set(requested) - set(available))
+        if unknown:
+            errors['fields'] = f'Unknown fields: {", ".join(unknown)}. Available: {", ".join(available)}'
+        unknown = sorted(set(expand) - set(EXPANDABLE))
+        if unknown:
+            errors['expand'] = f'Cannot expand: {", ".join(unknown)}. Expandable: {", ".join(EXPANDABLE)}'
+        if errors:
+            raise ValidationError(errors)
+
+        self.fields = tuple(name for name in available if name in requested) if requested else None
+        self.expand = tuple(name for name in EXPANDABLE if name in expand)
+
+    @property
+    def key(self):
+        """A string identifying the fieldset for cache keys and ETags; empty for the defaults."""
+        if self.fields is None and not self.expand:
+            return ''
+        return f'{",".join(self.fields or ())}|{",".join(self.expand)}'
+
+    def includes(self, name):
+        return self.fields is None or name in self.fields
+
+    def expand_into(self, data, event_ids):
+        """Add the expansions to ``data``, the representations of ``event_ids`` in order."""
+        if 'participants' in self.expand:
+            self._add_participants(data, event_ids, participants_by_event(event_ids))
+        return data
+
+    async def aexpand_into(self, data, event_ids):
+        if 'participants' in self.expand:
+            self._add_participants(data, event_ids, await aparticipants_by_event(event_ids))
+        return data
+
+    @staticmethod
+    def _add_participants(data, event_ids, participants):
+        for item, event_id in zip(data, event_ids):
+            item['participants'] = participants.get(event_id, [])
+
@@ -0,0 +1,156 @@
+import math
+
+EARTH_RADIUS_KM = 6371.0088
+# On the sphere haversine_km measures on, so the box and the distance agree
+KM_PER_DEGREE = math.radians(EARTH_RADIUS_KM)
+
+# Precision stored on Event.geohash; 9 characters is a ~5m x 5m cell.
+GEOHASH_PRECISION = 9
+# Upper bound on the number of prefixes used to cover a search box.
+MAX_COVERING_CELLS = 16
+# Largest accepted nearby-search radius; wider searches cover too many events.
+MAX_RADIUS_KM = 500.0
+# Decimal places nearby-search origins are snapped to (~110m at the equator).
+COORDINATE_PLACES = 3
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair into a geohash string of ``precision`` characters."""
+    latitude = float(latitude)
+    longitude = float(longitude)
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        target, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (target[0] + target[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            target[0] = mid
+        else:
+            bits <<= 1
+            target[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def snap_coordinate(value, places=COORDINATE_PLACES):
+    """Round a coordinate onto a fixed grid so nearby origins compare equal."""
+    return round(float(value), places)
+
+
+def cell_size(precision):
+    """Return the (lat, lng) size in degrees of a geohash cell."""
+    total_bits = precision * 5
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def prefix_range(prefix):
+    """
+    Return the half-open ``[low, high)`` string range matching ``prefix``.
+
+    Range lookups use a plain btree index on every backend, which a
+    ``LIKE 'prefix%'`` does not. ``high`` is None when the prefix is all 'z'.
+    """
+    chars = list(prefix)
+    while chars:
+        index = _BASE32.index(chars[-1])
+        if index + 1 < len(_BASE32):
+            chars[-1] = _BASE32[index + 1]
+            return prefix, ''.join(chars)
+        chars.pop()
+    return prefix, None
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return ``(min_lat, max_lat, min_lng, max_lng)`` enclosing the circle.
+
+    Longitudes are not wrapped, so the box may extend past +/-180 near the
+    antimeridian; ``covering_cells`` normalizes them.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat = max(latitude - lat_delta, -90.0)
+    max_lat = min(latitude + lat_delta, 90.0)
+
+    # The box is narrowest at the latitude furthest from the equator.
+    widest_lat = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest_lat))
+    if widest_lat >= 90.0 or cos_lat <= 0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    lng_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    if lng_delta >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, longitude - lng_delta, longitude + lng_delta
+
+
+def _normalize_longitude(longitude):
+    return ((longitude + 180.0) % 360.0) - 180.0
+
+
+def _cells_in_box(box, precision, limit):
+    min_lat, max_lat, min_lng, max_lng = box
+    lat_step, lng_step = cell_size(precision)
+    cells = set()
+
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cells.add(encode_geohash(lat, _normalize_longitude(lng), precision))
+            if len(cells) > limit:
+                return None
+            if lng >= max_lng:
+                break
+            lng = min(lng + lng_step, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_step, max_lat)
+
+    return cells
+
+
+def covering_cells(latitude, longitude, radius_km, max_cells=MAX_COVERING_CELLS):
+    """
+    Return the smallest set of geohash prefixes covering the search circle.
+
+    The finest precision whose covering stays within ``max_cells`` prefixes
+    is chosen. An empty list means the circle spans the whole globe and no
+    cell prefilter should be applied.
+    """
+    if not all(math.isfinite(value) for value in (latitude, longitude, radius_km)):
+        # A NaN box would never be walked to its end
+        raise ValueError('latitude, longitude and radius must be finite')
+    box = bounding_box(latitude, longitude, radius_km)
+    best = []
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        cells = _cells_in_box(box, precision, max_cells)
+        if cells is None:
+            break
+        best = sorted(cells)
+    return best
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
@@ -0,0 +1,191 @@
+"""
+Live updates for events, published to subscribers of Server-Sent Events
+streams (see events.streams).
+
+Every change is published on the event's channel, ``event:<pk>``, and on
+the channel of the geohash cell it lies in, ``cell:<geohash[:5]>``, a
+roughly 5km x 5km square. Messages are dicts with a ``type`` of:
+
+- ``participation``: ``event``, ``action`` and the new ``participant_count``
+- ``created`` and ``updated``: ``event``, the event as the list endpoint
+  shows it
+- ``deleted``: ``event``, the id
+
+An event moved to another cell is announced in its new cell only.
+
+The broker is pluggable through ``EVENTS_LIVE_BROKER``. ``InProcessBroker``
+reaches the subscribers of the same process; ``RedisBroker`` fans out over
+Redis pub/sub to every worker. Publishing is synchronous and safe from any
+thread; subscribing is async, on the server's event loop.
+"""
+import asyncio
+import contextlib
+import threading
+from collections import defaultdict
+
+import orjson
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Event
+from .serializers import compiled_event_list_serializer
+
+CELL_PRECISION = 5
+QUEUE_SIZE = 100
+
+
+def event_channel(pk):
+    return f'event:{pk}'
+
+
+def cell_channel(geohash):
+    return f'cell:{geohash[:CELL_PRECISION]}'
+
+
+class Subscription:
+    """
+    A bounded queue of messages for one subscriber. A subscriber that falls
+    QUEUE_SIZE messages behind loses the oldest ones rather than holding up
+    publishers or growing without bound.
+    """
+
+    def __init__(self, loop, size=QUEUE_SIZE):
+        self._loop = loop
+        self._queue = asyncio.Queue(size)
+
+    def put(self, message):
+        # Publishers run in worker threads; the queue belongs to the loop
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # The loop closed under a subscriber that is about to unsubscribe
+            pass
+
+    def _put(self, message):
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """The next message, or None if none arrived within ``timeout`` seconds."""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def listening(self):
+        """Whether anything is subscribed; publishers skip their queries if not."""
+        return bool(self._subscriptions)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channels):
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            for channel in channels:
+                self._subscriptions[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for channel in channels:
+                    self._subscriptions[channel].discard(subscription)
+                    if not self._subscriptions[channel]:
+                        del self._subscriptions[channel]
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    async def get(self, timeout=None):
+        message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return orjson.loads(message['data']) if message else None
+
+
+class RedisBroker:
+    """Pub/sub over the Redis at ``EVENTS_LIVE_URL``."""
+
+    def __init__(self):
+        import redis
+        import redis.asyncio
+
+        self._url = settings.EVENTS_LIVE_URL
+        self._client = redis.Redis.from_url(self._url)
+        self._async_redis = redis.asyncio
+
+    def listening(self):
+        # Subscribers may be in any process
+        return True
+
+    def publish(self, channel, message):
+        self._client.publish(channel, orjson.dumps(message))
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channels):
+        client = self._async_redis.Redis.from_url(self._url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*channels)
+        try:
+            yield RedisSubscription(pubsub)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENTS_LIVE_BROKER)()
+    return _broker
+
+
+def _publish(channels, message):
+    broker = get_broker()
+    for channel in channels:
+        broker.publish(channel, message)
+
+
+def publish_participation(event_ids, action):
+    """Publish the committed ``participant_count`` of each of ``event_ids``."""
+    if not get_broker().listening():
+        return
+    rows = Event.objects.filter(pk__in=event_ids).values_list('pk', 'geohash', 'participant_count')
+    for pk, geohash, count in rows:
+        _publish(
+            [event_channel(pk), cell_channel(geohash)],
+            {'type': 'participation', 'event': pk, 'action': action, 'participant_count': count},
+        )
+
+
+def publish_event(pk, created=False):
+    """Publish an event as the list endpoint shows it."""
+    if not get_broker().listening():
+        return
+    serializer = compiled_event_list_serializer()
+    row = Event.objects.filter(pk=pk).values('geohash', *serializer.sources).first()
+    if row is None:
+        return
+    # Nobody can be subscribed to a new event's own channel yet
+    channels = [cell_channel(row['geohash'])] if created else [event_channel(pk), cell_channel(row['geohash'])]
+    _publish(channels, {'type': 'created' if created else 'updated', 'event': serializer.represent(row)})
+
+
+def publish_deleted(pk, geohash):
+    _publish([event_channel(pk), cell_channel(geohash)], {'type': 'deleted', 'event': pk})
@@ -0,0 +1,114 @@
+import csv
+import io
+import resource
+import sys
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events.exports import EVENT_EXPORT_FIELDS, export_events
+from events.models import Event
+from stats.rollups import deferred, record_events
+
+User = get_user_model()
+
+PREFIX = 'bench_export_'
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def naive_export(queryset):
+    """What an export action usually looks like: model instances and a count per row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EVENT_EXPORT_FIELDS)
+    for event in queryset:
+        row = [getattr(event, name) for name in EVENT_EXPORT_FIELDS if name != 'participant_count']
+        row.insert(EVENT_EXPORT_FIELDS.index('participant_count'), event.participants.count())
+        writer.writerow(row)
+    return buffer.getvalue().encode()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the streaming CSV event export: peak RSS and rows per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=500_000)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create while seeding')
+        parser.add_argument(
+            '--naive',
+            action='store_true',
+            help='Afterwards, also time an in-memory export with a count query per row',
+        )
+        parser.add_argument('--keep', action='store_true', help='Leave the seeded events in place')
+
+    def handle(self, *args, **options):
+        creator, _ = User.objects.get_or_create(
+            username=f'{PREFIX}creator', defaults={'email': f'{PREFIX}creator@example.com'}
+        )
+        try:
+            self.seed(creator, options['events'], options['batch_size'])
+            queryset = Event.objects.filter(created_by=creator)
+            rows = queryset.count()
+            self.stdout.write(f'Peak RSS after seeding: {peak_rss_mb():.1f}MB')
+
+            # ru_maxrss never goes down, so the streaming run goes first
+            self.measure('streaming', rows, lambda: self.consume(export_events(queryset)))
+            if options['naive']:
+                self.measure('naive', rows, lambda: len(naive_export(queryset)))
+        finally:
+            if not options['keep']:
+                self.clean_up(creator, options['batch_size'])
+
+    def seed(self, creator, count, batch_size):
+        existing = Event.objects.filter(created_by=creator).count()
+        start = timezone.now() + timedelta(days=1)
+        for offset in range(existing, count, batch_size):
+            record_events(Event.objects.bulk_create(
+                Event(
+                    title=f'{PREFIX}{i}',
+                    description='Benchmark event',
+                    event_type='match',
+                    location='Benchmark ground',
+                    latitude=27.7172,
+                    longitude=85.3240,
+                    start_date=start,
+                    end_date=start + timedelta(hours=2),
+                    created_by=creator,
+                    max_participants=22,
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ))
+        self.stdout.write(f'Seeded {max(0, count - existing):,} events')
+
+    def clean_up(self, creator, batch_size):
+        # In batches: a single delete() collects every event in memory first
+        queryset = Event.objects.filter(created_by=creator)
+        while batch := list(queryset.values_list('pk', flat=True)[:batch_size]):
+            with deferred():
+                Event.objects.filter(pk__in=batch).delete()
+        creator.delete()
+
+    def consume(self, response):
+        size = 0
+        for chunk in response.streaming_content:
+            size += len(chunk)
+        return size
+
+    def measure(self, label, rows, run):
+        before = peak_rss_mb()
+        started = time.perf_counter()
+        size = run()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}'))
+        self.stdout.write(f'  rows:       {rows:,} ({size / 1024 / 1024:.1f}MB of CSV)')
+        self.stdout.write(f'  elapsed:    {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)')
+        self.stdout.write(f'  peak RSS:   {peak_rss_mb():.1f}MB (+{peak_rss_mb() - before:.1f}MB)')
@@ -0,0 +1,231 @@
+import asyncio
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from events.geo import encode_geohash
+from events.models import Event
+from stats.rollups import deferred, record_events, record_users
+
+User = get_user_model()
+
+PREFIX = 'bench_reads_'
+# Events are spread over a box this many degrees wide around the origin
+ORIGIN = (27.7172, 85.3240)
+SPREAD = 0.2
+
+SERVERS = {
+    # The Procfile: sync gunicorn workers over speak_football.wsgi
+    'wsgi (sync)': (['speak_football.wsgi:application'], {'ASYNC_READ_VIEWS': '0'}),
+    # The opt-in: uvicorn workers over speak_football.asgi with async reads
+    'asgi (async)': (
+        ['speak_football.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'], {'ASYNC_READ_VIEWS': '1'}
+    ),
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Connection:
+    """A minimal keep-alive HTTP/1.1 client; reconnects when the server closes."""
+
+    def __init__(self, port):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def get(self, path):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\n\r\n'.encode())
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ', 2)[1])
+        headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+        if 'content-length' in headers:
+            await self.reader.readexactly(int(headers['content-length']))
+        else:
+            await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection') == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the events read endpoints (list, nearby, detail) under concurrent load: '
+        'p50/p99 latency and throughput of sync WSGI workers against async views on ASGI workers'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10_000)
+        parser.add_argument('--clients', type=int, default=500, help='Concurrent keep-alive clients')
+        parser.add_argument('--duration', type=float, default=20, help='Seconds of load per server')
+        parser.add_argument('--warmup', type=float, default=3)
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Server worker processes')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded events for another run')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.settings_dict['NAME'] in ('', ':memory:'):
+            raise CommandError('The servers need a database file or server they can share; set DATABASE_URL')
+        creator = self.seed(options['events'])
+        event_ids = list(Event.objects.filter(created_by=creator).values_list('pk', flat=True))
+        self.stdout.write(
+            f"{len(event_ids):,} events, {options['clients']} clients, {options['workers']} worker(s), "
+            f"{options['duration']:.0f}s per server"
+        )
+        try:
+            for label, (arguments, env) in SERVERS.items():
+                self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}'))
+                with self.server(arguments, env, options):
+                    results = asyncio.run(self.load(event_ids, options))
+                self.report(results, options['duration'])
+        finally:
+            if not options['keep']:
+                with deferred():
+                    Event.objects.filter(created_by=creator).delete()
+                    creator.delete()
+
+    def seed(self, count):
+        creator, created = User.objects.get_or_create(
+            username=f'{PREFIX}creator', defaults={'email': f'{PREFIX}creator@example.com'}
+        )
+        if created:
+            record_users([creator])
+        existing = Event.objects.filter(created_by=creator).count()
+        rng = random.Random(42)
+        start = timezone.now() + timedelta(days=1)
+        events = []
+        for i in range(existing, count):
+            latitude = round(ORIGIN[0] + rng.uniform(-SPREAD, SPREAD) / 2, 6)
+            longitude = round(ORIGIN[1] + rng.uniform(-SPREAD, SPREAD) / 2, 6)
+            events.append(Event(
+                title=f'{PREFIX}{i}',
+                description='Benchmark event',
+                event_type=rng.choice(('match', 'training', 'tournament')),
+                location='Benchmark ground',
+                latitude=latitude,
+                longitude=longitude,
+                # bulk_create() skips Event.save(), which sets the geohash
+                geohash=encode_geohash(latitude, longitude),
+                start_date=start + timedelta(minutes=i),
+                end_date=start + timedelta(minutes=i, hours=2),
+                created_by=creator,
+            ))
+        record_events(Event.objects.bulk_create(events, batch_size=5000))
+        return creator
+
+    @contextlib.contextmanager
+    def server(self, arguments, env, options):
+        process = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn', *arguments,
+                '--bind', f"127.0.0.1:{options['port']}",
+                '--workers', str(options['workers']),
+                '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ, DEBUG='False', ALLOWED_HOSTS='localhost', **env),
+        )
+        try:
+            self.wait_until_ready(options['port'], process)
+            yield process
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def wait_until_ready(self, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('The server exited during startup')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError('The server did not start listening')
+
+    def paths(self, rng, event_ids):
+        """An endless mix of list, nearby and detail requests."""
+        while True:
+            kind = rng.choice(('list', 'nearby', 'detail'))
+            if kind == 'list':
+                path = f"/api/events/?event_type={rng.choice(('match', 'training', 'tournament'))}"
+            elif kind == 'nearby':
+                latitude = ORIGIN[0] + rng.uniform(-SPREAD, SPREAD) / 2
+                longitude = ORIGIN[1] + rng.uniform(-SPREAD, SPREAD) / 2
+                path = f'/api/events/?lat={latitude:.4f}&lng={longitude:.4f}&radius=2'
+            else:
+                path = f'/api/events/{rng.choice(event_ids)}/'
+            yield kind, path
+
+    async def load(self, event_ids, options):
+        latencies = {'list': [], 'nearby': [], 'detail': []}
+        outcomes = {'errors': 0, 'non-200': 0}
+        started = time.perf_counter()
+        measure_from = started + options['warmup']
+        deadline = measure_from + options['duration']
+
+        async def client(seed):
+            rng = random.Random(seed)
+            http = Connection(options['port'])
+            paths = self.paths(rng, event_ids)
+            try:
+                while time.perf_counter() < deadline:
+                    kind, path = next(paths)
+                    sent = time.perf_counter()
+                    try:
+                        status = await http.get(path)
+                    except (OSError, asyncio.IncompleteReadError, ValueError):
+                        http.close()
+                        if sent >= measure_from:
+                            outcomes['errors'] += 1
+                        continue
+                    if sent < measure_from:
+                        continue
+                    latencies[kind].append(time.perf_counter() - sent)
+                    if status != 200:
+                        outcomes['non-200'] += 1
+            finally:
+                http.close()
+
+        await asyncio.gather(*(client(seed) for seed in range(options['clients'])))
+        return latencies, outcomes
+
+    def report(self, results, duration):
+        latencies, outcomes = results
+        total = sum(len(values) for values in latencies.values())
+        self.stdout.write(f'  throughput: {total / duration:,.0f} requests/s')
+        everything = [value for values in latencies.values() for value in values]
+        for kind, values in [*latencies.items(), ('all', everything)]:
+            self.stdout.write(
+                f'  {kind:<7} {len(values):>7,} requests  '
+                f'p50 {percentile(values, 0.50) * 1000:8.1f}ms  p99 {percentile(values, 0.99) * 1000:8.1f}ms'
+            )
+        if outcomes['errors'] or outcomes['non-200']:
+            self.stdout.write(self.style.WARNING(
+                f"  {outcomes['errors']} connection errors, {outcomes['non-200']} non-200 responses"
+            ))
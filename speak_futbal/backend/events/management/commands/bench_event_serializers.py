@@ -0,0 +1,98 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from events.models import Event
+from events.serializers import EventListSerializer, compiled_event_list_serializer
+from speak_football.renderers import ORJSONRenderer
+from stats.rollups import deferred, record_events, record_users
+
+User = get_user_model()
+
+PREFIX = 'bench_serializers_'
+
+
+def model_serializer(queryset):
+    return EventListSerializer(list(queryset), many=True).data
+
+
+def compiled_serializer(queryset):
+    serializer = compiled_event_list_serializer()
+    return serializer.represent_many(queryset.values(*serializer.sources))
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the events list serialization: EventListSerializer and the stdlib '
+        'JSON renderer against the compiled .values() serializer and orjson'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10_000)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per variant; the best is reported')
+
+    def handle(self, *args, **options):
+        creators = self.seed(options['events'])
+        try:
+            queryset = Event.objects.filter(created_by__in=creators).for_list().order_by('id')
+            variants = (
+                ('ModelSerializer + json', model_serializer, JSONRenderer()),
+                ('compiled + orjson', compiled_serializer, ORJSONRenderer()),
+            )
+            results = {}
+            for label, serialize, renderer in variants:
+                results[label] = self.measure(label, serialize, renderer, queryset, options['repeat'])
+            (_, slow), (_, fast) = results.items()
+            self.stdout.write(self.style.SUCCESS(f'Speed-up: {slow / fast:.1f}x end to end'))
+        finally:
+            with deferred():
+                Event.objects.filter(created_by__in=creators).delete()
+                User.objects.filter(pk__in=creators).delete()
+
+    def seed(self, count):
+        creators = User.objects.bulk_create(
+            User(username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com', latitude=27.7, longitude=85.3)
+            for i in range(50)
+        )
+        record_users(creators)
+        start = timezone.now() + timedelta(days=1)
+        for offset in range(0, count, 5000):
+            record_events(Event.objects.bulk_create(
+                Event(
+                    title=f'{PREFIX}{i}',
+                    description='Benchmark event',
+                    event_type='match',
+                    location='Benchmark ground',
+                    latitude=27.7172,
+                    longitude=85.3240,
+                    start_date=start,
+                    end_date=start + timedelta(hours=2),
+                    created_by=creators[i % len(creators)],
+                    max_participants=22,
+                )
+                for i in range(offset, min(offset + 5000, count))
+            ))
+        return [creator.pk for creator in creators]
+
+    def measure(self, label, serialize, renderer, queryset, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serialize(queryset)
+            serialized = time.perf_counter()
+            body = renderer.render(data)
+            rendered = time.perf_counter()
+            timing = (serialized - started, rendered - serialized)
+            if best is None or sum(timing) < sum(best):
+                best = timing
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}'))
+        self.stdout.write(f'  rows:                {len(data):,} ({len(body) / 1024 / 1024:.1f}MB)')
+        self.stdout.write(f'  query + serialize:   {best[0] * 1000:8.1f}ms')
+        self.stdout.write(f'  render:              {best[1] * 1000:8.1f}ms')
+        self.stdout.write(f'  total:               {sum(best) * 1000:8.1f}ms')
+        return sum(best)
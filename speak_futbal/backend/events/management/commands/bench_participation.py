@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from events.models import Event
+from events.participation import FULL, JOINED, join_event
+from stats.rollups import deferred, record_users
+
+User = get_user_model()
+
+PREFIX = 'bench_participation_'
+
+
+def legacy_join(event_id, user_id):
+    """The original EventParticipateView.post: count, then add, unlocked."""
+    event = Event.objects.get(pk=event_id, is_active=True)
+    if event.max_participants and event.participants.count() >= event.max_participants:
+        return FULL
+    event.participants.add(user_id)
+    return JOINED
+
+
+STRATEGIES = {
+    'legacy': legacy_join,
+    'guarded': join_event,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark concurrent event sign-ups: throughput of the guarded join '
+        'path against the legacy count-then-add, and how often each overfills'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=20)
+        parser.add_argument('--capacity', type=int, default=22)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=2000, help='Join attempts per strategy')
+        parser.add_argument(
+            '--serialize',
+            action='store_true',
+            help='Run one join at a time (the default on SQLite, which has a single writer)',
+        )
+
+    def handle(self, *args, **options):
+        serialize = options['serialize'] or connection.vendor == 'sqlite'
+        if serialize:
+            self.stdout.write(self.style.WARNING('Joins are serialized; throughput is per connection'))
+
+        users = self.create_users(options['users'])
+        try:
+            for name, strategy in STRATEGIES.items():
+                events = self.create_events(users[0], options['events'], options['capacity'])
+                try:
+                    self.run(name, strategy, events, users, options, serialize)
+                finally:
+                    Event.objects.filter(pk__in=events).delete()
+        finally:
+            with deferred():
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    def create_users(self, count):
+        record_users(User.objects.bulk_create(
+            User(username=f'{PREFIX}{i}', email=f'{PREFIX}{i}@example.com') for i in range(count)
+        ))
+        return list(User.objects.filter(username__startswith=PREFIX).values_list('pk', flat=True))
+
+    def create_events(self, creator_id, count, capacity):
+        start = timezone.now() + timedelta(days=1)
+        created = []
+        for i in range(count):
+            event = Event.objects.create(
+                title=f'{PREFIX}{i}',
+                description='Benchmark event',
+                event_type='match',
+                location='Benchmark ground',
+                latitude=27.7172,
+                longitude=85.3240,
+                start_date=start,
+                end_date=start + timedelta(hours=2),
+                created_by_id=creator_id,
+                max_participants=capacity,
+            )
+            created.append(event.pk)
+        return created
+
+    def run(self, name, strategy, events, users, options, serialize):
+        rng = random.Random(42)
+        work = [(rng.choice(events), rng.choice(users)) for _ in range(options['attempts'])]
+        chunks = [work[i::options['threads']] for i in range(options['threads'])]
+        lock = threading.Lock()
+        outcomes = {'joined': 0, 'rejected': 0, 'errors': 0}
+
+        def worker(chunk):
+            from django.db import connection as thread_connection
+            try:
+                for event_id, user_id in chunk:
+                    try:
+                        if serialize:
+                            with lock:
+                                result = strategy(event_id, user_id)
+                        else:
+                            result = strategy(event_id, user_id)
+                    except OperationalError:
+                        result = None
+                    with lock:
+                        if result == JOINED:
+                            outcomes['joined'] += 1
+                        elif result is None:
+                            outcomes['errors'] += 1
+                        else:
+                            outcomes['rejected'] += 1
+            finally:
+                thread_connection.close()
+
+        threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        overfilled = sum(
+            1 for event in Event.objects.filter(pk__in=events).prefetch_related('participants')
+            if len(event.participants.all()) > event.max_participants
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}'))
+        self.stdout.write(f"  attempts/s:        {options['attempts'] / elapsed:,.0f}")
+        self.stdout.write(f"  joined / rejected: {outcomes['joined']} / {outcomes['rejected']}")
+        if outcomes['errors']:
+            self.stdout.write(f"  database errors:   {outcomes['errors']}")
+        style = self.style.ERROR if overfilled else self.style.SUCCESS
+        self.stdout.write(style(f'  overfilled events: {overfilled} of {len(events)}'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from events.cache import cache_metrics, reset_cache_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts for the events API response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after reporting')
+
+    def handle(self, *args, **options):
+        metrics = cache_metrics()
+        self.stdout.write(f"Hits:      {metrics['hits']}")
+        self.stdout.write(f"Misses:    {metrics['misses']}")
+        self.stdout.write(f"Hit ratio: {metrics['hit_ratio']:.1%}")
+        if options['reset']:
+            reset_cache_metrics()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
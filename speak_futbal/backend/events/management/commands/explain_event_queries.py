@@ -0,0 +1,170 @@
+import re
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory
+
+from events.fieldsets import Fieldset
+from events.models import Event
+from events.participants import PREVIEW_SIZE, is_participant_annotation, participant_rows
+from events.serializers import EventListSerializer, compiled_event_list_serializer, compiled_event_serializer
+from events.views import EventListView, EventParticipantListView
+
+# Each list query shape the API issues: its query params, the index it is
+# meant to use, and whether the database has to sort the rows (only distance
+# ordering can't be delivered by an index)
+LIST_SHAPES = [
+    ('list', {}, 'event_active_start_idx', False),
+    ('list by type', {'event_type': 'match'}, 'event_active_type_start_idx', False),
+    ('list ordered by created_at', {'ordering': '-created_at'}, 'event_active_created_idx', False),
+    ('nearby', {'lat': '27.7172', 'lng': '85.3240', 'radius': '10'}, 'event_geohash_active_idx', True),
+    # Served by the GIN index on PostgreSQL and the FTS5 table on SQLite
+    ('search', {'search': 'football'}, None, True),
+]
+
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on events_event\b'),
+    'sqlite': re.compile(r'\bSCAN events_event\b(?! USING)'),
+}
+
+SORT_PATTERNS = {
+    'postgresql': re.compile(r'^\s*(->\s*)?(Incremental )?Sort\b', re.MULTILINE),
+    'sqlite': re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on each query shape issued by the events API and report the plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Exit with an error if any query shape does a full scan of events_event, '
+                 'misses its intended index, or sorts rows an index should deliver in order',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Use EXPLAIN ANALYZE (PostgreSQL only); the queries are executed',
+        )
+        parser.add_argument(
+            '--no-seqscan',
+            action='store_true',
+            help='Disable sequential scans (PostgreSQL only) to check that an index is usable '
+                 'even when the table is too small for the planner to prefer it',
+        )
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        explain_options = {'analyze': True} if options['analyze'] and vendor == 'postgresql' else {}
+
+        problems = []
+        with transaction.atomic():
+            if options['no_seqscan'] and vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset, index, expects_sort in self.query_shapes():
+                plan = queryset.explain(**explain_options)
+                self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}'))
+                if options['verbosity'] > 1:
+                    self.stdout.write(str(queryset.query))
+                self.stdout.write(plan)
+                self.stdout.write('')
+
+                full_scan = FULL_SCAN_PATTERNS.get(vendor)
+                if full_scan and full_scan.search(plan):
+                    problems.append(f'{name}: full scan')
+                if index and index not in plan:
+                    problems.append(f'{name}: {index} not used')
+                sort = SORT_PATTERNS.get(vendor)
+                if sort and not expects_sort and sort.search(plan):
+                    problems.append(f'{name}: sort not served by an index')
+
+        if problems:
+            message = 'Index usage regressions:\n  ' + '\n  '.join(problems)
+            if options['check']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('All query shapes use their indexes'))
+
+    def query_shapes(self):
+        """
+        ``(name, queryset, index, expects_sort)`` for each query the read
+        endpoints run, built the way the views build them.
+        """
+        for name, params, index, expects_sort in LIST_SHAPES:
+            first_page, next_params = self.list_page(params)
+            yield f'{name} (first page)', first_page, index, expects_sort
+            if next_params:
+                next_page, _ = self.list_page(next_params)
+                yield f'{name} (next page)', next_page, index, expects_sort
+
+        pk = Event.objects.values_list('pk', flat=True).first() or 0
+        # EventDetailView.retrieve_row(); QuerySet.get() drops the ordering,
+        # so the EXPLAIN does too
+        sources = compiled_event_serializer().sources
+        yield 'detail', Event.objects.active().values(*sources).filter(pk=pk).order_by(), None, False
+        # The participant queries read the through table, not events_event.
+        # Join order is the through table's id, so no index delivers it
+        yield 'detail participants preview', participant_rows([pk])[:PREVIEW_SIZE], None, True
+        yield 'list ?expand=participants', participant_rows([pk, pk + 1]), None, True
+        # EventParticipantListView
+        yield (
+            'participants page membership',
+            Event.objects.active().filter(pk=pk)
+            .annotate(is_participant=is_participant_annotation(0))
+            .values_list('is_participant', flat=True)[:1],
+            None, False,
+        )
+        view = self.build_view(EventParticipantListView, {'name': 'a'}, pk=pk)
+        page, _, _ = view.paginator.get_page_queryset(participant_rows([pk], name='a'), view.request)
+        yield 'participants page', page, None, True
+
+    def request_host(self):
+        """A host ALLOWED_HOSTS accepts; the factory's 'testserver' usually isn't."""
+        for host in settings.ALLOWED_HOSTS:
+            if host and host != '*':
+                # '.example.com' allows example.com itself
+                return host.lstrip('.')
+        return 'localhost'
+
+    def build_view(self, view_class, params, **kwargs):
+        host = self.request_host()
+        request = APIRequestFactory().get('/api/events/', params, SERVER_NAME=host, HTTP_HOST=host)
+        view = view_class()
+        view.setup(request, **kwargs)
+        view.request = view.initialize_request(request, **kwargs)
+        view.format_kwarg = None
+        return view
+
+    def list_page(self, params):
+        """
+        Build the page queryset the list view would run for ``params``: the
+        ``.values()`` projection of EventListView.list_values(), paginated.
+
+        Also returns the params for the following page, taken from the next
+        link of the first page, so cursor-filtered pages are covered.
+        """
+        view = self.build_view(EventListView, params)
+        fieldset = Fieldset(view.request, EventListSerializer)
+        queryset = view.list_values(compiled_event_list_serializer(fieldset.fields))
+        paginator = view.paginator
+        page_queryset, _, _ = paginator.get_page_queryset(queryset, view.request)
+
+        paginator.paginate_queryset(queryset, view.request, view=view)
+        next_link = paginator.get_next_link()
+        if not next_link and paginator.page:
+            # Fewer rows than a page: derive a cursor from the first row instead
+            paginator.has_next = True
+            paginator.page = paginator.page[:1]
+            next_link = paginator.get_next_link()
+
+        next_params = None
+        if next_link:
+            next_params = {key: values[0] for key, values in parse_qs(urlparse(next_link).query).items()}
+        return page_queryset, next_params
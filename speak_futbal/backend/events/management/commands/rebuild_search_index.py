@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from events.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all events'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search index with {backend.__class__.__name__}')
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from events.cache import invalidate_events
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Repair Event.participant_count values that drifted from the participants table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted events without updating them',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        checked = repaired = 0
+        last_pk = 0
+
+        while True:
+            batch = list(
+                Event.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+
+            drifted = list(
+                Event.objects.filter(pk__in=batch)
+                .with_participant_count()
+                .exclude(participant_count=F('participants__count'))
+                .values_list('pk', flat=True)
+            )
+            if not drifted:
+                continue
+            repaired += len(drifted)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Drifted: {", ".join(map(str, drifted))}')
+            if options['dry_run']:
+                continue
+            with transaction.atomic():
+                Event.objects.filter(pk__in=drifted).sync_participant_count()
+            invalidate_events(drifted)
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {repaired} of {checked} events'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:42
+
+from django.db import migrations, models
+
+from events.geo import encode_geohash
+
+
+def populate_geohash(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    batch = []
+    for event in Event.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        event.geohash = encode_geohash(event.latitude, event.longitude)
+        batch.append(event)
+        if len(batch) >= 2000:
+            Event.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Event.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
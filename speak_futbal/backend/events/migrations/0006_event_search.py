@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+FTS_TABLE = 'events_event_fts'
+
+
+def create_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX event_search_vector_idx ON events_event USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            "UPDATE events_event SET search_vector = "
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(location, '') || ' ' || coalesce(event_type, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            f"USING fts5(title, description, location, event_type, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, location, event_type) '
+            f'SELECT id, title, description, location, event_type FROM events_event'
+        )
+
+
+def drop_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS event_search_vector_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        # The GIN index (PostgreSQL) and FTS5 table (SQLite) are vendor
+        # specific, so they live outside the model state
+        migrations.RunPython(create_search_structures, drop_search_structures),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:52
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_participant_count(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    through = Event.participants.through
+    counts = (
+        through.objects.filter(event_id=OuterRef('pk'))
+        .order_by()
+        .values('event_id')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    Event.objects.update(participant_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='participant_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_participant_count, migrations.RunPython.noop),
+    ]
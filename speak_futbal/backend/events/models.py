@@ -1,5 +1,105 @@
 from django.db import models
+from django.db.models import Count, F, FloatField, OuterRef, Q, Subquery
+from django.db.models.functions import ASin, Cast, Coalesce, Cos, Least, Power, Radians, Sin, Sqrt
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+
+from .geo import EARTH_RADIUS_KM, covering_cells, encode_geohash, prefix_range
+
+
+def _participant_count_subquery(model):
+    # A correlated subquery rather than Count('participants'): the join and
+    # GROUP BY of the latter stop the database from walking an ordering
+    # index and stopping at the page limit
+    counts = (
+        model.participants.through.objects.filter(event_id=OuterRef('pk'))
+        .order_by()
+        .values('event_id')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=models.IntegerField()), 0)
+
+
+class EventQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(is_active=True)
+
+    def with_creator(self):
+        return self.select_related('created_by')
+
+    def with_participant_count(self):
+        """
+        Annotate ``participants__count``, counted from the through table.
+
+        Responses read the stored ``participant_count`` column instead; this
+        is for checking that column, see ``sync_participant_count()``.
+        """
+        return self.annotate(participants__count=_participant_count_subquery(self.model))
+
+    def sync_participant_count(self):
+        """Recompute the stored ``participant_count`` of every matched event."""
+        return self.update(participant_count=_participant_count_subquery(self.model))
+
+    def with_participants(self):
+        return self.prefetch_related('participants')
+
+    def for_list(self):
+        """Query plan for list responses: creator joined, no aggregates."""
+        return self.with_creator().defer('search_vector')
+
+    def for_detail(self):
+        """
+        Query plan for full responses: the list plan. Participants are not
+        embedded, only previewed; the full list is paginated separately.
+        """
+        return self.for_list()
+
+    def within_cells(self, cells):
+        """Prefilter on the indexed geohash column by a set of cell prefixes."""
+        condition = Q()
+        for cell in cells:
+            low, high = prefix_range(cell)
+            if high is None:
+                condition |= Q(geohash__gte=low)
+            else:
+                condition |= Q(geohash__gte=low, geohash__lt=high)
+        return self.filter(condition)
+
+    def with_distance(self, latitude, longitude):
+        """Annotate ``distance_km``, the haversine distance from the given point."""
+        lat = Radians(Cast(F('latitude'), FloatField()))
+        lng = Radians(Cast(F('longitude'), FloatField()))
+        origin_lat = Radians(models.Value(float(latitude), output_field=FloatField()))
+        origin_lng = Radians(models.Value(float(longitude), output_field=FloatField()))
+        a = (
+            Power(Sin((lat - origin_lat) / 2), 2)
+            + Cos(origin_lat) * Cos(lat) * Power(Sin((lng - origin_lng) / 2), 2)
+        )
+        return self.annotate(
+            distance_km=models.ExpressionWrapper(
+                2 * EARTH_RADIUS_KM * ASin(Sqrt(Least(a, models.Value(1.0)))),
+                output_field=FloatField(),
+            )
+        )
+
+    def nearby(self, latitude, longitude, radius_km):
+        """
+        Events within ``radius_km`` of a point, closest first.
+
+        Candidates are narrowed by geohash cell prefix ranges on the indexed
+        column, then refined with an exact great-circle distance.
+        """
+        queryset = self
+        cells = covering_cells(latitude, longitude, radius_km)
+        if cells:
+            queryset = queryset.within_cells(cells)
+        return (
+            queryset.with_distance(latitude, longitude)
+            .filter(distance_km__lte=radius_km)
+            .order_by('distance_km', 'id')
+        )
+
 
 class Event(models.Model):
     EVENT_TYPES = [
@@ -15,6 +115,7 @@ class Event(models.Model):
     location = models.CharField(max_length=255)
     latitude = models.DecimalField(max_digits=9, decimal_places=6)
     longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    geohash = models.CharField(max_length=12, editable=False, blank=True)
     start_date = models.DateTimeField()
     end_date = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -22,10 +123,80 @@ class Event(models.Model):
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_events')
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name='participated_events', blank=True)
     max_participants = models.PositiveIntegerField(null=True, blank=True)
+    # Denormalized size of participants, kept in step by events.participation
+    # and the m2m_changed handler in events.signals; never written by save()
+    participant_count = models.PositiveIntegerField(default=0, editable=False)
     is_active = models.BooleanField(default=True)
+    # Maintained by PostgresSearchBackend on PostgreSQL; unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = EventQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        elif update_fields is None and not self._state.adding:
+            # A full save would write back the participant_count loaded with
+            # the instance, undoing joins that committed since
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'participant_count'
+            ]
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Admin changelist: default ordering, date hierarchy and filters
+            # over active and inactive events alike
+            models.Index(fields=['start_date', 'id'], name='event_start_date_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='event_created_at_id_idx'),
+            models.Index(fields=['end_date'], name='event_end_date_idx'),
+            models.Index(fields=['location'], name='event_location_idx'),
+            # API: every public query is restricted to active events, so these
+            # are partial indexes that leave inactive rows out entirely
+            models.Index(
+                fields=['start_date', 'id'],
+                name='event_active_start_idx',
+                condition=Q(is_active=True),
+            ),
+            models.Index(
+                fields=['event_type', 'start_date', 'id'],
+                name='event_active_type_start_idx',
+                condition=Q(is_active=True),
+            ),
+            models.Index(
+                fields=['created_at', 'id'],
+                name='event_active_created_idx',
+                condition=Q(is_active=True),
+            ),
+            # Nearby search ORs several geohash ranges. SQLite only plans that
+            # as a multi-index OR over a full index, not a partial one, so
+            # is_active goes in the key instead of the condition
+            models.Index(fields=['geohash', 'is_active'], name='event_geohash_active_idx'),
+        ]
+
+
+class WaitlistEntry(models.Model):
+    """A user queued for a full event; position is order of ``id`` within the event."""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist_entries')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='waitlist_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'user'], name='waitlist_event_user_unique'),
+        ]
+        indexes = [
+            # Head of the queue and position counts walk this index
+            models.Index(fields=['event', 'id'], name='waitlist_event_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} waiting for {self.event}'
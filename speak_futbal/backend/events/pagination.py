@@ -0,0 +1,207 @@
+import base64
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the full ordering of the queryset.
+
+    Unlike DRF's CursorPagination, which compares on the first ordering field
+    and skips ties with an offset, the cursor stores the value of every
+    ordering field plus the primary key, and the next page is fetched with a
+    row-value comparison such as ``(start_date, id) < (x, y)``. Every page is
+    a single index range scan, so latency does not grow with scroll depth.
+
+    Works with any ordering set on the queryset, including annotations such
+    as ``distance_km``.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset, values, reverse = self.start_page(queryset, request)
+        return self.finish_page(list(page_queryset), values, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset, values, reverse = self.start_page(queryset, request)
+        return self.finish_page([row async for row in page_queryset.aiterator()], values, reverse)
+
+    def start_page(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        return self.get_page_queryset(queryset, request)
+
+    def finish_page(self, results, values, reverse):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.page = results
+        return results
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return ``(queryset, cursor_values, reverse)`` for the requested page.
+
+        The queryset is ordered, filtered past the cursor and sliced to one
+        row more than the page size; it is not evaluated here.
+        """
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+
+        values, reverse = self.decode_cursor(request)
+        if values is not None:
+            values = self.convert_cursor_values(queryset, values)
+        ordering = self.ordering
+        if reverse:
+            ordering = [(field, not descending) for field, descending in ordering]
+
+        queryset = queryset.order_by(*[('-' if descending else '') + field for field, descending in ordering])
+        if values is not None:
+            queryset = queryset.filter(self.build_filter(ordering, values))
+        return queryset[:self.page_size + 1], values, reverse
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 20
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = int(requested)
+            except ValueError:
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        """
+        Return ``[(field, descending), ...]`` for the queryset, ending in the pk.
+
+        The primary key is appended as a tie-breaker in the direction of the
+        first field so the ordering is total.
+        """
+        order_by = queryset.query.order_by or queryset.model._meta.ordering
+        ordering = []
+        for field in order_by:
+            if not isinstance(field, str):
+                raise TypeError('KeysetPagination only supports orderings by field name.')
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            if name == 'pk':
+                name = queryset.model._meta.pk.name
+            ordering.append((name, descending))
+
+        pk_name = queryset.model._meta.pk.name
+        if pk_name not in [name for name, _ in ordering]:
+            ordering.append((pk_name, ordering[0][1] if ordering else False))
+        return ordering
+
+    def build_filter(self, ordering, values):
+        """Expand a row-value comparison into an OR of AND terms."""
+        condition = Q()
+        for index, (field, descending) in enumerate(ordering):
+            term = Q(**{f'{field}__{"lt" if descending else "gt"}': values[index]})
+            for previous_index, (previous_field, _) in enumerate(ordering[:index]):
+                term &= Q(**{previous_field: values[previous_index]})
+            condition |= term
+        return condition
+
+    def encode_cursor(self, item, reverse):
+        values = []
+        for field, _ in self.ordering:
+            value = item[field] if isinstance(item, dict) else getattr(item, field)
+            if isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            values.append(value)
+        payload = json.dumps({'v': values, 'r': reverse}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            values = payload['v']
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def convert_cursor_values(self, queryset, values):
+        """
+        Convert decoded cursor values to the types of their ordering fields.
+
+        A tampered cursor can hold anything JSON can; values that are null,
+        not scalars or not convertible are an invalid cursor, not a 500.
+        """
+        converted = []
+        for (name, _), value in zip(self.ordering, values):
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            if name in queryset.query.annotations:
+                field = queryset.query.annotations[name].output_field
+            else:
+                try:
+                    field = queryset.model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    raise NotFound(self.invalid_cursor_message)
+            try:
+                value = field.to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            converted.append(value)
+        return converted
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
@@ -0,0 +1,80 @@
+"""
+Participant reads straight off the participants through table.
+
+Rows join the through table to the user and are represented with the
+compiled UserSerializer, so no Event or user instances are built and the
+cost follows the rows asked for, not the size of the event.
+"""
+import functools
+from collections import defaultdict
+
+from django.db.models import Exists, OuterRef, Q
+
+from users.serializers import UserSerializer
+
+from .compiled import compile_serializer
+from .models import Event
+
+PREVIEW_SIZE = 5
+
+_field = Event.participants.field
+Participant = _field.remote_field.through
+EVENT_COLUMN = _field.m2m_column_name()
+USER_COLUMN = _field.m2m_reverse_name()
+USER_FIELD = _field.m2m_reverse_field_name()
+
+
+@functools.cache
+def compiled_user_serializer():
+    return compile_serializer(UserSerializer, prefix=f'{USER_FIELD}__')
+
+
+def participant_rows(event_ids, name=None):
+    """
+    ``.values()`` rows of the events' participants in the order they joined.
+
+    Each row has the through row ``id``, ``EVENT_COLUMN`` and the user's
+    fields; ``name`` keeps users whose username or names contain it.
+    """
+    rows = Participant.objects.filter(**{f'{EVENT_COLUMN}__in': event_ids})
+    if name:
+        rows = rows.filter(
+            Q(**{f'{USER_FIELD}__username__icontains': name})
+            | Q(**{f'{USER_FIELD}__first_name__icontains': name})
+            | Q(**{f'{USER_FIELD}__last_name__icontains': name})
+        )
+    return rows.order_by('id').values('id', EVENT_COLUMN, *compiled_user_serializer().sources)
+
+
+def represent(rows):
+    return compiled_user_serializer().represent_many(rows)
+
+
+def participants_by_event(event_ids):
+    """``{event_id: [user, ...]}`` for the given events, in one query."""
+    return _by_event(list(participant_rows(event_ids)))
+
+
+async def aparticipants_by_event(event_ids):
+    return _by_event([row async for row in participant_rows(event_ids).aiterator()])
+
+
+def _by_event(rows):
+    participants = defaultdict(list)
+    for row, user in zip(rows, represent(rows)):
+        participants[row[EVENT_COLUMN]].append(user)
+    return participants
+
+
+def participant_preview(event_id, size=PREVIEW_SIZE):
+    """The first ``size`` participants to join, for embedding in an event."""
+    return represent(participant_rows([event_id])[:size])
+
+
+async def aparticipant_preview(event_id, size=PREVIEW_SIZE):
+    return represent([row async for row in participant_rows([event_id])[:size].aiterator()])
+
+
+def is_participant_annotation(user_id):
+    """An EXISTS annotation for events, true where ``user_id`` participates."""
+    return Exists(Participant.objects.filter(**{EVENT_COLUMN: OuterRef('pk'), USER_COLUMN: user_id}))
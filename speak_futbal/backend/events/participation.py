@@ -0,0 +1,166 @@
+"""
+Joining and leaving events, and the waitlist of full events.
+
+These write the participants through table directly instead of going
+through ``event.participants.add()/remove()``, so that the capacity check,
+the ``participant_count`` update and the membership row happen as a
+guarded single-statement UPDATE plus one INSERT/DELETE in one transaction.
+Because no m2m_changed signal is sent, ``participation_changed`` is sent
+once the transaction commits.
+
+Users who try to join a full event are queued as ``WaitlistEntry`` rows.
+Whenever slots free up, ``promote_waitlist()`` moves as many users from
+the head of the queue as there are free slots, all in one transaction.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.dispatch import Signal
+
+from .models import Event, WaitlistEntry
+
+JOINED = 'joined'
+ALREADY_JOINED = 'already_joined'
+FULL = 'full'
+NOT_FOUND = 'not_found'
+
+# Sent after a participation change commits, with event_id, user_id and
+# action ('join', 'leave' or 'promote')
+participation_changed = Signal()
+
+
+def _through():
+    field = Event._meta.get_field('participants')
+    through = field.remote_field.through
+    return through, f'{field.m2m_field_name()}_id', f'{field.m2m_reverse_field_name()}_id'
+
+
+def _notify(event_id, user_id, action):
+    transaction.on_commit(
+        lambda: participation_changed.send(sender=Event, event_id=event_id, user_id=user_id, action=action)
+    )
+
+
+def join_event(event_id, user_id):
+    """
+    Add a user to an active event unless it is full.
+
+    The capacity check and increment are one conditional UPDATE, so
+    concurrent joins serialize on the event row and ``max_participants`` can
+    never be exceeded. Returns JOINED, ALREADY_JOINED, FULL or NOT_FOUND.
+    """
+    through, event_column, user_column = _through()
+    membership = {event_column: event_id, user_column: user_id}
+
+    if through.objects.filter(**membership).exists():
+        return ALREADY_JOINED
+
+    try:
+        with transaction.atomic():
+            updated = (
+                Event.objects.filter(pk=event_id, is_active=True)
+                .filter(Q(max_participants__isnull=True) | Q(participant_count__lt=F('max_participants')))
+                .update(participant_count=F('participant_count') + 1)
+            )
+            if not updated:
+                exists = Event.objects.filter(pk=event_id, is_active=True).exists()
+                return FULL if exists else NOT_FOUND
+            through.objects.create(**membership)
+            WaitlistEntry.objects.filter(event_id=event_id, user_id=user_id).delete()
+            _notify(event_id, user_id, 'join')
+    except IntegrityError:
+        # A concurrent request by the same user inserted the row first; the
+        # increment above was rolled back with the transaction
+        return ALREADY_JOINED
+    return JOINED
+
+
+def leave_event(event_id, user_id):
+    """
+    Remove a user from an event and promote the next waitlisted user.
+
+    Returns True if they were a participant.
+    """
+    through, event_column, user_column = _through()
+    with transaction.atomic():
+        deleted, _ = through.objects.filter(**{event_column: event_id, user_column: user_id}).delete()
+        if deleted:
+            Event.objects.filter(pk=event_id).update(participant_count=F('participant_count') - 1)
+            _notify(event_id, user_id, 'leave')
+            promote_waitlist(event_id)
+    return bool(deleted)
+
+
+def join_waitlist(event_id, user_id):
+    """
+    Queue a user for an event, keeping their place if already queued.
+
+    A slot freed between the failed join and the enqueue would otherwise
+    stay empty until the next leave, so the queue is promoted right away.
+    Returns the position, or None if the user was promoted.
+    """
+    WaitlistEntry.objects.get_or_create(event_id=event_id, user_id=user_id)
+    promote_waitlist(event_id)
+    return waitlist_position(event_id, user_id)
+
+
+def leave_waitlist(event_id, user_id):
+    """Drop a user from an event's waitlist. Returns True if they were queued."""
+    deleted, _ = WaitlistEntry.objects.filter(event_id=event_id, user_id=user_id).delete()
+    return bool(deleted)
+
+
+def waitlist_position(event_id, user_id):
+    """Return the user's 1-based place in the event's waitlist, or None."""
+    entry_id = (
+        WaitlistEntry.objects.filter(event_id=event_id, user_id=user_id)
+        .values_list('id', flat=True)
+        .first()
+    )
+    if entry_id is None:
+        return None
+    return WaitlistEntry.objects.filter(event_id=event_id, id__lte=entry_id).count()
+
+
+def promote_waitlist(event_id):
+    """
+    Fill an event's free slots from the head of its waitlist.
+
+    The event row is locked while the free slots are counted, and every
+    promoted user is moved in one bulk insert and one delete. A mass
+    cancellation therefore promotes all its replacements in one
+    transaction. Entries of users who already joined by other means (the
+    admin, ``participants.add()``) are dropped rather than promoted.
+    Returns the promoted user ids.
+    """
+    through, event_column, user_column = _through()
+    with transaction.atomic():
+        event = (
+            Event.objects.select_for_update()
+            .filter(pk=event_id, is_active=True)
+            .values('participant_count', 'max_participants')
+            .first()
+        )
+        if event is None:
+            return []
+
+        queue = WaitlistEntry.objects.filter(event_id=event_id)
+        joined = through.objects.filter(**{event_column: event_id}).values(user_column)
+        queue.filter(user_id__in=joined).delete()
+        if event['max_participants'] is not None:
+            free = event['max_participants'] - event['participant_count']
+            if free <= 0:
+                return []
+            queue = queue[:free]
+        entries = list(queue.values_list('id', 'user_id'))
+        if not entries:
+            return []
+
+        user_ids = [user_id for _, user_id in entries]
+        through.objects.bulk_create(
+            [through(**{event_column: event_id, user_column: user_id}) for user_id in user_ids]
+        )
+        Event.objects.filter(pk=event_id).update(participant_count=F('participant_count') + len(user_ids))
+        WaitlistEntry.objects.filter(id__in=[entry_id for entry_id, _ in entries]).delete()
+        for user_id in user_ids:
+            _notify(event_id, user_id, 'promote')
+    return user_ids
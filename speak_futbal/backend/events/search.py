@@ -0,0 +1,187 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Event
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(text):
+    """Split a ``?search=`` value into the words every match must contain."""
+    return WORD_RE.findall(text or '')[:10]
+
+
+class SearchBackend:
+    """
+    Full-text search over events.
+
+    ``search`` narrows a queryset to events matching every term (as a word
+    prefix) and annotates ``search_rank``, higher meaning more relevant.
+    The ``index``/``remove`` hooks are called from signals on Event so the
+    search structures stay in sync with the table.
+    """
+
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+    def index(self, event_ids):
+        pass
+
+    def remove(self, event_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+class IContainsSearchBackend(SearchBackend):
+    """Unindexed fallback for databases without a full-text engine."""
+    fields = ('title', 'description', 'location', 'event_type')
+
+    def search(self, queryset, terms):
+        for term in terms:
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset.annotate(search_rank=RawSQL('0', [], output_field=FloatField()))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Ranked search over the ``Event.search_vector`` tsvector column.
+
+    The column is GIN-indexed (see migration 0006) and rewritten from the
+    weighted title/location/type/description vector whenever an event is
+    saved.
+    """
+    config = 'english'
+
+    def vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return (
+            SearchVector('title', weight='A', config=self.config)
+            + SearchVector('location', 'event_type', weight='B', config=self.config)
+            + SearchVector('description', weight='C', config=self.config)
+        )
+
+    def search(self, queryset, terms):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        # Terms are plain words, so a raw tsquery of prefix matches is safe
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config=self.config,
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+
+    def index(self, event_ids):
+        Event.objects.filter(pk__in=event_ids).update(search_vector=self.vector())
+
+    def rebuild(self):
+        Event.objects.update(search_vector=self.vector())
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    """
+    Ranked search through the ``events_event_fts`` FTS5 table.
+
+    The virtual table (created by migration 0006) holds a copy of the
+    searchable columns keyed by event id and is refreshed from signals.
+    """
+    table = 'events_event_fts'
+    # bm25 column weights, in the table's column order
+    weights = (10.0, 1.0, 5.0, 5.0)
+
+    def match_expression(self, terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, terms):
+        match = self.match_expression(terms)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        matching_ids = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match])
+        # bm25() is lower for better matches; negate it so higher ranks first
+        rank = RawSQL(
+            f'SELECT -bm25({self.table}, {weights}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = "events_event"."id"',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matching_ids).annotate(search_rank=rank)
+
+    def index(self, event_ids):
+        event_ids = list(event_ids)
+        rows = Event.objects.filter(pk__in=event_ids).values_list(
+            'id', 'title', 'description', 'location', 'event_type'
+        )
+        with connection.cursor() as cursor:
+            self._delete(cursor, event_ids)
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, description, location, event_type) '
+                f'VALUES (%s, %s, %s, %s, %s)',
+                list(rows),
+            )
+
+    def remove(self, event_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, list(event_ids))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, description, location, event_type) '
+                f'SELECT id, title, description, location, event_type FROM events_event'
+            )
+
+    def _delete(self, cursor, event_ids):
+        if event_ids:
+            placeholders = ', '.join(['%s'] * len(event_ids))
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', event_ids)
+
+
+VENDOR_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteFTSSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """
+    Return the configured search backend.
+
+    ``EVENTS_SEARCH_BACKEND`` may name a backend class; by default one is
+    picked for the database vendor.
+    """
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'EVENTS_SEARCH_BACKEND', None)
+        backend_class = import_string(path) if path else VENDOR_BACKENDS.get(connection.vendor, IContainsSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+class EventSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` over title, description, location and event type.
+
+    Matches are ordered by relevance unless an explicit ``?ordering=`` is
+    applied afterwards by OrderingFilter.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, terms).order_by('-search_rank', 'id')
@@ -1,19 +1,39 @@
+import functools
+
 from rest_framework import serializers
 from .models import Event
+from .compiled import compile_serializer
+from .participants import participant_preview
 from users.serializers import UserSerializer
 
+
+def _distance_km(event):
+    # Only present when the queryset was built with Event.objects.nearby()
+    distance = getattr(event, 'distance_km', None)
+    return round(distance, 3) if distance is not None else None
+
+
+def _row_distance_km(row):
+    distance = row.get('distance_km')
+    return round(distance, 3) if distance is not None else None
+
+
 class EventSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
-    participants = UserSerializer(many=True, read_only=True)
-    participant_count = serializers.SerializerMethodField()
+    participants_preview = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
-        fields = '__all__'
+        # Participants are listed at /events/<pk>/participants/
+        exclude = ('search_vector', 'participants')
         read_only_fields = ('created_by', 'created_at', 'updated_at')
 
-    def get_participant_count(self, obj):
-        return obj.participants.count()
+    def get_participants_preview(self, obj):
+        return participant_preview(obj.pk)
+
+    def get_distance_km(self, obj):
+        return _distance_km(obj)
 
     def create(self, validated_data):
         validated_data['created_by'] = self.context['request'].user
@@ -21,12 +41,31 @@ class EventSerializer(serializers.ModelSerializer):
 
 class EventListSerializer(serializers.ModelSerializer):
     created_by = UserSerializer(read_only=True)
-    participant_count = serializers.SerializerMethodField()
+    distance_km = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
-        fields = ('id', 'title', 'event_type', 'location', 'start_date', 'end_date', 
-                 'created_by', 'participant_count', 'max_participants', 'is_active')
+        fields = ('id', 'title', 'description', 'event_type', 'location', 'latitude', 'longitude',
+                 'start_date', 'end_date', 'created_by', 'participant_count', 'max_participants',
+                 'is_active', 'distance_km')
+
+    def get_distance_km(self, obj):
+        return _distance_km(obj)
+
+
+# Compiled serializers over ``.values()`` rows for the read endpoints; see
+# events.compiled. One per requested fieldset, so the caches are bounded.
+
+@functools.lru_cache(maxsize=64)
+def compiled_event_list_serializer(fields=None):
+    return compile_serializer(EventListSerializer, overrides={'distance_km': _row_distance_km}, fields=fields)
+
 
-    def get_participant_count(self, obj):
-        return obj.participants.count() 
\ No newline at end of file
+@functools.lru_cache(maxsize=64)
+def compiled_event_serializer(fields=None):
+    """EventSerializer; the participants preview is looked up separately and put on the row."""
+    overrides = {
+        'distance_km': _row_distance_km,
+        'participants_preview': lambda row: row['participants_preview'],
+    }
+    return compile_serializer(EventSerializer, overrides=overrides, fields=fields)
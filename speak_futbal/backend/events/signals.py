@@ -0,0 +1,97 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import live
+from .cache import invalidate_event, invalidate_events
+from .models import Event, WaitlistEntry
+from .participation import participation_changed, promote_waitlist
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    get_search_backend().index([instance.pk])
+
+
+@receiver(post_delete, sender=Event)
+def unindex_event(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Event)
+def promote_waitlisted_users(sender, instance, created, raw=False, **kwargs):
+    # max_participants may have been raised or the event re-activated
+    if created or raw:
+        return
+    promote_waitlist(instance.pk)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_cached_event(sender, instance, **kwargs):
+    # After commit: bumped inside the writer's transaction, a concurrent read
+    # could cache the old row under the new version
+    pk = instance.pk
+    transaction.on_commit(lambda: invalidate_event(pk))
+
+
+@receiver(m2m_changed, sender=Event.participants.through)
+def participants_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep ``participant_count``, the waitlist and the response cache in step
+    with ``participants.add()/remove()/set()/clear()`` from either side.
+    """
+    if reverse:
+        # instance is a user; pk_set holds event ids
+        if action == 'pre_clear':
+            instance._cleared_event_ids = list(instance.participated_events.values_list('pk', flat=True))
+            return
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_cleared_event_ids', [])
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    event_ids = list(pk_set or ()) if reverse else [instance.pk]
+    if not event_ids:
+        return
+    Event.objects.filter(pk__in=event_ids).sync_participant_count()
+    if action == 'post_add':
+        # Added directly, e.g. in the admin: no longer waiting
+        if reverse:
+            WaitlistEntry.objects.filter(user=instance, event_id__in=event_ids).delete()
+        else:
+            WaitlistEntry.objects.filter(event=instance, user_id__in=pk_set).delete()
+    else:
+        for event_id in event_ids:
+            promote_waitlist(event_id)
+    if not reverse:
+        instance.refresh_from_db(fields=['participant_count'])
+    transaction.on_commit(lambda: invalidate_events(event_ids))
+    action = 'join' if action == 'post_add' else 'leave'
+    transaction.on_commit(lambda: live.publish_participation(event_ids, action))
+
+
+@receiver(participation_changed)
+def invalidate_cached_participation(sender, event_id, **kwargs):
+    invalidate_event(event_id)
+
+
+@receiver(participation_changed)
+def broadcast_participation(sender, event_id, action, **kwargs):
+    live.publish_participation([event_id], action)
+
+
+@receiver(post_save, sender=Event)
+def broadcast_event(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(lambda: live.publish_event(instance.pk, created))
+
+
+@receiver(post_delete, sender=Event)
+def broadcast_deleted_event(sender, instance, **kwargs):
+    pk, geohash = instance.pk, instance.geohash
+    transaction.on_commit(lambda: live.publish_deleted(pk, geohash))
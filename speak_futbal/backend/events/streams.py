@@ -0,0 +1,87 @@
+"""
+Server-Sent Events streams of live event updates (see events.live).
+
+These are async views holding one connection open per client, served over
+speak_football.asgi only. Under WSGI Django drains an async iterator into a
+list before responding, so an endless stream would block its worker forever;
+the views answer 501 there instead. A comment line is sent every
+``EVENTS_LIVE_HEARTBEAT`` seconds so proxies keep idle streams open.
+"""
+import orjson
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .geo import encode_geohash
+from .live import CELL_PRECISION, cell_channel, event_channel, get_broker
+from .models import Event
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def encode(message):
+    return b'event: ' + message['type'].encode() + b'\ndata: ' + orjson.dumps(message) + b'\n\n'
+
+
+async def _stream(channels, snapshot=None):
+    async with get_broker().subscribe(channels) as subscription:
+        # Subscribed before the snapshot is read, so no change falls between
+        if snapshot is not None:
+            yield encode(await snapshot())
+        while True:
+            message = await subscription.get(timeout=settings.EVENTS_LIVE_HEARTBEAT)
+            yield KEEPALIVE if message is None else encode(message)
+
+
+def asgi_required(request):
+    """A 501 response unless the request came through the ASGI handler."""
+    if isinstance(request, ASGIRequest):
+        return None
+    return JsonResponse({'error': 'Live updates are only served over ASGI'}, status=501)
+
+
+def stream_response(channels, snapshot=None):
+    response = StreamingHttpResponse(_stream(channels, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def event_stream(request, pk):
+    """
+    ``GET /api/events/<pk>/stream/``: participation changes and edits of one
+    event, starting with its current ``participant_count``.
+    """
+    if (response := asgi_required(request)) is not None:
+        return response
+    if not await Event.objects.active().filter(pk=pk).aexists():
+        return JsonResponse({'error': 'Event not found'}, status=404)
+
+    async def snapshot():
+        count = await Event.objects.filter(pk=pk).values_list('participant_count', flat=True).afirst()
+        return {'type': 'participation', 'event': pk, 'action': 'snapshot', 'participant_count': count}
+
+    return stream_response([event_channel(pk)], snapshot)
+
+
+async def cell_stream(request):
+    """
+    ``GET /api/events/stream/?latitude=&longitude=``: every change to events
+    in the geohash cell around the point, multiplexed on one stream. The
+    cell, roughly 5km across, is echoed in the ``X-Geohash-Cell`` header.
+    """
+    if (response := asgi_required(request)) is not None:
+        return response
+    try:
+        latitude = float(request.GET.get('latitude') or request.GET.get('lat'))
+        longitude = float(request.GET.get('longitude') or request.GET.get('lng'))
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'latitude and longitude must be numbers'}, status=400)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return JsonResponse({'error': 'Coordinates out of range'}, status=400)
+
+    cell = encode_geohash(latitude, longitude, CELL_PRECISION)
+    response = stream_response([cell_channel(cell)])
+    response['X-Geohash-Cell'] = cell
+    return response
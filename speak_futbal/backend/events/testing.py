@@ -0,0 +1,24 @@
+"""Fixtures shared by the events and stats test suites."""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Event
+
+
+def make_event(creator, **overrides):
+    """Create an event starting tomorrow in Kathmandu, with any field overridden."""
+    start = timezone.now() + timedelta(days=1)
+    fields = {
+        'title': 'Sunday League',
+        'description': 'Friendly match',
+        'event_type': 'match',
+        'location': 'Tundikhel',
+        'latitude': 27.7041,
+        'longitude': 85.3145,
+        'start_date': start,
+        'end_date': start + timedelta(hours=2),
+        'created_by': creator,
+    }
+    fields.update(overrides)
+    return Event.objects.create(**fields)
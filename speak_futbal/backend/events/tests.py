@@ -1,3 +1,1133 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import math
+import random
+import asyncio
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from speak_football.renderers import ORJSONRenderer
+
+from . import live
+from .cache import cache_metrics, get_cache, reset_cache_metrics
+from .exports import EXPORT_CHUNK_SIZE, streaming_export
+from .geo import EARTH_RADIUS_KM, covering_cells, encode_geohash, haversine_km
+from .models import Event, WaitlistEntry
+from .participation import (
+    ALREADY_JOINED, FULL, JOINED, NOT_FOUND, join_event, join_waitlist, leave_event, waitlist_position,
+)
+from .serializers import EventListSerializer, compiled_event_list_serializer
+from .testing import make_event
+from .views import EventDetailView, EventListView
+
+User = get_user_model()
+
+
+class EventTestCase(TestCase):
+    def setUp(self):
+        # The response cache outlives each test's database transaction
+        get_cache().clear()
+
+
+class EventQueryCountTests(EventTestCase):
+    """The events API must issue a fixed number of queries regardless of result size."""
+
+    def populate(self, count):
+        players = [
+            User.objects.get_or_create(username=f'player{j}', defaults={'email': f'player{j}@example.com'})[0]
+            for j in range(3)
+        ]
+        offset = Event.objects.count()
+        for i in range(offset, offset + count):
+            creator = User.objects.create_user(username=f'creator{i}', email=f'creator{i}@example.com')
+            with self.captureOnCommitCallbacks(execute=True):
+                make_event(creator, title=f'Event {i}').participants.add(*players)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        self.populate(1)
+        baseline = self.count_queries(reverse('event-list'))
+        self.populate(20)
+        self.assertEqual(self.count_queries(reverse('event-list')), baseline)
+
+    def test_nearby_list_query_count_is_constant(self):
+        url = reverse('event-list') + '?lat=27.70&lng=85.31&radius=5'
+        self.populate(1)
+        baseline = self.count_queries(url)
+        self.populate(20)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_detail_query_count_is_independent_of_participants(self):
+        creator = User.objects.create_user(username='host', email='host@example.com')
+        event = make_event(creator)
+        url = reverse('event-detail', args=[event.pk])
+        baseline = self.count_queries(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(25):
+                event.participants.add(
+                    User.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com')
+                )
+        self.assertEqual(self.count_queries(url), baseline)
+
+
+class CompiledSerializerTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(
+            username='host', email='host@example.com', latitude=27.7, longitude=85.3
+        )
+        self.other = User.objects.create_user(username='guest', email='guest@example.com')
+        make_event(self.creator, max_participants=10, latitude=27.704123456, description='Caf\u00e9 \u2028 match')
+        make_event(self.other, title='Open training', event_type='training')
+
+    def assertMatchesSerializer(self, queryset):
+        compiled = compiled_event_list_serializer()
+        fields = [*compiled.sources, *queryset.query.annotations]
+        expected = EventListSerializer(queryset, many=True).data
+        self.assertEqual(compiled.represent_many(queryset.values(*fields)), expected)
+
+    def test_list_rows_match_the_model_serializer(self):
+        self.assertMatchesSerializer(Event.objects.for_list())
+
+    def test_nearby_rows_match_the_model_serializer(self):
+        self.assertMatchesSerializer(Event.objects.for_list().nearby(27.70, 85.31, 5))
+
+    def test_list_endpoint_matches_the_model_serializer(self):
+        response = self.client.get(reverse('event-list'))
+        expected = EventListSerializer(Event.objects.for_list(), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(JSONRenderer().render(expected)))
+
+    def test_renderer_matches_drf(self):
+        data = EventListSerializer(Event.objects.for_list(), many=True).data
+        data[0]['extra'] = {1: Decimal('1.50'), 'when': timezone.now(), 'ratio': 0.1}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+
+class EventFieldsetTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com') for i in range(3)
+        ]
+        self.event = make_event(self.creator)
+        self.event.participants.add(*self.players)
+        make_event(self.creator, title='Training', event_type='training').participants.add(self.players[0])
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        return response, [query['sql'] for query in queries]
+
+    def test_sparse_list_narrows_the_projection(self):
+        response, queries = self.get(reverse('event-list'), fields='id,latitude,longitude,event_type')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results'][0]), ['id', 'event_type', 'latitude', 'longitude'])
+        select = next(sql for sql in queries if 'FROM "events_event"' in sql)
+        self.assertNotIn('users_customuser', select)
+        self.assertNotIn('"description"', select)
+
+    def test_list_expands_participants_in_one_query(self):
+        baseline, _ = self.get(reverse('event-list'))
+        self.assertNotIn('participants', baseline.data['results'][0])
+
+        get_cache().clear()
+        response, queries = self.get(reverse('event-list'), expand='participants')
+        counts = {item['title']: len(item['participants']) for item in response.data['results']}
+        self.assertEqual(counts, {'Sunday League': 3, 'Training': 1})
+        self.assertEqual(response.data['results'][1]['participants'][0]['username'], 'player0')
+        self.assertEqual(len([sql for sql in queries if 'events_event_participants' in sql]), 1)
+
+    def test_detail_loads_participants_only_when_expanded(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        response, queries = self.get(url, fields='id,title,created_by')
+        self.assertNotIn('participants', response.data)
+        self.assertEqual(response.data['created_by']['username'], 'host')
+        self.assertFalse([sql for sql in queries if 'events_event_participants' in sql])
+
+        response, _ = self.get(url, expand='participants')
+        self.assertEqual([user['username'] for user in response.data['participants']], ['player0', 'player1', 'player2'])
+
+    def test_fieldsets_are_cached_and_validated_separately(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        full, _ = self.get(url)
+        sparse, _ = self.get(url, fields='title,event_type')
+        self.assertEqual(sparse.data, {'title': 'Sunday League', 'event_type': 'match'})
+        self.assertNotEqual(full['ETag'], sparse['ETag'])
+        self.assertIn('description', self.get(url)[0].data)
+
+    def test_unknown_fields_are_rejected(self):
+        response, _ = self.get(reverse('event-list'), fields='title,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.data['fields'])
+        response, _ = self.get(reverse('event-detail', args=[self.event.pk]), expand='created_by')
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncReadTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com') for i in range(3)
+        ]
+        for i in range(5):
+            make_event(self.creator, title=f'Match {i}', latitude=27.70 + i / 100).participants.add(*self.players)
+        self.event = Event.objects.first()
+        self.factory = RequestFactory()
+
+    def views(self, view_class):
+        views = []
+        for enabled in (False, True):
+            with override_settings(ASYNC_READ_VIEWS=enabled):
+                views.append(view_class.as_view())
+        return views
+
+    def assertSameResponses(self, view_class, path, params=None, **kwargs):
+        sync_view, async_view = self.views(view_class)
+        self.assertFalse(asyncio.iscoroutinefunction(sync_view))
+        self.assertTrue(asyncio.iscoroutinefunction(async_view))
+        responses = []
+        for view in (sync_view, async_to_sync(async_view)):
+            get_cache().clear()
+            response = view(self.factory.get(path, params), **kwargs)
+            response.render()
+            responses.append(response)
+        sync_response, async_response = responses
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        self.assertEqual(async_response.content, sync_response.content)
+        return async_response
+
+    def test_list_and_nearby(self):
+        url = reverse('event-list')
+        self.assertSameResponses(EventListView, url)
+        self.assertSameResponses(EventListView, url, {'page_size': 2, 'expand': 'participants'})
+        response = self.assertSameResponses(EventListView, url, {'lat': 27.7, 'lng': 85.3145, 'radius': 3})
+        self.assertEqual(len(json.loads(response.content)['results']), 3)
+        self.assertSameResponses(EventListView, url, {'lat': 'north'})
+
+    def test_detail(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        response = self.assertSameResponses(EventDetailView, url, pk=self.event.pk)
+        self.assertEqual(len(json.loads(response.content)['participants_preview']), 3)
+        self.assertSameResponses(EventDetailView, url, {'fields': 'id,title', 'expand': 'participants'}, pk=self.event.pk)
+        self.assertEqual(self.assertSameResponses(EventDetailView, url, pk=0).status_code, 404)
+
+    def test_credentials_are_still_checked(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        view = async_to_sync(self.views(EventDetailView)[1])
+        token = Token.objects.create(user=self.creator)
+        for authorization, status_code in ((f'Token {token.key}', 200), ('Token invalid', 401)):
+            request = self.factory.get(url, HTTP_AUTHORIZATION=authorization)
+            self.assertEqual(view(request, pk=self.event.pk).status_code, status_code)
+
+    def test_writes_use_the_sync_view(self):
+        view = async_to_sync(self.views(EventDetailView)[1])
+        token = Token.objects.create(user=self.creator)
+        request = self.factory.patch(
+            reverse('event-detail', args=[self.event.pk]), {'title': 'Renamed'},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {token.key}',
+        )
+        response = view(request, pk=self.event.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['title'], 'Renamed')
+
+
+class ParticipantListTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.players = [
+            User.objects.create_user(
+                username=f'player{i}', email=f'player{i}@example.com', first_name='Kiran' if i % 2 else 'Sita'
+            )
+            for i in range(8)
+        ]
+        self.event = make_event(self.creator)
+        self.event.participants.add(*self.players)
+        self.url = reverse('event-participants', args=[self.event.pk])
+
+    def usernames(self, data):
+        return [user['username'] for user in data['results']]
+
+    def test_pages_follow_join_order(self):
+        response = self.client.get(self.url, {'page_size': 5})
+        self.assertEqual(self.usernames(response.data), [f'player{i}' for i in range(5)])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.usernames(response.data), [f'player{i}' for i in range(5, 8)])
+        self.assertIsNone(response.data['next'])
+
+    def test_filter_by_name(self):
+        response = self.client.get(self.url, {'name': 'kir'})
+        self.assertEqual(self.usernames(response.data), ['player1', 'player3', 'player5', 'player7'])
+        response = self.client.get(self.url, {'name': 'player6'})
+        self.assertEqual(self.usernames(response.data), ['player6'])
+
+    def test_event_list_filters_by_participant(self):
+        other = make_event(self.creator, title='Other')
+        url = reverse('event-list')
+        response = self.client.get(url, {'participant': self.players[0].pk})
+        self.assertEqual([event['id'] for event in response.data['results']], [self.event.pk])
+        # The cached list follows joins
+        with self.captureOnCommitCallbacks(execute=True):
+            other.participants.add(self.players[0])
+        response = self.client.get(url, {'participant': self.players[0].pk})
+        self.assertEqual({event['id'] for event in response.data['results']}, {self.event.pk, other.pk})
+        self.assertEqual(self.client.get(url, {'participant': 'me'}).status_code, 400)
+
+    def test_event_list_filters_by_creator(self):
+        make_event(self.players[0], title='Hosted')
+        response = self.client.get(reverse('event-list'), {'created_by': self.players[0].pk})
+        self.assertEqual([event['title'] for event in response.data['results']], ['Hosted'])
+
+    def test_is_participant_costs_one_query(self):
+        self.assertFalse(self.client.get(self.url).data['is_participant'])
+        self.client.force_login(self.creator)
+        self.assertFalse(self.client.get(self.url).data['is_participant'])
+        self.client.force_login(self.players[3])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertTrue(response.data['is_participant'])
+        self.assertEqual(len([query for query in queries if 'FROM "events_event"' in query['sql']]), 1)
+
+    def test_missing_or_inactive_event(self):
+        self.assertEqual(self.client.get(reverse('event-participants', args=[0])).status_code, 404)
+        Event.objects.filter(pk=self.event.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_detail_previews_participants(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(url).data
+        self.assertEqual(data['participant_count'], 8)
+        self.assertEqual([user['username'] for user in data['participants_preview']], [f'player{i}' for i in range(5)])
+        self.assertNotIn('participants', data)
+        self.assertEqual(len([query for query in queries if 'events_event_participants' in query['sql']]), 1)
+
+
+class GeoTests(SimpleTestCase):
+    def assertCovered(self, cells, latitude, longitude):
+        geohash = encode_geohash(latitude, longitude)
+        self.assertTrue(any(geohash.startswith(cell) for cell in cells), (latitude, longitude, cells))
+
+    def test_encode_geohash_known_vectors(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode_geohash(42.6, -5.6, 5), 'ezs42')
+        self.assertEqual(encode_geohash(-25.382708, -49.265506, 9), '6gkzwgjzn')
+        self.assertEqual(encode_geohash(0, 0, 1), 's')
+
+    def test_covering_cells_across_the_antimeridian(self):
+        cells = covering_cells(0.0, 179.99, 20)
+        self.assertLessEqual(len(cells), 16)
+        self.assertCovered(cells, 0.0, 179.9)
+        self.assertCovered(cells, 0.05, -179.95)
+        self.assertCovered(cells, -0.05, -179.9)
+
+    def test_covering_cells_around_the_poles(self):
+        for latitude in (89.99, -89.99):
+            cells = covering_cells(latitude, 0.0, 50)
+            for longitude in (-179.0, -90.0, 0.0, 90.0, 179.0):
+                self.assertCovered(cells, latitude, longitude)
+
+    def test_covering_cells_reach_the_north_and_south_edges(self):
+        rng = random.Random(7)
+        origins = [(3.678, 78.338, 96.29)] + [
+            (rng.uniform(-80, 80), rng.uniform(-180, 180), rng.uniform(0.5, 200)) for _ in range(300)
+        ]
+        for latitude, longitude, radius in origins:
+            cells = covering_cells(latitude, longitude, radius)
+            offset = math.degrees(0.99999 * radius / EARTH_RADIUS_KM)
+            for probe in (latitude + offset, latitude - offset):
+                self.assertLessEqual(haversine_km(latitude, longitude, probe, longitude), radius)
+                self.assertCovered(cells, probe, longitude)
+
+    def test_covering_cells_rejects_non_finite_input(self):
+        with self.assertRaises(ValueError):
+            covering_cells(27.7, 85.3, float('nan'))
+        with self.assertRaises(ValueError):
+            covering_cells(float('inf'), 85.3, 10)
+
+    def test_haversine_km(self):
+        self.assertEqual(haversine_km(27.7, 85.3, 27.7, 85.3), 0)
+        self.assertAlmostEqual(haversine_km(0, 0, 0, 1), 111.195, places=2)
+        # London to Paris
+        self.assertAlmostEqual(haversine_km(51.5074, -0.1278, 48.8566, 2.3522), 343.5, delta=0.5)
+        # Antipodes, clamped rather than a math domain error
+        self.assertAlmostEqual(haversine_km(0, 0, 0, 180), 20015.1, delta=0.1)
+
+
+class NearbySearchTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+
+    def test_nearby_excludes_events_just_outside_the_radius(self):
+        km = 1 / 111.195  # degrees of latitude per km
+        make_event(self.creator, title='Inside', latitude=round(27.7 + 4.99 * km, 6), longitude=85.3)
+        make_event(self.creator, title='Outside', latitude=round(27.7 + 5.01 * km, 6), longitude=85.3)
+        make_event(self.creator, title='Across', latitude=round(27.7 - 4.9 * km, 6), longitude=85.3)
+        titles = list(Event.objects.nearby(27.7, 85.3, 5).values_list('title', flat=True))
+        self.assertEqual(titles, ['Across', 'Inside'])
+
+    def test_non_finite_or_oversized_parameters_are_rejected(self):
+        for params in (
+            {'lat': 27.7, 'lng': 85.3, 'radius': 'nan'},
+            {'lat': 27.7, 'lng': 85.3, 'radius': 'inf'},
+            {'lat': 'nan', 'lng': 85.3},
+            {'lat': 27.7, 'lng': '-inf'},
+            {'lat': 27.7, 'lng': 85.3, 'radius': 501},
+            {'lat': 27.7, 'lng': 85.3, 'radius': 0},
+        ):
+            response = self.client.get(reverse('event-list'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class EventPaginationTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        kickoff = timezone.now() + timedelta(days=1)
+        # Several events share a start_date so the id tie-breaker is exercised
+        for i in range(23):
+            make_event(
+                self.creator,
+                title=f'Event {i}',
+                start_date=kickoff + timedelta(hours=i // 4),
+                latitude=27.70 + i * 0.001,
+            )
+
+    def walk(self, url, key='next'):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(event['id'] for event in response.data['results'])
+            url = response.data[key]
+        return seen
+
+    def test_pages_follow_start_date_then_id(self):
+        expected = list(Event.objects.order_by('-start_date', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk(reverse('event-list') + '?page_size=5'), expected)
+
+    def test_nearby_pages_follow_distance(self):
+        url = reverse('event-list') + '?lat=27.70&lng=85.3145&radius=50&page_size=4'
+        expected = list(Event.objects.nearby(27.70, 85.3145, 50).values_list('id', flat=True))
+        self.assertEqual(self.walk(url), expected)
+
+    def test_previous_link_returns_earlier_page(self):
+        first = self.client.get(reverse('event-list') + '?page_size=5').data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse('event-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values_are_not_found(self):
+        for url, values in (
+            (reverse('event-list'), ['garbage', 1]),
+            (reverse('event-list'), [None, None]),
+            (reverse('event-list'), [[1], 2]),
+            (reverse('event-list'), [{'a': 1}, 2]),
+            (reverse('event-list') + '?lat=27.70&lng=85.3145&radius=50', ['far', 1]),
+        ):
+            payload = json.dumps({'v': values, 'r': False}).encode()
+            cursor = base64.urlsafe_b64encode(payload).decode().rstrip('=')
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, values)
+
+
+class EventSearchTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+
+    def search(self, term):
+        response = self.client.get(reverse('event-list'), {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [event['title'] for event in response.data['results']]
+
+    def test_title_matches_rank_above_description_matches(self):
+        make_event(self.creator, title='Morning kickabout', description='Futsal drills for beginners')
+        make_event(self.creator, title='Futsal night', description='Indoor five-a-side')
+        make_event(self.creator, title='Cricket', description='Not football at all')
+        self.assertEqual(self.search('futsal'), ['Futsal night', 'Morning kickabout'])
+
+    def test_every_term_must_match_as_a_prefix(self):
+        make_event(self.creator, title='Dashain tournament', location='Pokhara')
+        make_event(self.creator, title='Dashain training', location='Kathmandu')
+        self.assertEqual(self.search('dash pokh'), ['Dashain tournament'])
+
+    def test_index_follows_updates_and_deletes(self):
+        event = make_event(self.creator, title='Old name')
+        event.title = 'Derby day'
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()
+        self.assertEqual(self.search('derby'), ['Derby day'])
+        self.assertEqual(self.search('old'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            event.delete()
+        self.assertEqual(self.search('derby'), [])
+
+
+class EventResponseCacheTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.event = make_event(self.creator)
+        reset_cache_metrics()
+
+    def test_repeated_list_is_served_from_cache(self):
+        url = reverse('event-list')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(cache_metrics()['hits'], 1)
+        self.assertEqual(cache_metrics()['misses'], 1)
+
+    def test_nearby_requests_in_the_same_cell_share_an_entry(self):
+        url = reverse('event-list')
+        self.client.get(url, {'lat': '27.70412', 'lng': '85.31411'})
+        response = self.client.get(url, {'lat': '27.70398', 'lng': '85.31437'})
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_nearby_queries_use_the_exact_origin(self):
+        # 0.99km from the origin, 1.03km from the origin snapped to 27.700
+        make_event(self.creator, title='Edge', latitude=27.7093, longitude=85.3)
+        response = self.client.get(reverse('event-list'), {'lat': '27.7004', 'lng': '85.3', 'radius': 1})
+        results = response.data['results']
+        self.assertEqual([event['title'] for event in results], ['Edge'])
+        self.assertAlmostEqual(results[0]['distance_km'], haversine_km(27.7004, 85.3, 27.7093, 85.3), places=3)
+
+    def test_edit_invalidates_list_and_detail(self):
+        list_url = reverse('event-list')
+        detail_url = reverse('event-detail', args=[self.event.pk])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+        self.event.title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.save()
+        self.assertEqual(self.client.get(list_url).data['results'][0]['title'], 'Renamed')
+        self.assertEqual(self.client.get(detail_url).data['title'], 'Renamed')
+
+    def test_invalidation_waits_for_commit(self):
+        detail_url = reverse('event-detail', args=[self.event.pk])
+        self.client.get(detail_url)
+        self.event.title = 'Renamed'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.event.save()
+            # A read racing the open transaction must not cache under a new version
+            self.assertEqual(self.client.get(detail_url)['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        response = self.client.get(detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed')
+
+    def test_participant_changes_invalidate_detail(self):
+        detail_url = reverse('event-detail', args=[self.event.pk])
+        self.client.get(detail_url)
+        player = User.objects.create_user(username='player', email='player@example.com')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.participants.add(player)
+        self.assertEqual(self.client.get(detail_url).data['participant_count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            player.participated_events.clear()
+        self.assertEqual(self.client.get(detail_url).data['participant_count'], 0)
+
+
+class EventConditionalGetTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.event = make_event(self.creator)
+        self.detail_url = reverse('event-detail', args=[self.event.pk])
+
+    def test_detail_revalidation_returns_304_without_queries(self):
+        first = self.client.get(self.detail_url)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_participant_change_produces_a_new_etag(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.participants.add(User.objects.create_user(username='player', email='player@example.com'))
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)['Last-Modified']
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_revalidation(self):
+        url = reverse('event-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(url + '?event_type=match', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_event(self.creator, title='Another')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_missing_event_is_still_404(self):
+        response = self.client.get(reverse('event-detail', args=[self.event.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ParticipationTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.event = make_event(self.creator, max_participants=2)
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com')
+            for i in range(3)
+        ]
+
+    def test_join_until_full(self):
+        self.assertEqual(join_event(self.event.pk, self.players[0].pk), JOINED)
+        self.assertEqual(join_event(self.event.pk, self.players[0].pk), ALREADY_JOINED)
+        self.assertEqual(join_event(self.event.pk, self.players[1].pk), JOINED)
+        self.assertEqual(join_event(self.event.pk, self.players[2].pk), FULL)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+        self.assertEqual(self.event.participants.count(), 2)
+
+    def test_leave_frees_a_slot(self):
+        join_event(self.event.pk, self.players[0].pk)
+        join_event(self.event.pk, self.players[1].pk)
+        self.assertTrue(leave_event(self.event.pk, self.players[0].pk))
+        self.assertFalse(leave_event(self.event.pk, self.players[0].pk))
+        self.assertEqual(join_event(self.event.pk, self.players[2].pk), JOINED)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+
+    def test_inactive_event_cannot_be_joined(self):
+        Event.objects.filter(pk=self.event.pk).update(is_active=False)
+        self.assertEqual(join_event(self.event.pk, self.players[0].pk), NOT_FOUND)
+
+    def test_participate_endpoint(self):
+        self.client.force_login(self.players[0])
+        url = reverse('event-participate', args=[self.event.pk])
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.post(reverse('event-participate', args=[0])).status_code, 404)
+
+    def test_join_invalidates_cached_detail(self):
+        url = reverse('event-detail', args=[self.event.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            join_event(self.event.pk, self.players[0].pk)
+        self.assertEqual(self.client.get(url).data['participant_count'], 1)
+
+
+class ParticipantCountTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.event = make_event(self.creator)
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com')
+            for i in range(3)
+        ]
+
+    def count(self):
+        return Event.objects.values_list('participant_count', flat=True).get(pk=self.event.pk)
+
+    def test_bulk_add_remove_and_clear(self):
+        self.event.participants.add(*self.players)
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(self.event.participant_count, 3)
+        self.event.participants.remove(self.players[0], self.players[1])
+        self.assertEqual(self.count(), 1)
+        self.event.participants.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_changes_from_the_user_side(self):
+        other = make_event(self.creator, title='Other')
+        self.players[0].participated_events.add(self.event, other)
+        self.assertEqual(self.count(), 1)
+        self.players[0].participated_events.clear()
+        self.assertEqual(self.count(), 0)
+        self.assertEqual(Event.objects.get(pk=other.pk).participant_count, 0)
+
+    def test_full_save_keeps_concurrent_joins(self):
+        stale = Event.objects.get(pk=self.event.pk)
+        join_event(self.event.pk, self.players[0].pk)
+        stale.title = 'Renamed'
+        stale.save()
+        self.assertEqual(self.count(), 1)
+
+    def test_reconcile_repairs_drift(self):
+        self.event.participants.add(*self.players)
+        Event.objects.filter(pk=self.event.pk).update(participant_count=7)
+        call_command('reconcile_participant_counts', batch_size=1, stdout=StringIO())
+        self.assertEqual(self.count(), 3)
+
+    def test_list_runs_no_aggregate(self):
+        self.event.participants.add(*self.players)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse('event-list')).data
+        self.assertEqual(data['results'][0]['participant_count'], 3)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries))
+
+
+class WaitlistTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.event = make_event(self.creator, max_participants=2)
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com')
+            for i in range(6)
+        ]
+        for player in self.players[:2]:
+            join_event(self.event.pk, player.pk)
+
+    def participant_ids(self):
+        return set(self.event.participants.values_list('pk', flat=True))
+
+    def test_full_event_queues_with_position(self):
+        url = reverse('event-participate', args=[self.event.pk])
+        for expected, player in enumerate(self.players[2:4], start=1):
+            self.client.force_login(player)
+            response = self.client.post(url)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.data, {'status': 'waitlisted', 'position': expected})
+        # Retrying keeps the original place
+        self.assertEqual(self.client.post(url).data['position'], 2)
+        response = self.client.get(reverse('event-waitlist', args=[self.event.pk]))
+        self.assertEqual(response.data, {'position': 2})
+
+    def test_leave_promotes_head_of_queue(self):
+        for player in self.players[2:4]:
+            join_waitlist(self.event.pk, player.pk)
+        leave_event(self.event.pk, self.players[0].pk)
+        self.assertEqual(self.participant_ids(), {self.players[1].pk, self.players[2].pk})
+        self.assertIsNone(waitlist_position(self.event.pk, self.players[2].pk))
+        self.assertEqual(waitlist_position(self.event.pk, self.players[3].pk), 1)
+
+    def test_mass_cancellation_promotes_in_one_batch(self):
+        for player in self.players[2:6]:
+            join_waitlist(self.event.pk, player.pk)
+        self.event.participants.clear()
+        self.assertEqual(self.participant_ids(), {self.players[2].pk, self.players[3].pk})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+        self.assertEqual(WaitlistEntry.objects.filter(event=self.event).count(), 2)
+
+    def test_raising_capacity_promotes(self):
+        for player in self.players[2:4]:
+            join_waitlist(self.event.pk, player.pk)
+        self.event.max_participants = 3
+        self.event.save()
+        self.assertIn(self.players[2].pk, self.participant_ids())
+        self.assertEqual(waitlist_position(self.event.pk, self.players[3].pk), 1)
+
+    def test_promotion_skips_users_who_already_joined(self):
+        # A stale entry, e.g. queued by a request that raced its own join
+        WaitlistEntry.objects.create(event=self.event, user=self.players[1])
+        join_waitlist(self.event.pk, self.players[2].pk)
+        leave_event(self.event.pk, self.players[0].pk)
+        self.assertEqual(self.participant_ids(), {self.players[1].pk, self.players[2].pk})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.participant_count, 2)
+        self.assertFalse(WaitlistEntry.objects.filter(event=self.event).exists())
+
+    def test_joining_the_waitlist_with_a_free_slot_promotes(self):
+        # The slot opened between the full join and the enqueue
+        Event.objects.filter(pk=self.event.pk).update(max_participants=3)
+        self.assertIsNone(join_waitlist(self.event.pk, self.players[2].pk))
+        self.assertIn(self.players[2].pk, self.participant_ids())
+        self.assertEqual(join_waitlist(self.event.pk, self.players[3].pk), 1)
+
+    def test_leaving_the_waitlist(self):
+        join_waitlist(self.event.pk, self.players[2].pk)
+        self.client.force_login(self.players[2])
+        url = reverse('event-waitlist', args=[self.event.pk])
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class RecordingBroker:
+    def __init__(self):
+        self.messages = []
+
+    def listening(self):
+        return True
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+
+
+@override_settings(EVENTS_LIVE_BROKER='events.tests.RecordingBroker')
+class LiveUpdateTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        live._broker = None
+        self.addCleanup(setattr, live, '_broker', None)
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.player = User.objects.create_user(username='player', email='player@example.com')
+        self.event = make_event(self.creator)
+        self.cell = live.cell_channel(self.event.geohash)
+        self.broker = live.get_broker()
+
+    def published(self, function, *args, **kwargs):
+        self.broker.messages.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            function(*args, **kwargs)
+        return self.broker.messages
+
+    def test_participation_is_broadcast(self):
+        self.client.force_login(self.player)
+        url = reverse('event-participate', args=[self.event.pk])
+        message = {'type': 'participation', 'event': self.event.pk, 'action': 'join', 'participant_count': 1}
+        self.assertEqual(
+            self.published(self.client.post, url),
+            [(live.event_channel(self.event.pk), message), (self.cell, message)],
+        )
+
+        self.client.force_login(self.creator)
+        url = reverse('event-remove-participant', args=[self.event.pk, self.player.pk])
+        _, message = self.published(self.client.delete, url)[0]
+        self.assertEqual((message['action'], message['participant_count']), ('leave', 0))
+
+    def test_direct_participant_changes_are_broadcast(self):
+        _, message = self.published(self.event.participants.add, self.player)[0]
+        self.assertEqual((message['action'], message['participant_count']), ('join', 1))
+
+    def test_edits_are_broadcast(self):
+        self.client.force_login(self.creator)
+        url = reverse('event-detail', args=[self.event.pk])
+        messages = self.published(self.client.patch, url, {'title': 'Cup final'}, content_type='application/json')
+        self.assertEqual([channel for channel, _ in messages], [live.event_channel(self.event.pk), self.cell])
+        self.assertEqual(messages[0][1]['type'], 'updated')
+        self.assertEqual(messages[0][1]['event']['title'], 'Cup final')
+
+        pk = self.event.pk
+        message = {'type': 'deleted', 'event': pk}
+        self.assertEqual(self.published(self.event.delete), [(live.event_channel(pk), message), (self.cell, message)])
+
+    def test_new_events_are_broadcast_to_their_cell(self):
+        messages = self.published(make_event, self.creator, title='Training')
+        self.assertEqual([(channel, message['type']) for channel, message in messages], [(self.cell, 'created')])
+
+
+class EventStreamTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        live._broker = None
+        self.addCleanup(setattr, live, '_broker', None)
+        self.creator = User.objects.create_user(username='host', email='host@example.com')
+        self.player = User.objects.create_user(username='player', email='player@example.com')
+        self.event = make_event(self.creator)
+
+    def join(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            join_event(self.event.pk, self.player.pk)
+
+    async def disconnect(self, stream):
+        # The server cancels the response when the client disconnects
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(live.get_broker().listening())
+
+    async def test_event_stream(self):
+        response = await AsyncClient().get(reverse('event-stream', args=[self.event.pk]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        snapshot = await anext(stream)
+        self.assertTrue(snapshot.startswith(b'event: participation\n'))
+        self.assertEqual(json.loads(snapshot.split(b'data: ')[1])['participant_count'], 0)
+
+        await sync_to_async(self.join)()
+        message = json.loads((await asyncio.wait_for(anext(stream), 5)).split(b'data: ')[1])
+        self.assertEqual((message['action'], message['participant_count']), ('join', 1))
+        await self.disconnect(stream)
+
+    async def test_cell_stream(self):
+        response = await AsyncClient().get(
+            reverse('event-cell-stream'), {'latitude': self.event.latitude, 'longitude': self.event.longitude}
+        )
+        self.assertEqual(response['X-Geohash-Cell'], self.event.geohash[:live.CELL_PRECISION])
+        stream = aiter(response.streaming_content)
+        pending = asyncio.ensure_future(anext(stream))
+        while not live.get_broker().listening():
+            await asyncio.sleep(0)
+
+        await sync_to_async(self.join)()
+        message = json.loads((await asyncio.wait_for(pending, 5)).split(b'data: ')[1])
+        self.assertEqual((message['event'], message['participant_count']), (self.event.pk, 1))
+        await self.disconnect(stream)
+
+    async def test_missing_event_or_point(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get(reverse('event-stream', args=[0]))).status_code, 404)
+        self.assertEqual((await client.get(reverse('event-cell-stream'), {'latitude': 'x'})).status_code, 400)
+
+    def test_wsgi_requests_are_refused(self):
+        # The WSGI handler would drain the endless stream and never respond
+        for url, params in (
+            (reverse('event-stream', args=[self.event.pk]), {}),
+            (reverse('event-cell-stream'), {'latitude': self.event.latitude, 'longitude': self.event.longitude}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, params).status_code, 501)
+        self.assertFalse(live.get_broker().listening())
+
+    async def test_slow_subscribers_drop_the_oldest_messages(self):
+        broker = live.InProcessBroker()
+        async with broker.subscribe(['event:1']) as subscription:
+            for i in range(live.QUEUE_SIZE + 5):
+                broker.publish('event:1', i)
+            await asyncio.sleep(0)
+            self.assertEqual(await subscription.get(0), 5)
+        self.assertFalse(broker.listening())
+
+
+class EventBulkTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.organizer = User.objects.create_user(username='organizer', email='organizer@example.com')
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com')
+            for i in range(2)
+        ]
+        self.client.force_login(self.organizer)
+
+    def record(self, **overrides):
+        start = timezone.now() + timedelta(days=3)
+        record = {
+            'title': 'Matchday 1',
+            'description': 'League fixture',
+            'event_type': 'match',
+            'location': 'Dasharath Stadium',
+            'latitude': '27.6949',
+            'longitude': '85.3167',
+            'start_date': start.isoformat(),
+            'end_date': (start + timedelta(hours=2)).isoformat(),
+        }
+        record.update(overrides)
+        return record
+
+    def post(self, body, content_type):
+        return self.client.post(reverse('event-bulk-import'), body, content_type=content_type)
+
+    def test_ndjson_import(self):
+        lines = [
+            json.dumps(self.record(participants=[player.pk for player in self.players], max_participants=10)),
+            '',
+            json.dumps(self.record(title='Matchday 2', event_type='friendly')),
+            'not json',
+            json.dumps(self.record(title='Matchday 3', participants=[999999])),
+            json.dumps(self.record(title='Matchday 4')),
+        ]
+        response = self.post('\n'.join(lines), 'application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['record'] for error in response.data['errors']], [2, 3, 4])
+
+        event = Event.objects.get(title='Matchday 1')
+        self.assertEqual(event.participant_count, 2)
+        self.assertEqual(event.participants.count(), 2)
+        self.assertEqual(event.geohash, encode_geohash(event.latitude, event.longitude))
+        self.assertEqual(self.client.get(reverse('event-list'), {'search': 'matchday'}).data['results'][0]['title'], 'Matchday 1')
+
+    def test_csv_import(self):
+        header = 'title,description,event_type,location,latitude,longitude,start_date,end_date,max_participants,participants'
+        first, second = self.record(), self.record(title='Cup final')
+        rows = [
+            ','.join(str(first[name]) for name in header.split(',')[:8]) + f',,{self.players[0].pk} {self.players[1].pk}',
+            ','.join(str(second[name]) for name in header.split(',')[:8]) + ',22,',
+        ]
+        response = self.post('\n'.join([header] + rows), 'text/csv')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 2, 'failed': 0, 'errors': []})
+        self.assertEqual(Event.objects.get(title='Cup final').max_participants, 22)
+        self.assertEqual(Event.objects.get(title='Matchday 1').participant_count, 2)
+
+    def test_import_invalidates_cached_list(self):
+        url = reverse('event-list')
+        self.assertEqual(self.client.get(url).data['results'], [])
+        self.post(json.dumps(self.record()), 'application/x-ndjson')
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+
+    def test_rejects_other_content_types(self):
+        self.assertEqual(self.post('{}', 'application/json').status_code, 415)
+
+    def test_export(self):
+        event = make_event(self.organizer)
+        make_event(self.organizer, title='Cancelled', is_active=False)
+        event.participants.add(*self.players)
+
+        response = self.client.get(reverse('event-export'))
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:2], ['id', 'title'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][rows[0].index('participant_count')], '2')
+
+        response = self.client.get(reverse('event-export'), {'output': 'ndjson'})
+        records = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([record['title'] for record in records], ['Sunday League'])
+
+    def test_export_streams_under_asgi(self):
+        pulled = []
+
+        def rows():
+            for i in range(EXPORT_CHUNK_SIZE * 3):
+                pulled.append(i)
+                yield (i,)
+
+        async def first_part(response):
+            parts = aiter(response)
+            try:
+                return await anext(parts)
+            finally:
+                await parts.aclose()
+
+        response = streaming_export(('id',), rows(), 'csv', 'rows')
+        self.assertEqual(async_to_sync(first_part)(response), b'id\r\n')
+        # Read a batch at a time, not all of it up front
+        self.assertLessEqual(len(pulled), EXPORT_CHUNK_SIZE)
+
+        async def read_all(response):
+            return b''.join([part async for part in response])
+
+        make_event(self.organizer)
+        response = self.client.get(reverse('event-export'))
+        self.assertEqual(async_to_sync(read_all)(response), b''.join(self.client.get(reverse('event-export'))))
+
+
+class ExplainEventQueriesTests(EventTestCase):
+    @override_settings(ALLOWED_HOSTS=['localhost', '127.0.0.1'])
+    def test_check_runs_with_the_default_allowed_hosts(self):
+        creator = User.objects.create_user(username='host', email='host@example.com')
+        for i in range(3):
+            make_event(creator, title=f'Event {i}')
+        out = StringIO()
+        call_command('explain_event_queries', '--check', stdout=out)
+        self.assertIn('All query shapes use their indexes', out.getvalue())
+
+
+class EventAdminExportTests(EventTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(self.admin)
+        self.players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com') for i in range(3)
+        ]
+
+    def test_export_action_streams_selected_events(self):
+        events = [make_event(self.admin, title=f'Match {i}') for i in range(3)]
+        events[0].participants.add(*self.players)
+        events[1].participants.add(self.players[0])
+
+        with self.assertNumQueries(5):
+            # Session, user, the changelist's two counts and one export query
+            response = self.client.post(reverse('admin:events_event_changelist'), {
+                'action': 'export_events',
+                '_selected_action': [event.pk for event in events[:2]],
+            })
+            self.assertTrue(response.streaming)
+            rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        column = rows[0].index('participant_count')
+        self.assertEqual([(row[1], row[column]) for row in rows[1:]], [('Match 0', '3'), ('Match 1', '1')])
+
+    def test_deactivating_from_a_filtered_changelist_invalidates_the_detail(self):
+        event = make_event(self.admin)
+        url = reverse('event-detail', args=[event.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        self.client.post(reverse('admin:events_event_changelist') + '?is_active__exact=1', {
+            'action': 'deactivate_events',
+            '_selected_action': [event.pk],
+        })
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class ConcurrentParticipationTests(TransactionTestCase):
+    """
+    Burst of simultaneous joins against one event.
+
+    On PostgreSQL the joins run truly concurrently. SQLite allows a single
+    writer, so there they are serialized with a lock, which still exercises
+    the interleaving of check and insert across connections.
+    """
+    capacity = 10
+    joiners = 30
+
+    def test_capacity_is_never_exceeded(self):
+        creator = User.objects.create_user(username='host', email='host@example.com')
+        event = make_event(creator, max_participants=self.capacity)
+        players = [
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@example.com')
+            for i in range(self.joiners)
+        ]
+
+        serialize = threading.Lock() if connection.vendor == 'sqlite' else None
+        barrier = threading.Barrier(self.joiners)
+        results = []
+
+        def join(player):
+            from django.db import connection as thread_connection
+            try:
+                barrier.wait()
+                if serialize:
+                    with serialize:
+                        results.append(join_event(event.pk, player.pk))
+                else:
+                    results.append(join_event(event.pk, player.pk))
+            finally:
+                thread_connection.close()
+
+        threads = [threading.Thread(target=join, args=(player,)) for player in players]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        event.refresh_from_db()
+        self.assertEqual(results.count(JOINED), self.capacity)
+        self.assertEqual(results.count(FULL), self.joiners - self.capacity)
+        self.assertEqual(event.participant_count, self.capacity)
+        self.assertEqual(event.participants.count(), self.capacity)
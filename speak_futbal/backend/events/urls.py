@@ -2,13 +2,24 @@ from django.urls import path
 from .views import (
     EventListView,
     EventDetailView,
+    EventParticipantListView,
     EventParticipateView,
     EventRemoveParticipantView,
+    EventWaitlistView,
+    EventBulkImportView,
+    EventExportView,
 )
+from .streams import cell_stream, event_stream
 
 urlpatterns = [
     path('', EventListView.as_view(), name='event-list'),
+    path('bulk/', EventBulkImportView.as_view(), name='event-bulk-import'),
+    path('export/', EventExportView.as_view(), name='event-export'),
+    path('stream/', cell_stream, name='event-cell-stream'),
     path('<int:pk>/', EventDetailView.as_view(), name='event-detail'),
+    path('<int:pk>/stream/', event_stream, name='event-stream'),
     path('<int:pk>/participate/', EventParticipateView.as_view(), name='event-participate'),
+    path('<int:pk>/participants/', EventParticipantListView.as_view(), name='event-participants'),
+    path('<int:pk>/waitlist/', EventWaitlistView.as_view(), name='event-waitlist'),
     path('<int:event_id>/participants/<int:user_id>/', EventRemoveParticipantView.as_view(), name='event-remove-participant'),
 ] 
\ No newline at end of file
@@ -1,117 +1,349 @@
+import math
+
+from django.http import Http404
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from speak_football.async_views import AsyncReadMixin
 from .models import Event
-from .serializers import EventSerializer, EventListSerializer
+from .serializers import (
+    EventSerializer, EventListSerializer, compiled_event_list_serializer, compiled_event_serializer,
+)
+from .fieldsets import Fieldset
+from .search import EventSearchFilter
+from .cache import acached_response, cached_response, detail_cache_key, list_cache_key, list_params
+from .conditional import (
+    aconditional_response, adetail_validators, conditional_response, detail_validators, list_validators,
+)
+from .geo import MAX_RADIUS_KM
+from .bulk import import_events
+from .exports import CONTENT_TYPES, export_events
+from .participants import (
+    aparticipant_preview, is_participant_annotation, participant_preview, participant_rows,
+    represent as represent_participants,
+)
+from .participation import (
+    FULL, NOT_FOUND, join_event, join_waitlist, leave_event, leave_waitlist, waitlist_position,
+)
 
-class EventListView(generics.ListCreateAPIView):
+class EventListView(AsyncReadMixin, generics.ListCreateAPIView):
     serializer_class = EventSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description', 'location', 'event_type']
+    filter_backends = [EventSearchFilter, filters.OrderingFilter]
     ordering_fields = ['start_date', 'created_at']
 
-    def get_queryset(self):
-        queryset = Event.objects.filter(is_active=True)
-        
-        # Filter by location if coordinates are provided
-        lat = self.request.query_params.get('latitude')
-        lng = self.request.query_params.get('longitude')
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return EventListSerializer
+        return EventSerializer
+
+    def get_nearby_point(self):
+        """
+        Return ``(lat, lng, radius)`` for a nearby search, or None.
+
+        The origin is exact; only the cache key snaps it, see list_params().
+        """
+        lat = self.request.query_params.get('latitude') or self.request.query_params.get('lat')
+        lng = self.request.query_params.get('longitude') or self.request.query_params.get('lng')
         radius = self.request.query_params.get('radius', 10)  # Default 10km radius
-        
-        if lat and lng:
+        if not (lat and lng):
+            return None
+
+        try:
             lat = float(lat)
             lng = float(lng)
             radius = float(radius)
-            lat_range = (lat - radius/111.32, lat + radius/111.32)
-            lng_range = (lng - radius/(111.32 * abs(lat) if lat != 0 else 1), 
-                        lng + radius/(111.32 * abs(lat) if lat != 0 else 1))
-            queryset = queryset.filter(
-                latitude__isnull=False,
-                longitude__isnull=False,
-                latitude__range=lat_range,
-                longitude__range=lng_range
-            )
+        except ValueError:
+            raise ValidationError({'error': 'latitude, longitude and radius must be numbers'})
+        if not all(math.isfinite(value) for value in (lat, lng, radius)):
+            raise ValidationError({'error': 'latitude, longitude and radius must be finite numbers'})
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180 and 0 < radius <= MAX_RADIUS_KM):
+            raise ValidationError({'error': 'Coordinates or radius out of range'})
+        return lat, lng, radius
+
+    def get_queryset(self):
+        queryset = Event.objects.active().for_list()
+        
+        # Restrict to events near a point if coordinates are provided
+        point = self.get_nearby_point()
+        if point:
+            queryset = queryset.nearby(*point)
         
         # Filter by event type
         event_type = self.request.query_params.get('event_type')
         if event_type:
             queryset = queryset.filter(event_type=event_type)
+
+        # Events a user has joined or created
+        for param, lookup in (('participant', 'participants'), ('created_by', 'created_by')):
+            user_id = self.request.query_params.get(param)
+            if user_id:
+                if not user_id.isdigit():
+                    raise ValidationError({'error': f'{param} must be a user id'})
+                queryset = queryset.filter(**{lookup: user_id})
             
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        fieldset = Fieldset(request, EventListSerializer)
+        key = self.list_key(fieldset)
+        etag, last_modified = list_validators(request, key)
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: cached_response(key, lambda: self.list_rows(fieldset)),
+        )
+
+    async def aget(self, request, *args, **kwargs):
+        """``list()`` with the queries made through the async ORM."""
+        fieldset = Fieldset(request, EventListSerializer)
+        key = self.list_key(fieldset)
+        etag, last_modified = list_validators(request, key)
+        return await aconditional_response(
+            request, etag, last_modified,
+            lambda: acached_response(key, lambda: self.alist_rows(fieldset)),
+        )
+
+    def list_key(self, fieldset):
+        return list_cache_key(self.request, list_params(self.request, self.get_nearby_point(), fieldset.key))
+
+    def list_values(self, serializer):
+        """
+        The filtered queryset as ``.values()`` rows for ``serializer``, a
+        compiled EventListSerializer. Only the columns of its fields are
+        selected.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        # The id for expansions; annotations and the ordering columns ride
+        # along for the cursor
+        fields = ['id', *serializer.sources, *queryset.query.annotations]
+        if self.paginator is not None:
+            fields += [name for name, _ in self.paginator.get_ordering(queryset)]
+        return queryset.values(*dict.fromkeys(fields))
+
+    def list_rows(self, fieldset):
+        """
+        ``ListAPIView.list()`` over ``.values()`` rows and the compiled
+        EventListSerializer, with no model instances built.
+        """
+        serializer = compiled_event_list_serializer(fieldset.fields)
+        rows = self.list_values(serializer)
+        if self.paginator is None:
+            rows = list(rows)
+        else:
+            rows = self.paginate_queryset(rows)
+        data = fieldset.expand_into(serializer.represent_many(rows), [row['id'] for row in rows])
+        return self.list_response(data)
+
+    async def alist_rows(self, fieldset):
+        serializer = compiled_event_list_serializer(fieldset.fields)
+        rows = self.list_values(serializer)
+        if self.paginator is None:
+            rows = [row async for row in rows.aiterator()]
+        else:
+            rows = await self.paginator.apaginate_queryset(rows, self.request, view=self)
+        data = await fieldset.aexpand_into(serializer.represent_many(rows), [row['id'] for row in rows])
+        return self.list_response(data)
+
+    def list_response(self, data):
+        if self.paginator is None:
+            return Response(data)
+        return self.get_paginated_response(data)
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
-class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.filter(is_active=True)
+class EventDetailView(AsyncReadMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Event.objects.active().for_detail()
     serializer_class = EventSerializer
     permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
 
+    def retrieve(self, request, *args, **kwargs):
+        pk = kwargs['pk']
+        fieldset = Fieldset(request, EventSerializer)
+        etag, last_modified = detail_validators(request, pk, fieldset.key)
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: cached_response(detail_cache_key(pk, fieldset.key), lambda: self.retrieve_row(pk, fieldset)),
+        )
+
+    async def aget(self, request, *args, **kwargs):
+        """``retrieve()`` with the queries made through the async ORM."""
+        pk = kwargs['pk']
+        fieldset = Fieldset(request, EventSerializer)
+        etag, last_modified = await adetail_validators(request, pk, fieldset.key)
+        return await aconditional_response(
+            request, etag, last_modified,
+            lambda: acached_response(detail_cache_key(pk, fieldset.key), lambda: self.aretrieve_row(pk, fieldset)),
+        )
+
+    def retrieve_row(self, pk, fieldset):
+        """
+        The event from one ``.values()`` row and the compiled EventSerializer.
+        Participants are only loaded with ``?expand=participants``.
+        """
+        serializer = compiled_event_serializer(fieldset.fields)
+        try:
+            row = Event.objects.active().values(*serializer.sources).get(pk=pk)
+        except Event.DoesNotExist:
+            raise Http404('No Event matches the given query.')
+        if fieldset.includes('participants_preview'):
+            row['participants_preview'] = participant_preview(pk)
+        return Response(fieldset.expand_into([serializer.represent(row)], [pk])[0])
+
+    async def aretrieve_row(self, pk, fieldset):
+        serializer = compiled_event_serializer(fieldset.fields)
+        try:
+            row = await Event.objects.active().values(*serializer.sources).aget(pk=pk)
+        except Event.DoesNotExist:
+            raise Http404('No Event matches the given query.')
+        if fieldset.includes('participants_preview'):
+            row['participants_preview'] = await aparticipant_preview(pk)
+        return Response((await fieldset.aexpand_into([serializer.represent(row)], [pk]))[0])
+
     def perform_update(self, serializer):
         serializer.save(created_by=self.request.user)
 
+class EventParticipantListView(generics.ListAPIView):
+    """
+    An event's participants in the order they joined, keyset-paginated,
+    with ``?name=`` matching usernames and first or last names. The page
+    says whether the requesting user is a participant.
+    """
+    permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
+
+    def list(self, request, pk):
+        # One query for both: None when there is no such active event
+        is_participant = (
+            Event.objects.active().filter(pk=pk)
+            .annotate(is_participant=is_participant_annotation(request.user.pk))
+            .values_list('is_participant', flat=True)
+            .first()
+        )
+        if is_participant is None:
+            return Response(
+                {'error': 'Event not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        rows = self.paginate_queryset(participant_rows([pk], name=request.query_params.get('name')))
+        response = self.get_paginated_response(represent_participants(rows))
+        response.data['is_participant'] = is_participant
+        return response
+
 class EventParticipateView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def post(self, request, pk):
-        try:
-            event = Event.objects.get(pk=pk, is_active=True)
-            
-            # Check if event is full
-            if event.max_participants and event.participants.count() >= event.max_participants:
-                return Response(
-                    {'error': 'Event is full'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Add user to participants
-            event.participants.add(request.user)
-            return Response(status=status.HTTP_200_OK)
-            
-        except Event.DoesNotExist:
+        result = join_event(pk, request.user.pk)
+
+        if result == NOT_FOUND:
             return Response(
                 {'error': 'Event not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        if result == FULL:
+            # Queue the user instead of rejecting, so clients wait for a
+            # promotion rather than retrying the join
+            position = join_waitlist(pk, request.user.pk)
+            if position is None:
+                # A slot opened up meanwhile and the user was promoted
+                return Response(status=status.HTTP_200_OK)
+            return Response(
+                {'status': 'waitlisted', 'position': position},
+                status=status.HTTP_202_ACCEPTED
+            )
+        return Response(status=status.HTTP_200_OK)
 
     def delete(self, request, pk):
-        try:
-            event = Event.objects.get(pk=pk, is_active=True)
-            event.participants.remove(request.user)
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Event.DoesNotExist:
+        if not Event.objects.active().filter(pk=pk).exists():
             return Response(
                 {'error': 'Event not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        if not leave_event(pk, request.user.pk):
+            leave_waitlist(pk, request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class EventWaitlistView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, pk):
+        position = waitlist_position(pk, request.user.pk)
+        if position is None:
+            return Response(
+                {'error': 'Not on the waitlist'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({'position': position})
+
+    def delete(self, request, pk):
+        if not leave_waitlist(pk, request.user.pk):
+            return Response(
+                {'error': 'Not on the waitlist'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 class EventRemoveParticipantView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def delete(self, request, event_id, user_id):
         try:
-            event = Event.objects.get(pk=event_id, is_active=True)
+            event = Event.objects.only('id', 'created_by_id').get(pk=event_id, is_active=True)
         except Event.DoesNotExist:
             
             return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
 
         # Only the creator can remove participants
-        if event.created_by != request.user:
+        if event.created_by_id != request.user.id:
             return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
 
         # Don't allow removing the creator
-        if user_id == event.created_by.id:
+        if user_id == event.created_by_id:
             return Response({'error': 'Cannot remove event creator'}, status=status.HTTP_400_BAD_REQUEST)
         
-        participant = event.participants.filter(id=user_id).first()
-        
-        if not participant:
+        if not leave_event(event_id, user_id):
             
             return Response({'error': 'Participant not found'}, status=status.HTTP_404_NOT_FOUND)
-
-        event.participants.remove(participant)
             
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+class EventBulkImportView(APIView):
+    """
+    Create events from an NDJSON (application/x-ndjson) or CSV (text/csv) body.
+
+    The body is read from the request stream in chunks rather than parsed
+    up front, so uploads of any size run in constant memory.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type not in CONTENT_TYPES.values():
+            return Response(
+                {'error': 'Send application/x-ndjson or text/csv'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+        result = import_events(request.stream or [], content_type, request.user)
+        return Response(
+            result,
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        )
+
+class EventExportView(APIView):
+    """Stream active events as ?output=csv (default) or ?output=ndjson."""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in CONTENT_TYPES:
+            return Response(
+                {'error': 'output must be csv or ndjson'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = Event.objects.active()
+        event_type = request.query_params.get('event_type')
+        if event_type:
+            queryset = queryset.filter(event_type=event_type)
+        return export_events(queryset, output)
@@ -4,13 +4,15 @@ from django.utils.html import format_html
 from django.urls import path, reverse
 from django.shortcuts import redirect
 from django.contrib import messages
-from django.db.models import Count
+from django.db.models import F
 from django.utils import timezone
 from datetime import timedelta
 
 # Import your models
 from events.models import Event
 from users.models import CustomUser
+from stats.models import EventTypeStats, MonthlyStats
+from stats.rollups import dashboard_totals
 
 class SpeakFootballAdminSite(AdminSite):
     site_header = "Speak Football Administration"
@@ -26,42 +28,26 @@ class SpeakFootballAdminSite(AdminSite):
         return custom_urls + urls
     
     def dashboard_view(self, request):
-        # Get quick statistics
-        total_users = CustomUser.objects.count()
-        total_events = Event.objects.count()
-        active_events = Event.objects.filter(is_active=True).count()
-        recent_events = Event.objects.filter(
-            start_date__gte=timezone.now() - timedelta(days=7)
-        ).count()
-        
-        context = {
-            'total_users': total_users,
-            'total_events': total_events,
-            'active_events': active_events,
-            'recent_events': recent_events,
-            'opts': self._registry[CustomUser]._meta,
-        }
+        # Read from the stats rollups rather than counting the tables
+        context = dict(dashboard_totals(), opts=CustomUser._meta)
         return self.index(request, context)
     
     def quick_stats_view(self, request):
-        # Get detailed statistics
         stats = {
-            'users_by_month': CustomUser.objects.extra(
-                select={'month': "EXTRACT(month FROM date_joined)"}
-            ).values('month').annotate(count=Count('id')).order_by('month'),
+            'users_by_month': MonthlyStats.objects.values('month', count=F('users_joined')).order_by('month'),
             
-            'events_by_type': Event.objects.values('event_type').annotate(
-                count=Count('id')
-            ).order_by('event_type'),
+            'events_by_type': EventTypeStats.objects.values('event_type', count=F('events')).order_by('event_type'),
             
-            'top_event_creators': CustomUser.objects.annotate(
-                event_count=Count('created_events')
-            ).filter(event_count__gt=0).order_by('-event_count')[:10],
+            'top_event_creators': CustomUser.objects.filter(
+                creator_stats__events_created__gt=0
+            ).annotate(
+                event_count=F('creator_stats__events_created')
+            ).order_by('-event_count')[:10],
         }
         
         context = {
             'stats': stats,
-            'opts': self._registry[CustomUser]._meta,
+            'opts': CustomUser._meta,
         }
         return self.index(request, context)
 
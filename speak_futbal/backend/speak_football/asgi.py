@@ -2,6 +2,12 @@
 ASGI config for speak_football project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The live update streams in events.streams are async views that hold their
+connection open, and need this entry point rather than WSGI. The Procfile
+serves speak_football.wsgi; to serve this instead, with the async event
+reads, run
+
+    ASYNC_READ_VIEWS=1 gunicorn speak_football.asgi:application -k uvicorn_worker.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +18,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'speak_football.settings')
+# Django runs each ASGI request's sync code on a thread of its own, so a
+# persistent connection would never be reused, only left open
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
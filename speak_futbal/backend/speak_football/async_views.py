@@ -0,0 +1,60 @@
+"""
+Async reads for DRF views.
+
+DRF's request cycle is synchronous, so under ASGI Django runs every DRF
+view on a single shared thread. ``AsyncReadMixin`` lets a view serve GET
+and HEAD from an ``async def aget()`` instead: the DRF cycle around it
+(content negotiation, permissions, exception handling, response
+finalization) is CPU-only and runs on the event loop, and the handler does
+its queries with the async ORM.
+
+Other methods still go to the sync view, on a worker thread. With
+``ASYNC_READ_VIEWS`` off, the default, ``as_view()`` returns the plain sync
+view and ``aget()`` is never used.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+
+
+class AsyncReadMixin:
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = super().as_view(**initkwargs)
+        if not settings.ASYNC_READ_VIEWS:
+            return sync_view
+        write_view = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return await write_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.adispatch(request, *args, **kwargs)
+
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.login_required = False
+        return csrf_exempt(view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``APIView.dispatch()`` for reads, awaiting ``aget()``."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            if 'HTTP_AUTHORIZATION' in request.META or settings.SESSION_COOKIE_NAME in request.COOKIES:
+                # Authenticate up front on a thread: a token or session lookup
+                # is sync I/O. Without credentials it is CPU-only
+                await sync_to_async(lambda: request.user)()
+            self.initial(request, *args, **kwargs)
+            response = await self.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
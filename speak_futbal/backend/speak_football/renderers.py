@@ -0,0 +1,31 @@
+"""
+JSON rendering with orjson.
+
+A drop-in for DRF's JSONRenderer on its default compact, UTF-8 path. The
+output is the same for the types DRF's encoder handles, produced several
+times faster on large payloads. Anything orjson doesn't serialize natively
+(Decimal, lazy strings, UUIDs, querysets) goes through DRF's own encoder.
+Indented output, asked for with ``; indent=`` in the Accept header or by
+the browsable API, and non-default UNICODE_JSON/COMPACT_JSON settings fall
+back to the stdlib renderer.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_default, option=OPTIONS)
+        # Escaped as JSONRenderer does, so the output is also valid JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
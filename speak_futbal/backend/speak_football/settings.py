@@ -62,18 +62,20 @@ INSTALLED_APPS = [
     # Local apps
     'events',
     'users',
+    'stats',
     
 ]
 SITE_ID = 1
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'speak_football.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.AnonymousFastPathMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -128,11 +130,83 @@ WSGI_APPLICATION = 'speak_football.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=f'sqlite:///{BASE_DIR / "db.sqlite3"}',
-        conn_max_age=600,
+        conn_max_age=int(os.getenv('CONN_MAX_AGE', '600')),
         conn_health_checks=True,
     )
 }
 
+# Caches
+# The events API response cache defaults to local memory; point
+# EVENTS_CACHE_URL at Redis (redis://host:6379/0) to share it between workers.
+
+EVENTS_CACHE_URL = os.getenv('EVENTS_CACHE_URL', '')
+# Token auth and the auth throttles need a cache every worker shares; point
+# AUTH_CACHE_URL at Redis for it
+AUTH_CACHE_URL = os.getenv('AUTH_CACHE_URL', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'events': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': EVENTS_CACHE_URL,
+        'KEY_PREFIX': 'speak_football',
+    } if EVENTS_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'events',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+if AUTH_CACHE_URL:
+    CACHES['auth'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': AUTH_CACHE_URL,
+        'KEY_PREFIX': 'speak_football',
+    }
+
+EVENTS_CACHE_ALIAS = 'events'
+EVENTS_CACHE_TIMEOUT = int(os.getenv('EVENTS_CACHE_TIMEOUT', '300'))
+EVENTS_CACHE_METRICS = True
+
+# Live updates streamed to /api/events/<pk>/stream/ and /api/events/stream/.
+# The in-process broker only reaches clients of the same process; point
+# EVENTS_LIVE_URL at Redis to fan out between workers.
+EVENTS_LIVE_URL = os.getenv('EVENTS_LIVE_URL', '')
+EVENTS_LIVE_BROKER = 'events.live.RedisBroker' if EVENTS_LIVE_URL else 'events.live.InProcessBroker'
+EVENTS_LIVE_HEARTBEAT = 15
+
+# Google sign-in
+GOOGLE_USERINFO_URL = os.getenv('GOOGLE_USERINFO_URL', 'https://www.googleapis.com/oauth2/v3/userinfo')
+# ID tokens are verified offline against these keys; their audience must be
+# GOOGLE_CLIENT_ID, and id_token sign-in is off while it is unset
+GOOGLE_JWKS_URL = os.getenv('GOOGLE_JWKS_URL', 'https://www.googleapis.com/oauth2/v3/certs')
+GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID', '')
+GOOGLE_HTTP_TIMEOUT = (3.05, 5)  # connect, read (seconds)
+GOOGLE_HTTP_RETRIES = 2
+GOOGLE_HTTP_POOL_SIZE = 32
+# Verified userinfo is cached under a hash of the access token. With
+# AUTH_CACHE_URL the signing keys and userinfo are shared by every worker
+GOOGLE_USERINFO_CACHE_TIMEOUT = 60
+GOOGLE_AUTH_CACHE_ALIAS = 'auth' if AUTH_CACHE_URL else 'default'
+
+# Token authentication: resolved users are cached in a per-process LRU,
+# backed by the shared auth cache when AUTH_CACHE_URL is set. Revocations
+# reach other processes' LRUs within the local timeout, so keep it short
+TOKEN_AUTH_CACHE_ALIAS = 'auth' if AUTH_CACHE_URL else None
+TOKEN_AUTH_CACHE_TIMEOUT = 300
+TOKEN_AUTH_LOCAL_TIMEOUT = 10
+TOKEN_AUTH_LRU_SIZE = 1024
+
+# Token buckets for login/, register/ and google-login/ (users.throttling):
+# 'N/period' holds N tokens, refilled at N per period. Without AUTH_CACHE_URL
+# each worker keeps its own buckets, multiplying the limits
+AUTH_THROTTLE_CACHE_ALIAS = 'auth' if AUTH_CACHE_URL else 'default'
+AUTH_THROTTLE_RATES = {
+    'auth_ip': os.getenv('AUTH_THROTTLE_IP_RATE', '20/min'),
+    'login_username': os.getenv('AUTH_THROTTLE_USERNAME_RATE', '5/min'),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -181,7 +255,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:3000').split(',')
 
 CORS_ALLOW_CREDENTIALS = True
-CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken']
+CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken', 'ETag']
 
 # CSRF settings
 CSRF_COOKIE_SECURE = True
@@ -201,18 +275,52 @@ if not DEBUG:
     SESSION_COOKIE_SAMESITE = 'None'
     SESSION_COOKIE_SECURE = True
 
-# REST Framework settings
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',  
+# Authentication profiles, picked per view with
+# users.authentication.authentication_profile(). The JSON API is token-only;
+# session auth is only for the browsable API, and Basic (a full password
+# hash per request) has to be opted into explicitly.
+AUTHENTICATION_PROFILES = {
+    'api': [
+        'users.authentication.CachedTokenAuthentication',
+    ],
+    'browsable': [
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
+    ],
+    'basic': [
+        'users.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    'none': [],
+}
+
+# Anonymous GETs to these URL names skip authentication entirely
+# (users.middleware.AnonymousFastPathMiddleware)
+ANONYMOUS_FAST_PATH_URLS = ['event-list']
+
+# REST Framework settings
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': AUTHENTICATION_PROFILES['browsable' if DEBUG else 'api'],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'speak_football.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'events.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # Client addresses for throttling come from the X-Forwarded-For entry
+    # added by this many proxies (Railway's edge), not from what the client
+    # sends; set NUM_PROXIES=0 when nothing is in front of the app
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
 }
 
+# Serve reads of the events API from async views (speak_football.async_views).
+# Opt-in, for deployments on speak_football.asgi; under WSGI they only add
+# overhead, and `manage.py bench_event_reads` compares the two setups
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', '0') == '1'
+
 # Custom user model
 AUTH_USER_MODEL = 'users.CustomUser'
 
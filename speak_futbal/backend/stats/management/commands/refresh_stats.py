@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from stats.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the dashboard statistics rollups from the users and events tables. '
+        'Run periodically to correct drift from writes that bypassed signals'
+    )
+
+    def handle(self, *args, **options):
+        written = rebuild()
+        summary = ', '.join(f'{count} {table}' for table, count in written.items())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {summary}'))
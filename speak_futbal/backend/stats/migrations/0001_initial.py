@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('users_joined', models.IntegerField(default=0)),
+                ('events_created', models.IntegerField(default=0)),
+                ('events_starting', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'daily stats',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EventTypeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(max_length=20, unique=True)),
+                ('events', models.IntegerField(default=0)),
+                ('active_events', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'event type stats',
+                'ordering': ['event_type'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('users_joined', models.IntegerField(default=0)),
+                ('events_created', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'monthly stats',
+                'ordering': ['month'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CreatorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='creator_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('events_created', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'creator stats',
+                'indexes': [models.Index(fields=['-events_created'], name='creator_stats_events_idx')],
+            },
+        ),
+    ]
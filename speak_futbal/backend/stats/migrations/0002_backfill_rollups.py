@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.db import migrations
+
+from stats.rollups import rebuild
+
+
+def backfill_rollups(apps, schema_editor):
+    # Existing users and events were created before the signals kept the
+    # rollups; without this the dashboard starts from zero
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0001_initial'),
+        ('events', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
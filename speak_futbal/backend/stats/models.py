@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import models
+
+
+class DailyStats(models.Model):
+    date = models.DateField(unique=True)
+    users_joined = models.IntegerField(default=0)
+    events_created = models.IntegerField(default=0)
+    # Bucketed by start_date, for "recent and upcoming" counts
+    events_starting = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name_plural = 'daily stats'
+
+    def __str__(self):
+        return f'{self.date}'
+
+
+class MonthlyStats(models.Model):
+    # First day of the month
+    month = models.DateField(unique=True)
+    users_joined = models.IntegerField(default=0)
+    events_created = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['month']
+        verbose_name_plural = 'monthly stats'
+
+    def __str__(self):
+        return self.month.strftime('%Y-%m')
+
+
+class EventTypeStats(models.Model):
+    event_type = models.CharField(max_length=20, unique=True)
+    events = models.IntegerField(default=0)
+    active_events = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['event_type']
+        verbose_name_plural = 'event type stats'
+
+    def __str__(self):
+        return self.event_type
+
+
+class CreatorStats(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='creator_stats',
+    )
+    events_created = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-events_created'], name='creator_stats_events_idx'),
+        ]
+        verbose_name_plural = 'creator stats'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.events_created}'
@@ -0,0 +1,229 @@
+"""
+Incremental statistics for the admin dashboard.
+
+Rollup rows are bumped with ``F()`` updates as users and events are created,
+changed and deleted (see stats.signals), so the dashboard reads a handful
+of small rows instead of counting the users and events tables. Writes that
+bypass model signals call the ``record_*`` functions themselves; anything
+else that drifts is put right by the ``refresh_stats`` command.
+
+Inside ``deferred()`` bumps are summed in memory and written once on exit,
+which turns a bulk import or delete into a few UPDATEs instead of several
+per row.
+"""
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from events.models import Event
+
+from .models import CreatorStats, DailyStats, EventTypeStats, MonthlyStats
+
+# Event fields the rollups depend on; compared before and after a save
+EVENT_FIELDS = ('created_at', 'start_date', 'event_type', 'is_active', 'created_by_id')
+
+User = get_user_model()
+
+_local = threading.local()
+
+
+def _day(value):
+    return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+
+
+def _month(day):
+    return day.replace(day=1)
+
+
+def _bump(model, lookup, counts):
+    counts = {field: delta for field, delta in counts.items() if delta}
+    if not counts:
+        return
+    changes = {field: F(field) + delta for field, delta in counts.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    # Only increments create rows; a decrement with nothing to apply to is
+    # drift for refresh_stats, and the row's user may be mid-deletion
+    if not any(delta > 0 for delta in counts.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **counts)
+    except IntegrityError:
+        # Created concurrently
+        model.objects.filter(**lookup).update(**changes)
+
+
+class _Deltas:
+    def __init__(self):
+        self.rows = defaultdict(Counter)
+
+    def add(self, model, lookup, **counts):
+        self.rows[model, tuple(lookup.items())].update(counts)
+
+    def apply(self):
+        for (model, lookup), counts in self.rows.items():
+            _bump(model, dict(lookup), counts)
+
+
+def _add(model, lookup, **counts):
+    deltas = getattr(_local, 'deltas', None)
+    if deltas is not None:
+        deltas.add(model, lookup, **counts)
+    else:
+        _bump(model, lookup, counts)
+
+
+@contextmanager
+def deferred():
+    """Collect rollup changes and write them once, on successful exit."""
+    if getattr(_local, 'deltas', None) is not None:
+        # Nested; the outermost block writes
+        yield
+        return
+    _local.deltas = _Deltas()
+    try:
+        yield
+        deltas = _local.deltas
+    finally:
+        _local.deltas = None
+    deltas.apply()
+
+
+def event_snapshot(event):
+    return {name: getattr(event, name) for name in EVENT_FIELDS}
+
+
+def record_event(snapshot, sign=1):
+    """Add (``sign=1``) or remove (``sign=-1``) one event described by ``snapshot``."""
+    created = _day(snapshot['created_at'])
+    _add(DailyStats, {'date': created}, events_created=sign)
+    _add(DailyStats, {'date': _day(snapshot['start_date'])}, events_starting=sign)
+    _add(MonthlyStats, {'month': _month(created)}, events_created=sign)
+    _add(
+        EventTypeStats,
+        {'event_type': snapshot['event_type']},
+        events=sign,
+        active_events=sign if snapshot['is_active'] else 0,
+    )
+    _add(CreatorStats, {'user_id': snapshot['created_by_id']}, events_created=sign)
+
+
+def record_events(events, sign=1):
+    """For events written without model signals, e.g. by ``bulk_create``."""
+    with deferred():
+        for event in events:
+            record_event(event_snapshot(event), sign)
+
+
+def record_user(user, sign=1):
+    joined = _day(user.date_joined)
+    _add(DailyStats, {'date': joined}, users_joined=sign)
+    _add(MonthlyStats, {'month': _month(joined)}, users_joined=sign)
+
+
+def record_users(users, sign=1):
+    with deferred():
+        for user in users:
+            record_user(user, sign)
+
+
+def record_active_change(queryset, is_active):
+    """
+    Account for ``queryset.update(is_active=...)``; call it just before the update.
+    """
+    changing = (
+        queryset.exclude(is_active=is_active)
+        .order_by()
+        .values('event_type')
+        .annotate(count=Count('id'))
+    )
+    sign = 1 if is_active else -1
+    with deferred():
+        for row in changing:
+            _add(EventTypeStats, {'event_type': row['event_type']}, active_events=sign * row['count'])
+
+
+def dashboard_totals():
+    """The dashboard's headline numbers, from rollup rows only."""
+    events = EventTypeStats.objects.aggregate(
+        total=Coalesce(Sum('events'), 0),
+        active=Coalesce(Sum('active_events'), 0),
+    )
+    since = timezone.localdate() - timedelta(days=7)
+    return {
+        'total_users': MonthlyStats.objects.aggregate(total=Coalesce(Sum('users_joined'), 0))['total'],
+        'total_events': events['total'],
+        'active_events': events['active'],
+        # Whole days, so "within the last week" starts at local midnight
+        'recent_events': DailyStats.objects.filter(date__gte=since).aggregate(
+            total=Coalesce(Sum('events_starting'), 0)
+        )['total'],
+    }
+
+
+def _per_day(queryset, field):
+    rows = queryset.annotate(day=TruncDate(field)).order_by().values('day').annotate(count=Count('pk'))
+    return {row['day']: row['count'] for row in rows}
+
+
+@transaction.atomic
+def rebuild(apps=global_apps):
+    """
+    Recompute every rollup table from the users and events tables.
+
+    Returns the number of rows written per table. Migrations pass their
+    ``apps`` to rebuild with historical models.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Event = apps.get_model('events', 'Event')
+    DailyStats = apps.get_model('stats', 'DailyStats')
+    MonthlyStats = apps.get_model('stats', 'MonthlyStats')
+    EventTypeStats = apps.get_model('stats', 'EventTypeStats')
+    CreatorStats = apps.get_model('stats', 'CreatorStats')
+    columns = {
+        'users_joined': _per_day(User.objects.all(), 'date_joined'),
+        'events_created': _per_day(Event.objects.all(), 'created_at'),
+        'events_starting': _per_day(Event.objects.all(), 'start_date'),
+    }
+    days = defaultdict(Counter)
+    months = defaultdict(Counter)
+    for column, counts in columns.items():
+        for day, count in counts.items():
+            days[day][column] += count
+            if column != 'events_starting':
+                months[_month(day)][column] += count
+
+    event_types = (
+        Event.objects.order_by()
+        .values('event_type')
+        .annotate(events=Count('id'), active_events=Count('id', filter=Q(is_active=True)))
+    )
+    creators = (
+        Event.objects.order_by()
+        .values('created_by_id')
+        .annotate(events_created=Count('id'))
+    )
+
+    tables = {
+        DailyStats: [DailyStats(date=day, **counts) for day, counts in days.items()],
+        MonthlyStats: [MonthlyStats(month=month, **counts) for month, counts in months.items()],
+        EventTypeStats: [EventTypeStats(**row) for row in event_types],
+        CreatorStats: [
+            CreatorStats(user_id=row['created_by_id'], events_created=row['events_created'])
+            for row in creators
+        ],
+    }
+    for model, rows in tables.items():
+        model.objects.all().delete()
+        model.objects.bulk_create(rows, batch_size=1000)
+    return {model._meta.verbose_name_plural: len(rows) for model, rows in tables.items()}
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from events.models import Event
+
+from .rollups import EVENT_FIELDS, deferred, event_snapshot, record_event, record_user
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_stats(sender, instance, raw=False, update_fields=None, **kwargs):
+    # The stored values, to move counts between buckets when they change
+    instance._stats_snapshot = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(EVENT_FIELDS):
+        return
+    instance._stats_snapshot = Event.objects.filter(pk=instance.pk).values(*EVENT_FIELDS).first()
+
+
+@receiver(post_save, sender=Event)
+def update_event_stats(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        record_event(event_snapshot(instance))
+        return
+    previous = getattr(instance, '_stats_snapshot', None)
+    current = event_snapshot(instance)
+    if previous is not None and previous != current:
+        # Deferred, so buckets that didn't change net out to no write
+        with deferred():
+            record_event(previous, -1)
+            record_event(current)
+
+
+@receiver(post_delete, sender=Event)
+def remove_event_stats(sender, instance, **kwargs):
+    record_event(event_snapshot(instance), -1)
+
+
+@receiver(post_save, sender=User)
+def update_user_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_stats(sender, instance, **kwargs):
+    record_user(instance, -1)
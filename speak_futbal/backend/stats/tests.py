@@ -0,0 +1,166 @@
+import json
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Event
+from events.testing import make_event
+from speak_football.admin import admin_site
+
+from .models import CreatorStats, DailyStats, EventTypeStats, MonthlyStats
+from .rollups import dashboard_totals, deferred
+
+User = get_user_model()
+
+
+def snapshot():
+    """Every rollup row, for comparing incremental updates with a rebuild."""
+    return {
+        'daily': list(DailyStats.objects.exclude(
+            users_joined=0, events_created=0, events_starting=0
+        ).values_list('date', 'users_joined', 'events_created', 'events_starting')),
+        'monthly': list(MonthlyStats.objects.exclude(
+            users_joined=0, events_created=0
+        ).values_list('month', 'users_joined', 'events_created')),
+        'types': list(EventTypeStats.objects.exclude(events=0).values_list('event_type', 'events', 'active_events')),
+        'creators': list(CreatorStats.objects.exclude(events_created=0).order_by('user').values_list(
+            'user', 'events_created'
+        )),
+    }
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username='organizer', email='organizer@example.com')
+        self.player = User.objects.create_user(username='player', email='player@example.com')
+
+    def assertMatchesRebuild(self):
+        incremental = snapshot()
+        call_command('refresh_stats', stdout=StringIO())
+        self.assertEqual(incremental, snapshot())
+
+    def test_totals_follow_creates_and_deletes(self):
+        make_event(self.organizer)
+        make_event(self.organizer, event_type='training', is_active=False)
+        past = make_event(self.organizer, start_date=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(dashboard_totals(), {
+            'total_users': 2, 'total_events': 3, 'active_events': 2, 'recent_events': 2,
+        })
+        self.assertEqual(CreatorStats.objects.get(user=self.organizer).events_created, 3)
+
+        past.delete()
+        self.player.delete()
+        self.assertEqual(dashboard_totals()['total_events'], 2)
+        self.assertEqual(dashboard_totals()['total_users'], 1)
+        self.assertMatchesRebuild()
+
+    def test_changes_move_counts_between_buckets(self):
+        event = make_event(self.organizer)
+        event.event_type = 'tournament'
+        event.is_active = False
+        event.start_date -= timedelta(days=60)
+        event.save()
+
+        types = dict(EventTypeStats.objects.values_list('event_type', 'active_events'))
+        self.assertEqual(types, {'match': 0, 'tournament': 0})
+        self.assertEqual(dashboard_totals()['recent_events'], 0)
+        self.assertMatchesRebuild()
+
+    def test_saves_that_change_nothing_counted_skip_the_rollups(self):
+        event = make_event(self.organizer)
+        event.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            event.save()
+        self.assertFalse([query for query in queries if 'stats_' in query['sql']])
+
+    def test_deferred_writes_each_row_once(self):
+        events = [make_event(self.organizer, title=f'Match {i}') for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            with deferred():
+                Event.objects.filter(pk__in=[event.pk for event in events]).delete()
+        # Two daily rows (created, starting), one each of monthly, type and creator
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "stats_')]), 5)
+        self.assertEqual(dashboard_totals()['total_events'], 0)
+
+    def test_admin_bulk_activation(self):
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(admin)
+        events = [make_event(self.organizer, title=f'Match {i}') for i in range(3)]
+        self.client.post(reverse('admin:events_event_changelist'), {
+            'action': 'deactivate_events',
+            '_selected_action': [event.pk for event in events[:2]],
+        })
+        self.assertEqual(dashboard_totals()['active_events'], 1)
+        self.assertMatchesRebuild()
+
+    def test_bulk_import_is_recorded(self):
+        start = timezone.now() + timedelta(days=2)
+        record = {
+            'title': 'Imported', 'description': 'Match', 'event_type': 'match', 'location': 'Tundikhel',
+            'latitude': 27.7, 'longitude': 85.3, 'start_date': start.isoformat(),
+            'end_date': (start + timedelta(hours=2)).isoformat(),
+        }
+        self.client.force_login(self.organizer)
+        body = '\n'.join(json.dumps(dict(record, title=f'Imported {i}')) for i in range(3))
+        self.client.post(reverse('event-bulk-import'), body, content_type='application/x-ndjson')
+        self.assertEqual(dashboard_totals()['total_events'], 3)
+        self.assertMatchesRebuild()
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        for i in range(3):
+            make_event(self.admin, title=f'Match {i}', event_type='match' if i else 'training')
+        self.factory = RequestFactory()
+
+    def request(self, view):
+        request = self.factory.get('/')
+        request.user = self.admin
+        return view(request)
+
+    def test_dashboard_reads_rollups_only(self):
+        with self.assertNumQueries(3):
+            response = self.request(admin_site.dashboard_view)
+        self.assertEqual(response.context_data['total_events'], 3)
+        self.assertEqual(response.context_data['total_users'], 1)
+
+    def test_quick_stats_runs_on_any_database(self):
+        stats = self.request(admin_site.quick_stats_view).context_data['stats']
+        self.assertEqual(
+            list(stats['events_by_type']),
+            [{'event_type': 'match', 'count': 2}, {'event_type': 'training', 'count': 1}],
+        )
+        self.assertEqual([row['count'] for row in stats['users_by_month']], [1])
+        self.assertEqual([(user.username, user.event_count) for user in stats['top_event_creators']], [('admin', 3)])
+
+
+class BackfillMigrationTests(TransactionTestCase):
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('stats', target)])
+
+    def test_existing_users_and_events_are_counted(self):
+        self.migrate('0001_initial')
+        organizer = User.objects.create_user(username='organizer', email='organizer@example.com')
+        make_event(organizer)
+        make_event(organizer, event_type='training', is_active=False)
+        # As on a deployment whose rows predate the rollups
+        for model in (DailyStats, MonthlyStats, EventTypeStats, CreatorStats):
+            model.objects.all().delete()
+        self.assertEqual(dashboard_totals()['total_events'], 0)
+
+        self.migrate('0002_backfill_rollups')
+        self.assertEqual(dashboard_totals(), {
+            'total_users': 1, 'total_events': 2, 'active_events': 1, 'recent_events': 2,
+        })
+        self.assertEqual(CreatorStats.objects.get(user=organizer).events_created, 2)
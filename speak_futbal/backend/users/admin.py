@@ -5,7 +5,9 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils import timezone
 from datetime import timedelta
-from .models import CustomUser
+from .models import CustomUser, with_event_counts
+from .authentication import invalidate_user_tokens
+from . import exports
 
 class UserActivityFilter(admin.SimpleListFilter):
     title = 'User Activity'
@@ -102,11 +104,9 @@ class CustomUserAdmin(BaseUserAdmin):
     
     actions = ['activate_users', 'deactivate_users', 'make_staff', 'remove_staff', 'export_users', 'send_welcome_email']
     
+    @admin.display(description='Events', ordering='created_event_count')
     def event_count(self, obj):
-        created_count = obj.created_events.count()
-        participated_count = obj.participated_events.count()
-        return f"{created_count} created, {participated_count} participated"
-    event_count.short_description = 'Events'
+        return f"{obj.created_event_count} created, {obj.participated_event_count} participated"
     
     def location_link(self, obj):
         if obj.latitude and obj.longitude:
@@ -116,28 +116,43 @@ class CustomUserAdmin(BaseUserAdmin):
     location_link.short_description = 'Map Link'
     
     def activate_users(self, request, queryset):
+        # Taken before the update: under a is_active filter the queryset
+        # no longer matches the users afterwards
+        pks = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=True)
+        invalidate_user_tokens(pks)
         self.message_user(request, f'{updated} users have been activated.')
     activate_users.short_description = "Activate selected users"
     
     def deactivate_users(self, request, queryset):
+        # Taken before the update: under a is_active filter the queryset
+        # no longer matches the users afterwards
+        pks = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=False)
+        invalidate_user_tokens(pks)
         self.message_user(request, f'{updated} users have been deactivated.')
     deactivate_users.short_description = "Deactivate selected users"
     
     def make_staff(self, request, queryset):
+        # Taken before the update: under a is_staff filter the queryset
+        # no longer matches the users afterwards
+        pks = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_staff=True)
+        invalidate_user_tokens(pks)
         self.message_user(request, f'{updated} users have been made staff members.')
     make_staff.short_description = "Make selected users staff"
     
     def remove_staff(self, request, queryset):
+        # Taken before the update: under a is_staff filter the queryset
+        # no longer matches the users afterwards
+        pks = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_staff=False)
+        invalidate_user_tokens(pks)
         self.message_user(request, f'{updated} users have been removed from staff.')
     remove_staff.short_description = "Remove staff status from selected users"
     
     def export_users(self, request, queryset):
-        # This would typically export to CSV/Excel
-        self.message_user(request, f'{queryset.count()} users selected for export.')
+        return exports.export_users(queryset, filename='users')
     export_users.short_description = "Export selected users"
     
     def send_welcome_email(self, request, queryset):
@@ -149,4 +164,4 @@ class CustomUserAdmin(BaseUserAdmin):
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.prefetch_related('created_events', 'participated_events')
+        return with_event_counts(qs)
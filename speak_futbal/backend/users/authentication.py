@@ -0,0 +1,153 @@
+"""
+Token authentication with the token -> user lookup cached.
+
+DRF's TokenAuthentication joins Token and user on every authenticated
+request. CachedTokenAuthentication keeps the resolved user's field values,
+all but the password hash, in a small per-process LRU so a warm request
+authenticates without touching the database. When TOKEN_AUTH_CACHE_ALIAS
+names a cache shared by every worker (Redis), the LRU is backed by it.
+Entries are keyed by a hash of the token.
+
+Invalidation happens through users.signals. Deleting a token (logout)
+clears it from the shared cache and this process's LRU. Saving or
+deactivating a user clears all of that user's tokens. Other processes
+may keep serving their LRU entry for up to TOKEN_AUTH_LOCAL_TIMEOUT
+seconds, so that bound is kept short. A cache local to each process
+would stretch it to TOKEN_AUTH_CACHE_TIMEOUT, which is why the second
+layer is only used when it is shared.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+# The password hash stays in the database; it is deferred on cached users
+_FIELDS = tuple(field.attname for field in User._meta.concrete_fields if field.name != 'password')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class _LRU:
+    """A thread-safe, size-bounded mapping whose entries expire."""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > _setting('TOKEN_AUTH_LRU_SIZE', 1024):
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = _LRU()
+
+
+def _cache():
+    """The shared cache behind the LRU, or None when none is configured."""
+    alias = _setting('TOKEN_AUTH_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _cache_key(token_key):
+    return f'auth:token:{hashlib.sha256(token_key.encode()).hexdigest()}'
+
+
+def _freeze(user):
+    """The user's field values, safe to share between requests."""
+    return tuple(getattr(user, attname) for attname in _FIELDS)
+
+
+def _thaw(values):
+    # A fresh instance per request, so views that modify request.user never
+    # touch the cached copy
+    return User.from_db('default', list(_FIELDS), values)
+
+
+def invalidate_token(token_key):
+    """Forget a token in the shared cache and this process's LRU."""
+    key = _cache_key(token_key)
+    _local.delete(key)
+    shared = _cache()
+    if shared is not None:
+        shared.delete(key)
+
+
+def invalidate_user_tokens(user_ids):
+    """
+    Forget every token of the given users.
+
+    For writes that bypass model signals, such as ``QuerySet.update()``.
+    """
+    for token_key in Token.objects.filter(user_id__in=list(user_ids)).values_list('key', flat=True):
+        invalidate_token(token_key)
+
+
+def clear_local_cache():
+    _local.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for TokenAuthentication with cached lookups."""
+
+    def authenticate_credentials(self, key):
+        cache_key = _cache_key(key)
+
+        values = _local.get(cache_key)
+        if values is None:
+            shared = _cache()
+            values = shared.get(cache_key) if shared is not None else None
+            if values is None:
+                user, token = super().authenticate_credentials(key)
+                values = _freeze(user)
+                if shared is not None:
+                    shared.set(cache_key, values, timeout=_setting('TOKEN_AUTH_CACHE_TIMEOUT', 300))
+            _local.set(cache_key, values, timeout=_setting('TOKEN_AUTH_LOCAL_TIMEOUT', 10))
+
+        user = _thaw(values)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return user, Token(key=key, user=user)
+
+
+def authentication_profile(name):
+    """
+    Return the authentication classes of a profile in AUTHENTICATION_PROFILES.
+
+    Use as ``authentication_classes = authentication_profile('none')``.
+    """
+    return [import_string(path) for path in settings.AUTHENTICATION_PROFILES[name]]
@@ -0,0 +1,28 @@
+"""
+Streaming CSV export of users for the admin.
+
+Event counts come from correlated subqueries in the same SELECT, so the
+export is one query read in chunks however many events each user has.
+"""
+from events.exports import EXPORT_CHUNK_SIZE, streaming_export
+
+from .models import with_event_counts
+
+USER_EXPORT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'location', 'latitude', 'longitude',
+    'is_active', 'is_staff', 'date_joined', 'last_login', 'created_event_count',
+    'participated_event_count',
+)
+
+
+def user_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    return (
+        with_event_counts(queryset.prefetch_related(None))
+        .order_by('id')
+        .values_list(*USER_EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def export_users(queryset, filename='users'):
+    return streaming_export(USER_EXPORT_FIELDS, user_export_rows(queryset), 'csv', filename)
@@ -1,95 +1,186 @@
+import json
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import Throttled
 from allauth.socialaccount.models import SocialAccount
 from django.contrib.auth import get_user_model, login
-import requests
 from rest_framework.authtoken.models import Token
 
+from .google_verify import (
+    GoogleAuthError,
+    GoogleUnavailable,
+    afetch_userinfo,
+    averify_id_token,
+    fetch_userinfo,
+    verify_id_token,
+)
+from .authentication import authentication_profile
+from .throttling import AuthIPThrottle
+from .usernames import create_user_with_unique_username
+
 User = get_user_model()
 
+
+def login_google_user(request, user_info):
+    """Find or create the user for verified Google claims, log them in and return the response body."""
+    google_id = user_info['sub']
+    email = user_info['email']
+
+    # Check if user exists via social account
+    try:
+        social_account = SocialAccount.objects.select_related('user').get(
+            provider='google',
+            uid=google_id
+        )
+        user = social_account.user
+    except SocialAccount.DoesNotExist:
+        # Create new user, named after the email with a numeric suffix if taken
+        user = create_user_with_unique_username(
+            email.split('@')[0],
+            email=email,
+            first_name=user_info.get('given_name', ''),
+            last_name=user_info.get('family_name', '')
+        )
+
+        # Create social account
+        social_account = SocialAccount.objects.create(
+            user=user,
+            provider='google',
+            uid=google_id,
+            extra_data=user_info
+        )
+
+    # Log the user in (creates session)
+    login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+
+    # Get or create token
+    token, _ = Token.objects.get_or_create(user=user)
+
+    # Return token and user data
+    from users.serializers import UserSerializer
+    return {
+        'token': token.key,
+        'user': UserSerializer(user).data
+    }
+
+
+def tokens_are_strings(*tokens):
+    """JSON bodies can carry any type; only strings reach the token parsers."""
+    return all(isinstance(token, str) for token in tokens if token)
+
+
 class GoogleLoginView(APIView):
+    authentication_classes = authentication_profile('none')
     permission_classes = []
-    
+    throttle_classes = [AuthIPThrottle]
+
     def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response(
+                {'error': 'Expected a JSON object'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # An id_token is verified locally; an access_token costs a call to Google
+        id_token = request.data.get('id_token')
         access_token = request.data.get('access_token')
-        
-        if not access_token:
+
+        if not (id_token or access_token):
             return Response(
-                {'error': 'access_token is required'}, 
+                {'error': 'id_token or access_token is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+        if not tokens_are_strings(id_token, access_token):
+            return Response(
+                {'error': 'id_token and access_token must be strings'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         try:
             # Verify token with Google
-            google_response = requests.get(
-                'https://www.googleapis.com/oauth2/v3/userinfo',
-                headers={'Authorization': f'Bearer {access_token}'}
+            user_info = verify_id_token(id_token) if id_token else fetch_userinfo(access_token)
+        except GoogleAuthError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except GoogleUnavailable:
+            return Response(
+                {'error': 'Google is unavailable, try again'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
-            
-            if google_response.status_code != 200:
-                return Response(
-                    {'error': 'Invalid access token'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            user_info = google_response.json()
-            email = user_info.get('email')
-            google_id = user_info.get('sub')
-            
-            if not email or not google_id:
-                return Response(
-                    {'error': 'Could not get user info from Google'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Check if user exists via social account
-            try:
-                social_account = SocialAccount.objects.get(
-                    provider='google',
-                    uid=google_id
-                )
-                user = social_account.user
-            except SocialAccount.DoesNotExist:
-                # Create new user
-                username = email.split('@')[0]
-                # Ensure unique username
-                base_username = username
-                counter = 1
-                while User.objects.filter(username=username).exists():
-                    username = f"{base_username}{counter}"
-                    counter += 1
-                
-                user = User.objects.create_user(
-                    username=username,
-                    email=email,
-                    first_name=user_info.get('given_name', ''),
-                    last_name=user_info.get('family_name', '')
-                )
-                
-                # Create social account
-                social_account = SocialAccount.objects.create(
-                    user=user,
-                    provider='google',
-                    uid=google_id,
-                    extra_data=user_info
-                )
-            
-            # Log the user in (creates session)
-            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
-            
-            # Get or create token
-            token, _ = Token.objects.get_or_create(user=user)
-            
-            # Return token and user data
-            from users.serializers import UserSerializer
-            return Response({
-                'token': token.key,
-                'user': UserSerializer(user).data
-            })
-            
+
+        try:
+            return Response(login_google_user(request, user_info))
         except Exception as e:
             return Response(
-                {'error': str(e)}, 
+                {'error': str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGoogleLoginView(View):
+    """
+    Same contract as GoogleLoginView, for ASGI deployments.
+
+    The Google lookup is awaited off the event loop, so a worker serves
+    other requests while it is in flight; only the database work runs in
+    the sync thread.
+    """
+
+    async def post(self, request):
+        # The same limit as GoogleLoginView; the bucket is one cache round trip
+        throttle = AuthIPThrottle()
+        if not throttle.allow_request(request, self):
+            wait = throttle.wait()
+            response = JsonResponse(
+                {'detail': str(Throttled(wait).detail)}, status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            response['Retry-After'] = str(math.ceil(wait))
+            return response
+
+        try:
+            data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+        except ValueError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        id_token = data.get('id_token')
+        access_token = data.get('access_token')
+
+        if not (id_token or access_token):
+            return JsonResponse(
+                {'error': 'id_token or access_token is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not tokens_are_strings(id_token, access_token):
+            return JsonResponse(
+                {'error': 'id_token and access_token must be strings'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if id_token:
+                user_info = await averify_id_token(id_token)
+            else:
+                user_info = await afetch_userinfo(access_token)
+        except GoogleAuthError as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except GoogleUnavailable:
+            return JsonResponse(
+                {'error': 'Google is unavailable, try again'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        try:
+            return JsonResponse(await sync_to_async(login_google_user)(request, user_info))
+        except Exception as e:
+            return JsonResponse(
+                {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
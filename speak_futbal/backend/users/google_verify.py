@@ -0,0 +1,251 @@
+"""
+Verification of Google sign-in credentials.
+
+ID tokens are verified locally: the RS256 signature is checked against
+Google's JWKS signing keys, which are fetched once, kept in process memory
+and in the shared cache, and refreshed when ``Cache-Control: max-age``
+says so or when a token names a ``kid`` we haven't seen (key rotation).
+A login with an ID token therefore makes no request to Google at all.
+
+Access tokens are checked against the userinfo endpoint through one pooled
+``requests.Session`` per process, with connect/read timeouts and retries on
+transient failures. Successful lookups are cached for a short time under a
+hash of the token, so a client retrying a login doesn't cost another round
+trip and the raw token never becomes a cache key.
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from jwt import JWT, jwk_from_dict
+from jwt.exceptions import JWTException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USERINFO_URL = 'https://www.googleapis.com/oauth2/v3/userinfo'
+DEFAULT_JWKS_URL = 'https://www.googleapis.com/oauth2/v3/certs'
+ID_TOKEN_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+
+JWKS_CACHE_KEY = 'google:jwks'
+# Used when the JWKS response carries no max-age
+JWKS_DEFAULT_MAX_AGE = 3600
+# Minimum gap between refreshes forced by an unknown kid, so a stream of
+# tokens with made-up kids can't turn into a stream of requests to Google
+JWKS_MIN_REFRESH_INTERVAL = 30
+
+
+class GoogleAuthError(Exception):
+    """The credential was rejected or didn't identify a user."""
+
+
+class GoogleUnavailable(Exception):
+    """Google couldn't be reached or kept failing."""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=getattr(settings, 'GOOGLE_HTTP_RETRIES', 2),
+                    backoff_factor=0.2,
+                    status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=('GET',),
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=getattr(settings, 'GOOGLE_HTTP_POOL_SIZE', 32),
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def _cache():
+    return caches[getattr(settings, 'GOOGLE_AUTH_CACHE_ALIAS', 'default')]
+
+
+def _userinfo_cache_key(access_token):
+    return f'google:userinfo:{hashlib.sha256(access_token.encode()).hexdigest()}'
+
+
+def fetch_userinfo(access_token):
+    """
+    Return Google's userinfo claims for an access token.
+
+    Raises GoogleAuthError if Google rejects the token or the claims lack
+    ``sub``/``email``, and GoogleUnavailable on network failures.
+    """
+    cache = _cache()
+    key = _userinfo_cache_key(access_token)
+    user_info = cache.get(key)
+    if user_info is not None:
+        return user_info
+
+    try:
+        response = get_session().get(
+            getattr(settings, 'GOOGLE_USERINFO_URL', DEFAULT_USERINFO_URL),
+            headers={'Authorization': f'Bearer {access_token}'},
+            timeout=getattr(settings, 'GOOGLE_HTTP_TIMEOUT', (3.05, 5)),
+        )
+    except requests.RequestException as exc:
+        raise GoogleUnavailable(str(exc)) from exc
+
+    if response.status_code >= 500:
+        raise GoogleUnavailable(f'userinfo returned {response.status_code}')
+    if response.status_code != 200:
+        raise GoogleAuthError('Invalid access token')
+
+    user_info = response.json()
+    if not user_info.get('email') or not user_info.get('sub'):
+        raise GoogleAuthError('Could not get user info from Google')
+
+    cache.set(key, user_info, timeout=getattr(settings, 'GOOGLE_USERINFO_CACHE_TIMEOUT', 60))
+    return user_info
+
+
+# Runs the blocking lookup in the executor rather than the thread shared by
+# sync views, so an ASGI worker keeps serving while Google answers
+afetch_userinfo = sync_to_async(fetch_userinfo, thread_sensitive=False)
+
+
+class _KeySet:
+    """Google's signing keys by ``kid``, as parsed from one JWKS document."""
+
+    def __init__(self, document, expires_at):
+        self.keys = {
+            key['kid']: jwk_from_dict(key)
+            for key in document.get('keys', ())
+            if key.get('kid') and key.get('kty') == 'RSA'
+        }
+        self.expires_at = expires_at
+
+
+_keys = None
+_keys_lock = threading.Lock()
+_last_forced_refresh = 0.0
+
+
+def _max_age(response):
+    match = re.search(r'max-age=(\d+)', response.headers.get('Cache-Control', ''))
+    return int(match.group(1)) if match else JWKS_DEFAULT_MAX_AGE
+
+
+def _fetch_jwks():
+    """Download the JWKS document and return ``(document, max_age)``."""
+    try:
+        response = get_session().get(
+            getattr(settings, 'GOOGLE_JWKS_URL', DEFAULT_JWKS_URL),
+            timeout=getattr(settings, 'GOOGLE_HTTP_TIMEOUT', (3.05, 5)),
+        )
+        response.raise_for_status()
+        return response.json(), _max_age(response)
+    except (requests.RequestException, ValueError) as exc:
+        raise GoogleUnavailable(f'Could not fetch Google signing keys: {exc}') from exc
+
+
+def _load_keys(force=False):
+    """
+    Return the current key set: from memory, then the shared cache, then Google.
+
+    ``force`` skips both caches, for a ``kid`` neither of them knows.
+    """
+    global _keys
+    now = time.time()
+    if not force and _keys is not None and _keys.expires_at > now:
+        return _keys
+
+    with _keys_lock:
+        if not force and _keys is not None and _keys.expires_at > now:
+            return _keys
+
+        cached = None if force else _cache().get(JWKS_CACHE_KEY)
+        if cached is not None:
+            document, expires_at = cached
+        else:
+            document, max_age = _fetch_jwks()
+            expires_at = now + max_age
+            if max_age > 0:
+                _cache().set(JWKS_CACHE_KEY, (document, expires_at), timeout=max_age)
+        _keys = _KeySet(document, expires_at)
+        return _keys
+
+
+def _signing_key(kid):
+    global _last_forced_refresh
+    key = _load_keys().keys.get(kid)
+    if key is None and time.time() - _last_forced_refresh >= JWKS_MIN_REFRESH_INTERVAL:
+        # Google rotated its keys before our copy expired
+        _last_forced_refresh = time.time()
+        key = _load_keys(force=True).keys.get(kid)
+    return key
+
+
+def reset_signing_keys():
+    """Forget the in-memory keys and the forced-refresh throttle."""
+    global _keys, _last_forced_refresh
+    _keys = None
+    _last_forced_refresh = 0.0
+
+
+def _token_header(id_token):
+    try:
+        segment = id_token.split('.')[0]
+        return json.loads(base64.urlsafe_b64decode(segment + '=' * (-len(segment) % 4)))
+    except (ValueError, IndexError):
+        raise GoogleAuthError('Malformed id_token')
+
+
+def verify_id_token(id_token):
+    """
+    Verify a Google ID token offline and return its claims.
+
+    Checks the signature against the cached JWKS, the issuer, the audience
+    (GOOGLE_CLIENT_ID) and expiry. The claims have the same ``sub``/``email``
+    shape as userinfo. Raises GoogleAuthError or GoogleUnavailable.
+    """
+    client_id = getattr(settings, 'GOOGLE_CLIENT_ID', '')
+    if not client_id:
+        raise GoogleAuthError('id_token sign-in is not configured')
+
+    header = _token_header(id_token)
+    if not isinstance(header, dict) or header.get('alg') != 'RS256':
+        raise GoogleAuthError('Unsupported id_token algorithm')
+    key = _signing_key(header.get('kid'))
+    if key is None:
+        raise GoogleAuthError('Unknown id_token signing key')
+
+    try:
+        claims = JWT().decode(id_token, key, algorithms={'RS256'})
+    except JWTException:
+        raise GoogleAuthError('Invalid id_token')
+
+    audience = claims.get('aud')
+    audiences = audience if isinstance(audience, list) else [audience]
+    if claims.get('iss') not in ID_TOKEN_ISSUERS or client_id not in audiences:
+        raise GoogleAuthError('id_token was not issued for this application')
+    if 'exp' not in claims:
+        raise GoogleAuthError('id_token has no expiry')
+    if not claims.get('email') or not claims.get('sub') or claims.get('email_verified') is False:
+        raise GoogleAuthError('Could not get user info from Google')
+    return claims
+
+
+averify_id_token = sync_to_async(verify_id_token, thread_sensitive=False)
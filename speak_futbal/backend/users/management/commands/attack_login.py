@@ -0,0 +1,81 @@
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from users.views import LoginView
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate a credential-stuffing burst against login/ and report how much '
+        'CPU it costs with and without the token-bucket throttles'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=500)
+        parser.add_argument('--ips', type=int, default=2, help='Distinct client addresses in the burst')
+        parser.add_argument('--usernames', type=int, default=20, help='Distinct usernames guessed')
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=5,
+            help='Unthrottled attempts timed to estimate the cost of the whole burst without throttles',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Rates: {settings.AUTH_THROTTLE_RATES['auth_ip']} per address, "
+            f"{settings.AUTH_THROTTLE_RATES['login_username']} failures per username"
+        )
+        # Every rejected attempt would otherwise log a warning
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        original = LoginView.throttle_classes
+        try:
+            LoginView.throttle_classes = []
+            sample = self.burst(options['sample'], options)
+        finally:
+            LoginView.throttle_classes = original
+        per_attempt = sample['cpu'] / max(1, options['sample'])
+        self.report('unthrottled (sampled)', sample, options['sample'])
+        self.stdout.write(
+            f"  whole burst would cost ~{per_attempt * options['attempts']:.1f}s CPU"
+        )
+
+        self.report('throttled', self.burst(options['attempts'], options), options['attempts'])
+
+    def burst(self, attempts, options):
+        client = Client()
+        url = reverse('login')
+        statuses = Counter()
+        run_id = time.time_ns()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            cpu_started = time.process_time()
+            started = time.perf_counter()
+            for i in range(attempts):
+                response = client.post(
+                    url,
+                    {'username': f'victim{run_id}-{i % options["usernames"]}', 'password': f'guess{i}'},
+                    REMOTE_ADDR=f'198.51.100.{i % options["ips"] + 1}',
+                )
+                statuses[response.status_code] += 1
+            return {
+                'statuses': statuses,
+                'cpu': time.process_time() - cpu_started,
+                'elapsed': time.perf_counter() - started,
+            }
+
+    def report(self, label, result, attempts):
+        hashed = attempts - result['statuses'][429]
+        self.stdout.write(self.style.MIGRATE_HEADING(f'== {label}'))
+        self.stdout.write(f"  responses:      {dict(sorted(result['statuses'].items()))}")
+        self.stdout.write(f'  reached hasher: {hashed} of {attempts}')
+        self.stdout.write(
+            f"  CPU:            {result['cpu']:.2f}s ({result['cpu'] / attempts * 1000:.1f}ms/attempt)"
+        )
+        self.stdout.write(f"  wall time:      {result['elapsed']:.2f}s")
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication, TokenAuthentication
+
+from events.views import EventListView
+
+FAST_PATH = 'users.middleware.AnonymousFastPathMiddleware'
+LEGACY_CHAIN = [TokenAuthentication, SessionAuthentication, BasicAuthentication]
+
+
+class Command(BaseCommand):
+    help = (
+        'Requests/sec for anonymous GETs of the events list with the old '
+        'Token/Session/Basic chain and with the current profile and fast path'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        url = reverse('event-list')
+        legacy_middleware = [name for name in settings.MIDDLEWARE if name != FAST_PATH]
+        current_classes = EventListView.authentication_classes
+
+        for label, cookies in (('no cookies', {}), ('stale session cookie', {settings.SESSION_COOKIE_NAME: 'stale'})):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== anonymous, {label}'))
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                EventListView.authentication_classes = LEGACY_CHAIN
+                try:
+                    with override_settings(MIDDLEWARE=legacy_middleware):
+                        before = self.measure(url, cookies, options['requests'])
+                finally:
+                    EventListView.authentication_classes = current_classes
+                after = self.measure(url, cookies, options['requests'])
+            self.stdout.write(f'  before: {before:8.0f} req/s')
+            self.stdout.write(f'  after:  {after:8.0f} req/s  ({after / before - 1:+.0%})')
+
+    def measure(self, url, cookies, count):
+        client = Client()
+        client.cookies.load(cookies)
+        client.get(url)  # warm the response cache
+        started = time.perf_counter()
+        for _ in range(count):
+            client.get(url)
+        return count / (time.perf_counter() - started)
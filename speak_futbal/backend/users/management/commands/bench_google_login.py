@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, RequestFactory, override_settings
+
+from users.google_auth import AsyncGoogleLoginView, GoogleLoginView
+from users.testing import StubGoogleServer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure Google login latency against a local stub of the userinfo '
+        'endpoint, for the sync and async views at several concurrency levels'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Logins per run')
+        parser.add_argument('--concurrency', default='1,8,32', help='Comma-separated concurrency levels')
+        parser.add_argument('--latency', type=float, default=80, help='Stub response time in ms')
+        parser.add_argument(
+            '--distinct-tokens',
+            type=int,
+            default=50,
+            help='Distinct access tokens per run; repeats are served from the userinfo cache',
+        )
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        self.prefix = f'valid-bench-{uuid.uuid4().hex[:8]}'
+        try:
+            with StubGoogleServer(latency=options['latency'] / 1000) as google:
+                with override_settings(GOOGLE_USERINFO_URL=google.userinfo_url):
+                    for concurrency in levels:
+                        for mode in ('sync', 'async'):
+                            self.run(mode, concurrency, google, options)
+        finally:
+            User.objects.filter(email__startswith=self.prefix).delete()
+
+    def tokens(self, run, options):
+        distinct = max(1, options['distinct_tokens'])
+        return [f'{self.prefix}-{run}-{i % distinct}' for i in range(options['requests'])]
+
+    def run(self, mode, concurrency, google, options):
+        google.hits.clear()
+        tokens = self.tokens(f'{mode}{concurrency}', options)
+        started = time.perf_counter()
+        if mode == 'sync':
+            timings = self.run_sync(tokens, concurrency)
+        else:
+            timings = asyncio.run(self.run_async(tokens, concurrency))
+        elapsed = time.perf_counter() - started
+
+        failures = sum(1 for status, _ in timings if status != 200)
+        latencies = sorted(seconds * 1000 for _, seconds in timings)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{mode:>5} c={concurrency:<3} '
+            f'{len(tokens) / elapsed:8.1f} logins/s  '
+            f'p50 {statistics.median(latencies):7.1f}ms  p95 {p95:7.1f}ms  '
+            f'google calls {google.hits.get("/userinfo", 0):4}  failures {failures}'
+        )
+
+    def run_sync(self, tokens, concurrency):
+        factory = RequestFactory()
+        view = GoogleLoginView.as_view()
+
+        def login(token):
+            from django.db import connection
+            request = factory.post('/users/google-login/', {'access_token': token})
+            request.session = SessionStore()
+            started = time.perf_counter()
+            try:
+                status = view(request).status_code
+            finally:
+                if threading.current_thread() is not threading.main_thread():
+                    connection.close()
+            return status, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            return list(pool.map(login, tokens))
+
+    async def run_async(self, tokens, concurrency):
+        factory = AsyncRequestFactory()
+        view = AsyncGoogleLoginView.as_view()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def login(token):
+            async with semaphore:
+                request = factory.post(
+                    '/users/google-login/async/', {'access_token': token}, content_type='application/json'
+                )
+                request.session = SessionStore()
+                started = time.perf_counter()
+                response = await view(request)
+                return response.status_code, time.perf_counter() - started
+
+        return await asyncio.gather(*(login(token) for token in tokens))
@@ -0,0 +1,52 @@
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+
+from users.authentication import CachedTokenAuthentication, clear_local_cache, invalidate_token
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request cost of the authentication stage with and without the token cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        name = f'bench-auth-{uuid.uuid4().hex[:8]}'
+        user = User.objects.create_user(username=name, email=f'{name}@bench.invalid')
+        token = Token.objects.create(user=user)
+        factory = RequestFactory()
+        http_request = factory.get('/api/users/me/', HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        def authenticate(backend, before=None):
+            timings = []
+            for _ in range(options['requests']):
+                if before:
+                    before()
+                started = time.perf_counter()
+                backend.authenticate(Request(http_request))
+                timings.append(time.perf_counter() - started)
+            return sorted(timings)[len(timings) // 2] * 1_000_000
+
+        try:
+            invalidate_token(token.key)
+            results = [
+                ('TokenAuthentication', authenticate(TokenAuthentication())),
+                ('cached, shared cache only', authenticate(CachedTokenAuthentication(), clear_local_cache)),
+                ('cached, in-process LRU', authenticate(CachedTokenAuthentication())),
+            ]
+        finally:
+            user.delete()
+
+        baseline = results[0][1]
+        for label, median in results:
+            saved = baseline - median
+            self.stdout.write(f'{label:>26}: {median:8.1f}us/request  saved {saved:8.1f}us')
@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from stats.rollups import deferred, record_users
+from users.usernames import next_username
+
+User = get_user_model()
+
+
+def legacy_next_username(base):
+    """The original probe loop from GoogleLoginView: one query per collision."""
+    username = base
+    counter = 1
+    while User.objects.filter(username=username).exists():
+        username = f"{base}{counter}"
+        counter += 1
+    return username
+
+
+class Command(BaseCommand):
+    help = 'Compare the username probe loop with the single-query allocator on colliding prefixes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collisions', type=int, default=5000, help='Existing users sharing the prefix')
+        parser.add_argument('--prefix', default='benchjohn')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        count = options['collisions']
+        if User.objects.filter(username__startswith=prefix).exists():
+            self.stderr.write(self.style.ERROR(f'Users starting with {prefix!r} already exist; pick another --prefix'))
+            return
+
+        names = [prefix] + [f'{prefix}{i}' for i in range(1, count)]
+        record_users(User.objects.bulk_create(
+            [User(username=name, email=f'{name}@bench.invalid') for name in names],
+            batch_size=1000,
+        ))
+        try:
+            for label, allocate in (('probe loop', legacy_next_username), ('allocator', next_username)):
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        started = time.perf_counter()
+                        username = allocate(prefix)
+                        timings.append(time.perf_counter() - started)
+                self.stdout.write(
+                    f'{label:>10}: {username}  {len(queries):5} queries  '
+                    f'best {min(timings) * 1000:9.2f}ms'
+                )
+        finally:
+            with deferred():
+                User.objects.filter(username__in=names).delete()
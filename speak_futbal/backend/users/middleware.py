@@ -0,0 +1,54 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.urls import reverse
+
+
+class AnonymousFastPathMiddleware:
+    """
+    Skip DRF authentication for anonymous reads of public endpoints.
+
+    A GET or HEAD to one of ANONYMOUS_FAST_PATH_URLS that carries neither an
+    Authorization header nor a session cookie can only ever be anonymous,
+    so the request is marked as such up front. DRF then uses that user
+    instead of running the authenticator chain (the same hook as
+    ``APIRequestFactory``'s forced authentication), and no token or
+    session lookup happens.
+
+    Both sync and async capable, so under ASGI it doesn't force the async
+    read views back onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._paths = None
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @property
+    def paths(self):
+        # Reversed on first use; URLconfs aren't loaded when middleware is built
+        if self._paths is None:
+            self._paths = frozenset(reverse(name) for name in getattr(settings, 'ANONYMOUS_FAST_PATH_URLS', ()))
+        return self._paths
+
+    def mark_anonymous(self, request):
+        if (
+            request.method in ('GET', 'HEAD')
+            and 'HTTP_AUTHORIZATION' not in request.META
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and request.path in self.paths
+        ):
+            request._force_auth_user = AnonymousUser()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.mark_anonymous(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self.mark_anonymous(request)
+        return await self.get_response(request)
@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
@@ -9,3 +11,31 @@ class CustomUser(AbstractUser):
     
     def __str__(self):
         return self.email
+
+
+def _count_subquery(model, column):
+    counts = (
+        model.objects.filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def with_event_counts(queryset):
+    """
+    Annotate ``created_event_count`` and ``participated_event_count``.
+
+    Correlated subqueries rather than two Count(distinct=True) joins, which
+    multiply each user's created and participated rows before counting.
+    """
+    created = CustomUser.created_events.field
+    participated = CustomUser.participated_events.field
+    return queryset.annotate(
+        created_event_count=_count_subquery(created.model, created.attname),
+        participated_event_count=_count_subquery(
+            participated.remote_field.through, participated.m2m_reverse_name()
+        ),
+    )
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user_tokens(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    # Cached users carry their field values, so any change (deactivation
+    # included) must drop them; login()'s last_login bump is the exception
+    if created or raw or update_fields == frozenset({'last_login'}):
+        return
+    invalidate_user_tokens([instance.pk])
@@ -0,0 +1,138 @@
+"""
+A local stand-in for Google's sign-in endpoints, for tests and benchmarks.
+
+Access tokens of the form ``valid-<anything>`` are accepted and map to a
+stable user; anything else is rejected with 401, like the real endpoint.
+The server also publishes a JWKS document for a signing key it holds, so
+ID tokens can be minted with ``sign_id_token()`` and verified offline.
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt import JWT
+from jwt.jwk import RSAJWK
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        if self.path == '/userinfo':
+            token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+            if not token.startswith('valid-'):
+                self.send_json(401, {'error': 'invalid_token'})
+                return
+            self.send_json(200, server.userinfo_for(token))
+            return
+        if self.path == '/certs':
+            self.send_json(
+                200,
+                server.jwks(),
+                headers={'Cache-Control': f'public, max-age={server.jwks_max_age}, must-revalidate'},
+            )
+            return
+        self.send_json(404, {'error': 'not_found'})
+
+
+class StubGoogleServer(ThreadingHTTPServer):
+    """
+    Serve the stub on an ephemeral localhost port in a background thread.
+
+    Use as a context manager; ``userinfo_url`` is what GOOGLE_USERINFO_URL
+    should point at, ``hits`` counts requests per path.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency=0.0, client_id='test-client-id', jwks_max_age=3600):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.latency = latency
+        self.client_id = client_id
+        self.jwks_max_age = jwks_max_age
+        self.hits = {}
+        self.lock = threading.Lock()
+        self.signing_keys = []
+        self.rotate_keys()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def userinfo_url(self):
+        return f'{self.base_url}/userinfo'
+
+    @property
+    def jwks_url(self):
+        return f'{self.base_url}/certs'
+
+    def rotate_keys(self):
+        """Start signing with a new key; the previous one stays published."""
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.signing_keys = [(uuid.uuid4().hex, RSAJWK(key))] + self.signing_keys[:1]
+
+    def jwks(self):
+        keys = []
+        for kid, key in self.signing_keys:
+            public = key.to_dict(public_only=True)
+            public.update(kid=kid, alg='RS256', use='sig')
+            keys.append(public)
+        return {'keys': keys}
+
+    def sign_id_token(self, subject='1234567890', email='player@example.com', **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com',
+            'aud': self.client_id,
+            'sub': subject,
+            'email': email,
+            'email_verified': True,
+            'given_name': 'Test',
+            'family_name': 'Player',
+            'iat': now,
+            'exp': now + 3600,
+        }
+        payload.update(claims)
+        kid, key = self.signing_keys[0]
+        return JWT().encode(payload, key, alg='RS256', optional_headers={'kid': kid})
+
+    @staticmethod
+    def userinfo_for(token):
+        subject = hashlib.sha1(token.encode()).hexdigest()[:16]
+        return {
+            'sub': subject,
+            'email': f'{token}@example.com',
+            'given_name': 'Test',
+            'family_name': 'Player',
+        }
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -1,3 +1,413 @@
-from django.test import TestCase
+import base64
+import csv
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import IntegrityError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .admin import CustomUserAdmin
+from .authentication import CachedTokenAuthentication, _cache_key, clear_local_cache
+from .google_verify import reset_signing_keys
+from .testing import StubGoogleServer
+from .throttling import TokenBucket
+from .usernames import create_user_with_unique_username, next_username
+
+User = get_user_model()
+
+
+class GoogleTestCase(TestCase):
+    """Runs against a local StubGoogleServer with caches and signing keys reset."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.google = StubGoogleServer().__enter__()
+        cls.addClassCleanup(cls.google.__exit__, None, None, None)
+
+    def setUp(self):
+        caches['default'].clear()
+        reset_signing_keys()
+        self.google.hits.clear()
+        override = override_settings(
+            GOOGLE_USERINFO_URL=self.google.userinfo_url,
+            GOOGLE_JWKS_URL=self.google.jwks_url,
+            GOOGLE_CLIENT_ID=self.google.client_id,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class GoogleLoginTests(GoogleTestCase):
+
+    def test_login_creates_user_and_token(self):
+        response = self.client.post(reverse('google-login'), {'access_token': 'valid-abc'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['email'], 'valid-abc@example.com')
+        self.assertTrue(Token.objects.filter(key=response.data['token']).exists())
+
+    def test_userinfo_is_cached_per_token(self):
+        url = reverse('google-login')
+        first = self.client.post(url, {'access_token': 'valid-abc'})
+        second = self.client.post(url, {'access_token': 'valid-abc'})
+        self.assertEqual(first.data['token'], second.data['token'])
+        self.assertEqual(self.google.hits['/userinfo'], 1)
+
+    def test_rejected_token(self):
+        response = self.client.post(reverse('google-login'), {'access_token': 'forged'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Invalid access token'})
+
+    @override_settings(GOOGLE_USERINFO_URL='http://127.0.0.1:9/userinfo')
+    def test_unreachable_google(self):
+        response = self.client.post(reverse('google-login'), {'access_token': 'valid-abc'})
+        self.assertEqual(response.status_code, 503)
+
+    async def test_async_login(self):
+        response = await self.async_client.post(
+            reverse('google-login-async'),
+            {'access_token': 'valid-async'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['user']['email'], 'valid-async@example.com')
+
+
+class GoogleIdTokenTests(GoogleTestCase):
+    def login(self, id_token):
+        return self.client.post(reverse('google-login'), {'id_token': id_token})
+
+    def test_login_without_calling_google(self):
+        response = self.login(self.google.sign_id_token())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['email'], 'player@example.com')
+        self.assertEqual(self.login(self.google.sign_id_token()).status_code, 200)
+        self.assertEqual(self.google.hits, {'/certs': 1})
+
+    def test_keys_are_shared_between_processes(self):
+        self.login(self.google.sign_id_token())
+        # A fresh process has no keys in memory but finds them in the cache
+        reset_signing_keys()
+        self.assertEqual(self.login(self.google.sign_id_token()).status_code, 200)
+        self.assertEqual(self.google.hits, {'/certs': 1})
+
+    def test_key_rotation_refetches_once(self):
+        self.login(self.google.sign_id_token())
+        self.google.rotate_keys()
+        self.assertEqual(self.login(self.google.sign_id_token()).status_code, 200)
+        self.assertEqual(self.login(self.google.sign_id_token()).status_code, 200)
+        self.assertEqual(self.google.hits, {'/certs': 2})
+
+    def test_rejected_tokens(self):
+        now = int(time.time())
+        for token in (
+            self.google.sign_id_token(aud='someone-else'),
+            self.google.sign_id_token(iss='https://evil.example.com'),
+            self.google.sign_id_token(exp=now - 60),
+            self.google.sign_id_token(email_verified=False),
+            self.google.sign_id_token()[:-4] + 'AAAA',
+            'not-a-jwt',
+        ):
+            with self.subTest(token=token[:20]):
+                self.assertEqual(self.login(token).status_code, 400)
+
+    def test_non_string_tokens_are_rejected(self):
+        for body in ({'id_token': ['a.b.c']}, {'id_token': {'kid': 'x'}}, {'access_token': 42}):
+            with self.subTest(body=body):
+                response = self.client.post(reverse('google-login'), body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.google.hits, {})
+
+    async def test_async_non_string_tokens_are_rejected(self):
+        for body in ({'id_token': ['a.b.c']}, {'access_token': 42}):
+            with self.subTest(body=body):
+                response = await self.async_client.post(
+                    reverse('google-login-async'), body, content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 400)
+
+    @override_settings(GOOGLE_CLIENT_ID='')
+    def test_disabled_without_client_id(self):
+        response = self.login(self.google.sign_id_token())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.google.hits, {})
+
+
+class UsernameAllocationTests(TestCase):
+    def make_users(self, *usernames):
+        for username in usernames:
+            User.objects.create_user(username=username, email=f'{username}@example.com')
+
+    def test_free_base_is_used_as_is(self):
+        self.make_users('johnny', 'john1')
+        self.assertEqual(next_username('john'), 'john')
+
+    def test_next_suffix_after_highest_in_one_query(self):
+        self.make_users('john', 'john1', 'john7', 'johnny', 'john.doe', 'john7a')
+        with self.assertNumQueries(1):
+            self.assertEqual(next_username('john'), 'john8')
+
+    def test_regex_characters_in_base(self):
+        self.make_users('j.doe', 'jxdoe1')
+        self.assertEqual(next_username('j.doe'), 'j.doe1')
+
+    def test_retries_when_a_concurrent_signup_takes_the_name(self):
+        self.make_users('taken')
+        with mock.patch('users.usernames.next_username', side_effect=['taken', 'fresh']):
+            user = create_user_with_unique_username('taken', email='new@example.com')
+        self.assertEqual(user.username, 'fresh')
+
+    def test_other_integrity_errors_propagate(self):
+        self.make_users('john')
+        with self.assertRaises(IntegrityError):
+            create_user_with_unique_username('john', email='john@example.com')
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        clear_local_cache()
+        self.user = User.objects.create_user(username='player', email='player@example.com')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.token.key}'}
+
+    def test_warm_request_skips_the_database(self):
+        url = reverse('profile')
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, **self.auth)
+        self.assertEqual(response.data['email'], 'player@example.com')
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_shared_cache_serves_other_processes(self):
+        self.client.get(reverse('profile'), **self.auth)
+        clear_local_cache()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('profile'), **self.auth).status_code, 200)
+
+    def test_without_a_shared_cache_other_processes_hit_the_database(self):
+        self.client.get(reverse('profile'), **self.auth)
+        self.assertFalse(caches['default'].get(_cache_key(self.token.key)))
+        clear_local_cache()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(reverse('profile'), **self.auth).status_code, 200)
+
+    @override_settings(TOKEN_AUTH_CACHE_ALIAS='default')
+    def test_password_hash_is_not_cached(self):
+        self.user.set_password('correct horse')
+        self.user.save()
+        self.client.get(reverse('profile'), **self.auth)
+        values = caches['default'].get(_cache_key(self.token.key))
+        self.assertNotIn(self.user.password, values)
+        self.assertEqual(values[0], self.user.pk)
+
+    def test_logout_revokes_the_cached_token(self):
+        self.client.get(reverse('profile'), **self.auth)
+        self.assertEqual(self.client.post(reverse('logout'), **self.auth).status_code, 204)
+        self.assertEqual(self.client.get(reverse('profile'), **self.auth).status_code, 401)
+
+    def test_deactivation_revokes_the_cached_user(self):
+        self.client.get(reverse('profile'), **self.auth)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('profile'), **self.auth).status_code, 401)
+
+    def test_deactivating_from_a_filtered_changelist_revokes_the_cached_user(self):
+        self.client.get(reverse('profile'), **self.auth)
+        admin_client = Client()
+        admin_client.force_login(
+            User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        )
+        admin_client.post(reverse('admin:users_customuser_changelist') + '?is_active__exact=1', {
+            'action': 'deactivate_users',
+            '_selected_action': [self.user.pk],
+        })
+        self.assertEqual(self.client.get(reverse('profile'), **self.auth).status_code, 401)
+
+    def test_profile_changes_are_not_served_stale(self):
+        url = reverse('profile')
+        self.client.get(url, **self.auth)
+        self.client.put(url, {'location': 'Pokhara'}, content_type='application/json', **self.auth)
+        self.assertEqual(self.client.get(url, **self.auth).data['location'], 'Pokhara')
+
+
+class AuthenticationProfileTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        clear_local_cache()
+
+    def test_anonymous_list_read_skips_authenticators(self):
+        with mock.patch.object(CachedTokenAuthentication, 'authenticate') as authenticate:
+            response = self.client.get(reverse('event-list'))
+        self.assertEqual(response.status_code, 200)
+        authenticate.assert_not_called()
+
+    def test_credentials_disable_the_fast_path(self):
+        user = User.objects.create_user(username='player', email='player@example.com')
+        token = Token.objects.create(user=user)
+        with mock.patch.object(CachedTokenAuthentication, 'authenticate', return_value=None) as authenticate:
+            self.client.get(reverse('event-list'), HTTP_AUTHORIZATION=f'Token {token.key}')
+        authenticate.assert_called_once()
+
+    def test_basic_auth_is_not_accepted_by_default(self):
+        User.objects.create_user(username='player', email='player@example.com', password='pass12345!')
+        credentials = base64.b64encode(b'player:pass12345!').decode()
+        response = self.client.get(reverse('profile'), HTTP_AUTHORIZATION=f'Basic {credentials}')
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_login_ignores_a_stale_token_header(self):
+        User.objects.create_user(username='player', email='player@example.com', password='pass12345!')
+        response = self.client.post(
+            reverse('login'),
+            {'username': 'player', 'password': 'pass12345!'},
+            HTTP_AUTHORIZATION='Token revoked',
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(AUTH_THROTTLE_RATES={'auth_ip': '3/min', 'login_username': '2/min'})
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        User.objects.create_user(username='player', email='player@example.com', password='pass12345!')
+
+    def login(self, username='player', password='wrong', ip='10.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'username': username, 'password': password}, REMOTE_ADDR=ip
+        )
+
+    def test_ip_bucket_rejects_before_hashing(self):
+        for i in range(3):
+            self.assertEqual(self.login(username=f'guess{i}').status_code, 401)
+        with mock.patch('users.views.authenticate') as authenticate:
+            response = self.login(username='guess3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        authenticate.assert_not_called()
+        # Other clients keep their own bucket
+        self.assertEqual(self.login(username='guess3', ip='10.0.0.2').status_code, 401)
+
+    def test_username_bucket_spans_addresses(self):
+        self.assertEqual(self.login(ip='10.0.0.1').status_code, 401)
+        self.assertEqual(self.login(ip='10.0.0.2').status_code, 401)
+        self.assertEqual(self.login(password='pass12345!', ip='10.0.0.3').status_code, 429)
+
+    def test_successful_logins_do_not_spend_the_username_bucket(self):
+        for ip in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            self.assertEqual(self.login(password='pass12345!', ip=ip).status_code, 200)
+
+    def test_forwarded_for_cannot_be_rotated_past_the_proxy(self):
+        for i in range(3):
+            self.client.post(
+                reverse('login'), {'username': f'guess{i}', 'password': 'wrong'},
+                REMOTE_ADDR='10.1.1.1', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}, 10.0.0.9',
+            )
+        response = self.client.post(
+            reverse('login'), {'username': 'guess3', 'password': 'wrong'},
+            REMOTE_ADDR='10.1.1.1', HTTP_X_FORWARDED_FOR='192.0.2.99, 10.0.0.9',
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_non_object_bodies_are_rejected(self):
+        for j, name in enumerate(('login', 'google-login', 'google-login-async')):
+            for i, body in enumerate((['player'], 'player', 42)):
+                with self.subTest(view=name, body=body):
+                    response = self.client.post(
+                        reverse(name), body, content_type='application/json', REMOTE_ADDR=f'10.0.{j}.{i}'
+                    )
+                    self.assertEqual(response.status_code, 400)
+
+    def test_async_google_login_is_throttled(self):
+        url = reverse('google-login-async')
+        for _ in range(3):
+            self.assertEqual(self.client.post(url, {}, REMOTE_ADDR='10.0.0.1').status_code, 400)
+        response = self.client.post(url, {}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_bucket_refills(self):
+        bucket = TokenBucket('throttle:test', '2/min')
+        now = 1000.0
+        self.assertTrue(bucket.take(now))
+        self.assertTrue(bucket.take(now))
+        self.assertFalse(bucket.take(now))
+        self.assertAlmostEqual(bucket.wait(now), 30.0)
+        self.assertTrue(bucket.take(now + 30))
+
+
+class UserAdminExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(self.admin)
+
+    def test_export_action_streams_event_counts(self):
+        player = User.objects.create_user(username='player', email='player@example.com')
+        start = timezone.now()
+        for title in ('Friendly', 'Derby'):
+            event = self.admin.created_events.create(
+                title=title, description='Match', event_type='match', location='Tundikhel',
+                latitude=27.7, longitude=85.3, start_date=start, end_date=start + timedelta(hours=2),
+            )
+            event.participants.add(player, self.admin)
+
+        response = self.client.post(reverse('admin:users_customuser_changelist'), {
+            'action': 'export_users',
+            '_selected_action': [self.admin.pk, player.pk],
+        })
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode().splitlines()))
+        counts = {row['username']: (row['created_event_count'], row['participated_event_count']) for row in rows}
+        self.assertEqual(counts, {'admin': ('2', '2'), 'player': ('0', '2')})
+
+
+class UserAdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='pw')
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:users_customuser_changelist')
+
+    def make_users(self, count, prefix='fan'):
+        start = timezone.now()
+        users = [
+            User.objects.create_user(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com')
+            for i in range(count)
+        ]
+        for i, user in enumerate(users):
+            for title in range(i % 3):
+                event = user.created_events.create(
+                    title=f'Match {title}', description='Match', event_type='match', location='Tundikhel',
+                    latitude=27.7, longitude=85.3, start_date=start, end_date=start + timedelta(hours=2),
+                )
+                event.participants.add(*users[:4])
+        return users
+
+    def changelist_queries(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        self.make_users(3)
+        small, _ = self.changelist_queries()
+        self.make_users(30, prefix='supporter')
+        full, response = self.changelist_queries()
+        self.assertEqual(len(response.context['cl'].result_list), 25)
+        self.assertEqual(small, full)
+
+    def test_event_count_column_is_sortable(self):
+        self.make_users(6)
+        column = list(CustomUserAdmin.list_display).index('event_count')
+        _, response = self.changelist_queries(o=f'-{column + 1}')
+        counts = [user.created_event_count for user in response.context['cl'].result_list]
+        self.assertEqual(counts, sorted(counts, reverse=True))
+        self.assertEqual(counts[0], 2)
+        # fan2 created two events and joined all six
+        self.assertContains(response, '2 created, 6 participated')
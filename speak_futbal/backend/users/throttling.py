@@ -0,0 +1,131 @@
+"""
+Token-bucket throttles for the credential endpoints.
+
+Each bucket holds up to N tokens and refills at N per period, both taken
+from a DRF-style rate such as ``'10/min'`` in AUTH_THROTTLE_RATES. A
+request spends one token; an empty bucket means 429 with Retry-After.
+DRF runs throttles in ``initial()``, before the handler, so a throttled
+login is rejected without reaching ``authenticate()`` and its password
+hasher.
+
+Buckets live in AUTH_THROTTLE_CACHE_ALIAS, which must be a cache shared by
+all workers (Redis in production) for the limits to hold across them. The
+read-modify-write isn't atomic, so a concurrent burst can overshoot a
+bucket by a few requests; the limits stay within a small factor.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Return ``(capacity, refill_per_second)`` for a rate like ``'10/min'``."""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class TokenBucket:
+    def __init__(self, key, rate, cache=None):
+        self.key = key
+        self.capacity, self.refill = parse_rate(rate)
+        self.cache = cache or caches[getattr(settings, 'AUTH_THROTTLE_CACHE_ALIAS', 'default')]
+
+    def _load(self, now):
+        tokens, updated = self.cache.get(self.key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.refill)
+
+    def _timeout(self):
+        # Long enough for an empty bucket to refill; a missing bucket is full
+        return int(self.capacity / self.refill) + 1
+
+    def available(self, now=None):
+        return self._load(now or time.time())
+
+    def take(self, now=None):
+        """Spend one token. Returns True if there was one."""
+        now = now or time.time()
+        tokens = self._load(now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.cache.set(self.key, (tokens, now), timeout=self._timeout())
+        return allowed
+
+    def wait(self, now=None):
+        """Seconds until one token is available."""
+        missing = 1 - self.available(now)
+        return max(0.0, missing / self.refill)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle on a token bucket per ``get_bucket_key()``; the rate is AUTH_THROTTLE_RATES[scope]."""
+    scope = None
+
+    def get_rate(self):
+        try:
+            return settings.AUTH_THROTTLE_RATES[self.scope]
+        except (AttributeError, KeyError):
+            raise ImproperlyConfigured(f'No AUTH_THROTTLE_RATES entry for scope {self.scope!r}')
+
+    def get_bucket_key(self, request, view):
+        raise NotImplementedError('.get_bucket_key() must be overridden')
+
+    def get_bucket(self, request, view):
+        ident = self.get_bucket_key(request, view)
+        if ident is None:
+            return None
+        return TokenBucket(f'throttle:{self.scope}:{ident}', self.get_rate())
+
+    def allow_request(self, request, view):
+        self.bucket = self.get_bucket(request, view)
+        if self.bucket is None or self.bucket.take():
+            return True
+        return False
+
+    def wait(self):
+        return self.bucket.wait()
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Every credential request from one client address spends from its bucket."""
+    scope = 'auth_ip'
+
+    def get_bucket_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """
+    Failed logins for one username spend from its bucket.
+
+    Checking doesn't spend a token; only failures, recorded by the view
+    with ``record_failure()``, do. A user's successful logins therefore
+    never count against them, while guessing at one account is capped no
+    matter how many addresses it comes from.
+    """
+    scope = 'login_username'
+
+    def get_bucket_key(self, request, view):
+        # A JSON list or scalar body is rejected by the view
+        if not isinstance(request.data, dict):
+            return None
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return hashlib.sha1(username.strip().lower().encode()).hexdigest()
+
+    def allow_request(self, request, view):
+        self.bucket = self.get_bucket(request, view)
+        return self.bucket is None or self.bucket.available() >= 1
+
+    def record_failure(self, request, view):
+        bucket = self.get_bucket(request, view)
+        if bucket is not None:
+            bucket.take()
@@ -6,7 +6,7 @@ from .views import (
     UserDetailView,
     GetCSRFToken,
 )
-from .google_auth import GoogleLoginView
+from .google_auth import AsyncGoogleLoginView, GoogleLoginView
 
 urlpatterns = [
     path('csrf/', GetCSRFToken.as_view(), name='csrf'),
@@ -14,5 +14,7 @@ urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('me/', UserDetailView.as_view(), name='profile'),
-     path('google-login/', GoogleLoginView.as_view()),  
+    path('google-login/', GoogleLoginView.as_view(), name='google-login'),
+    # For ASGI deployments; doesn't hold a worker thread while Google answers
+    path('google-login/async/', AsyncGoogleLoginView.as_view(), name='google-login-async'),
 ] 
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+Allocation of unique usernames for accounts created on the user's behalf.
+
+A taken base name gets the next numeric suffix after the highest one in
+use ("john", "john1", "john2", ...). That suffix is found with one
+aggregate query over a range scan of the unique username index. Two
+concurrent signups can still pick the same name, so creation retries on
+the IntegrityError raised by the unique constraint.
+"""
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Cast, Substr
+
+User = get_user_model()
+
+# Leaves room for a suffix within AbstractUser.username's 150 characters
+MAX_BASE_LENGTH = 140
+# Longer numeric tails are treated as part of the name, not as a suffix
+MAX_SUFFIX_DIGITS = 9
+MAX_ATTEMPTS = 5
+
+
+def _base_username(base):
+    return (base or 'user')[:MAX_BASE_LENGTH]
+
+
+def next_username(base):
+    """Return ``base`` if it is free, else ``base`` plus the next unused suffix."""
+    base = _base_username(base)
+    suffixed = rf'^{re.escape(base)}[0-9]{{1,{MAX_SUFFIX_DIGITS}}}$'
+    # The range keeps the scan on the username index; the regex then picks
+    # out exactly base followed by digits
+    used = User.objects.filter(username__gte=base, username__lt=base + '\U0010ffff').aggregate(
+        base_taken=Count('pk', filter=Q(username=base)),
+        highest=Max(
+            Cast(Substr('username', len(base) + 1), models.BigIntegerField()),
+            filter=Q(username__regex=suffixed),
+        ),
+    )
+    if not used['base_taken']:
+        return base
+    return f"{base}{(used['highest'] or 0) + 1}"
+
+
+def create_user_with_unique_username(base, **fields):
+    """
+    Create a user named after ``base``, suffixed as needed to be unique.
+
+    Retries with a freshly allocated name when a concurrent signup takes
+    the chosen one first; other integrity errors propagate.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        username = next_username(base)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(username=username, **fields)
+        except IntegrityError:
+            if attempt == MAX_ATTEMPTS - 1 or not User.objects.filter(username=username).exists():
+                raise
@@ -6,19 +6,24 @@ from django.contrib.auth import authenticate
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
 from .serializers import UserSerializer, UserCreateSerializer
+from .authentication import authentication_profile
+from .throttling import AuthIPThrottle, LoginUsernameThrottle
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class GetCSRFToken(APIView):
+    authentication_classes = authentication_profile('none')
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         return Response({'detail': 'CSRF cookie set'})
 
 class UserCreateView(APIView):
+    authentication_classes = authentication_profile('none')
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthIPThrottle]
 
     def post(self, request):
         serializer = UserCreateSerializer(data=request.data)
@@ -49,9 +54,17 @@ class UserDetailView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class LoginView(APIView):
+    authentication_classes = authentication_profile('none')
     permission_classes = [permissions.AllowAny]
+    # Checked before authenticate() runs the password hasher
+    throttle_classes = [AuthIPThrottle, LoginUsernameThrottle]
 
     def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response(
+                {'error': 'Expected a JSON object'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         username = request.data.get('username')
         password = request.data.get('password')
        
@@ -65,6 +78,7 @@ class LoginView(APIView):
                 'token': token.key,
                 'user': UserSerializer(user).data
             })
+        LoginUsernameThrottle().record_failure(request, self)
         return Response(
             {'error': 'Invalid credentials'}, 
             status=status.HTTP_401_UNAUTHORIZED